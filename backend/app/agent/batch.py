@@ -0,0 +1,162 @@
+# app/agent/batch.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from app.agent.callbacks import track_extraction, with_metrics
+from app.agent.get_events_from_data import MODEL_NAME, get_llm, transform_event_data
+from app.agent.pipeline import extraction_cache, get_extraction_limiter
+from app.agent.prefilter import PREFILTER_ENABLED, PREFILTER_EXCERPTS, has_temporal_expression, temporal_excerpt
+from app.agent.tokens import count_tokens
+
+# Note tokens packed into one call, and the most notes per call
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "3000"))
+BATCH_MAX_NOTES = int(os.getenv("BATCH_MAX_NOTES", "25"))
+
+logger = logging.getLogger(__name__)
+
+
+class NoteEvents(BaseModel):
+    """Events found in a single note"""
+    note_id: str = Field(description="The id of the note the events come from")
+    event_date: List[str] = Field(description="The date the event will happen")
+    event_title: List[str] = Field(description="The title of event")
+    event_description: List[str] = Field(description="The description of event")
+
+
+class BatchResponse(BaseModel):
+    """Final response listing the events of every note"""
+    notes: List[NoteEvents] = Field(description="One entry per note, using the id from its note tag")
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Each note below is wrapped in a <note id=\"...\"> tag. "
+    "Extract the events of every note and report them under that note's id. "
+    "Any date should be written in a parsable format. If a note has no events then return empty lists for it."
+)
+
+batch_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", BATCH_SYSTEM_PROMPT),
+        ("user", "{notes}"),
+    ]
+)
+
+# Like EXTRACTION_VERSION, for the batch prompt. Batch results are cached
+# apart from the single-note extractions, which come from another prompt
+BATCH_EXTRACTION_VERSION = hashlib.sha256(
+    json.dumps([BATCH_SYSTEM_PROMPT, BatchResponse.schema(), MODEL_NAME], sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+BATCH_CACHE_KIND = f"batch-{BATCH_EXTRACTION_VERSION}"
+
+
+def format_note(note_id: str, text: str) -> str:
+    return f'<note id="{note_id}">\n{text}\n</note>'
+
+
+def build_batches(
+    notes: List[Tuple[str, str]],
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_notes: int = BATCH_MAX_NOTES,
+) -> List[List[Tuple[str, str]]]:
+    """
+    Greedily pack (note_id, text) pairs into batches that stay within the
+    token budget. A note that is larger than the budget on its own gets a
+    batch of its own.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+
+    for note_id, text in notes:
+        tokens = count_tokens(format_note(note_id, text))
+        if batch and (batch_tokens + tokens > token_budget or len(batch) >= max_notes):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append((note_id, text))
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def parse_batch(output) -> Dict[str, list]:
+    """
+    Split a BatchResponse function call back out into events per note_id.
+    """
+    function_call = output.additional_kwargs["function_call"]
+    inputs = json.loads(function_call["arguments"])
+    return {
+        str(entry["note_id"]): transform_event_data(entry)
+        for entry in inputs.get("notes", [])
+    }
+
+
+async def extract_batch(batch: List[Tuple[str, str]], llm) -> Dict[str, list]:
+    """
+    Extract the events of every note in batch with a single model call.
+    Notes the model leaves out, or a failed call, come back as {} the same
+    way output_agent_results reports a failure.
+    """
+    chain = batch_prompt | with_metrics(llm.bind_functions([BatchResponse], function_call={"name": "BatchResponse"}))
+
+    try:
+        output = await chain.ainvoke({
+            "notes": "\n\n".join(format_note(note_id, text) for note_id, text in batch)
+        })
+        results = parse_batch(output)
+    except Exception:
+        logger.exception("Error processing a batch of %d notes", len(batch))
+        results = {}
+
+    return {note_id: results.get(note_id, {}) for note_id, _ in batch}
+
+
+async def extract_events_batch(notes: Dict[str, str]) -> Dict[str, list]:
+    """
+    Extract events for many notes at once, packing the ones that are not
+    already cached into token-budgeted batches that run concurrently.
+
+    Args:
+        notes (dict): note_id -> note content
+
+    Returns:
+        dict: note_id -> events as returned by transform_event_data, or {} on failure
+    """
+    results = {}
+    misses = []
+
+    for note_id, text in notes.items():
+        if PREFILTER_ENABLED and not has_temporal_expression(text):
+            results[note_id] = []
+            continue
+
+        cached = await extraction_cache.get(text, BATCH_CACHE_KIND) if extraction_cache is not None else None
+        if cached is not None:
+            results[note_id] = cached
+        else:
+            misses.append((note_id, temporal_excerpt(text) if PREFILTER_EXCERPTS else text))
+
+    async def run(batch):
+        async with get_extraction_limiter():
+            with track_extraction("batch") as extraction:
+                batch_results = await extract_batch(batch, get_llm())
+                if extraction is not None:
+                    extraction.ok = all(isinstance(events, list) for events in batch_results.values())
+        return batch_results
+
+    for batch_results in await asyncio.gather(*(run(batch) for batch in build_batches(misses))):
+        for note_id, events in batch_results.items():
+            results[note_id] = events
+            if extraction_cache is not None and isinstance(events, list):
+                await extraction_cache.set(notes[note_id], events, BATCH_CACHE_KIND)
+
+    return results
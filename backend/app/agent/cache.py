@@ -0,0 +1,182 @@
+# app/agent/cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+EXTRACTION_CACHE_BACKEND = os.getenv("EXTRACTION_CACHE_BACKEND", "memory").lower()
+EXTRACTION_CACHE_URL = os.getenv("EXTRACTION_CACHE_URL", "redis://localhost:6379/0")
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(24 * 60 * 60)))
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "10000"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace so re-saving a note with different line endings or
+    trailing spaces still hits the cache.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def extraction_cache_key(text: str, version: str) -> str:
+    """
+    Build the cache key for a piece of note content.
+
+    Args:
+        text (str): The note content
+        version (str): Identifies the prompt and model that produced the events
+
+    Returns:
+        str: Hex digest of the version plus the normalized text
+    """
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class InMemoryCacheBackend:
+    """
+    Per-process LRU cache with a TTL on every entry.
+    """
+
+    def __init__(self, max_entries: int = EXTRACTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by every worker, stored in Redis. TTL and eviction are
+    handled by Redis itself (configure maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, url: str = EXTRACTION_CACHE_URL, prefix: str = "alignly:events:"):
+        # Optional dependency, only needed when this backend is selected
+        from redis import asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value, ttl: int):
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(self.prefix + "*"):
+            await self.client.delete(key)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted events in front of the agent.
+    """
+
+    def __init__(self, backend, version: str, ttl: int = EXTRACTION_CACHE_TTL):
+        self.backend = backend
+        self.version = version
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str, kind: str = None) -> str:
+        # kind separates entries produced differently from the same text,
+        # e.g. by another extraction mode
+        version = self.version if kind is None else f"{self.version}:{kind}"
+        return extraction_cache_key(text, version)
+
+    async def get(self, text: str, kind: str = None):
+        value = await self.backend.get(self.key(text, kind))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, text: str, events, kind: str = None):
+        await self.backend.set(self.key(text, kind), events, self.ttl)
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "ttl": self.ttl,
+            **self.backend.stats(),
+        }
+
+
+def build_extraction_cache(version: str, backend: str = EXTRACTION_CACHE_BACKEND):
+    """
+    Create the cache selected by EXTRACTION_CACHE_BACKEND ("memory", "redis"
+    or "none"). Returns None when caching is disabled.
+    """
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return ExtractionCache(RedisCacheBackend(), version)
+    if backend == "memory":
+        return ExtractionCache(InMemoryCacheBackend(), version)
+    raise ValueError(f"Unknown extraction cache backend: {backend}")
@@ -0,0 +1,140 @@
+# app/agent/callbacks.py
+import contextlib
+import time
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.metrics import (
+    METRICS_ENABLED,
+    agent_iterations,
+    agent_tool_calls,
+    extraction_duration,
+    llm_call_duration,
+    llm_tokens,
+    start_span,
+)
+from app.ratelimit import RATE_LIMIT_ENABLED, current_spend
+
+# Function calls that are the model's answer rather than a tool it wants run
+ANSWER_FUNCTIONS = ("Response", "BatchResponse")
+
+
+class ExtractionMetrics:
+    """Chat model calls of the extraction being run, see track_extraction()."""
+
+    __slots__ = ("llm_calls", "ok")
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.ok = False
+
+
+current_extraction = ContextVar("current_extraction", default=None)
+
+
+class LLMMetrics(BaseCallbackHandler):
+    """
+    Records the latency and token usage of every chat model call, the tools
+    the agent asked for, and counts the calls toward the current extraction.
+
+    It is attached to the model alone (see with_metrics) rather than passed
+    in each run's config, so the agent's other steps don't dispatch to it.
+    """
+
+    # Only counts and timestamps, no need for a thread hop per callback
+    run_inline = True
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), start_span("llm.call"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), start_span("llm.call"))
+
+    def _finish(self, run_id, model: str, outcome: str):
+        start, span = self._starts.pop(run_id, (None, None))
+        if start is not None:
+            llm_call_duration.observe(time.perf_counter() - start, model, outcome)
+        if span is not None:
+            span.set_attribute("llm.model", model)
+            span.end()
+
+        extraction = current_extraction.get()
+        if extraction is not None:
+            extraction.llm_calls += 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        output = response.llm_output or {}
+        model = output.get("model_name", "unknown")
+        usage = output.get("token_usage") or {}
+        if usage:
+            llm_tokens.inc(model, "prompt", amount=usage.get("prompt_tokens", 0))
+            llm_tokens.inc(model, "completion", amount=usage.get("completion_tokens", 0))
+
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                function_call = message.additional_kwargs.get("function_call") if message is not None else None
+                if function_call and function_call.get("name") not in ANSWER_FUNCTIONS:
+                    agent_tool_calls.inc(function_call.get("name"))
+
+        self._finish(run_id, model, "ok")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "unknown", "error")
+
+
+llm_metrics = LLMMetrics()
+
+
+class LLMSpend(BaseCallbackHandler):
+    """Adds the tokens of every chat model call to the spend of the current user, see ExtractionLimiter.spending()."""
+
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs):
+        spend = current_spend.get()
+        if spend is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        spend.tokens += usage.get("total_tokens") or usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+
+
+llm_spend = LLMSpend()
+
+
+def with_metrics(model):
+    """
+    Attach llm_metrics and llm_spend to a (bound) chat model, as far as
+    metrics and rate limiting are on.
+    """
+    callbacks = []
+    if METRICS_ENABLED:
+        callbacks.append(llm_metrics)
+    if RATE_LIMIT_ENABLED:
+        callbacks.append(llm_spend)
+    return model.with_config(callbacks=callbacks) if callbacks else model
+
+
+@contextlib.contextmanager
+def track_extraction(mode: str):
+    """
+    Time one extraction and count its model calls. Set .ok on the yielded
+    object once it succeeded. Yields None when metrics are off.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    extraction = ExtractionMetrics()
+    token = current_extraction.set(extraction)
+    start = time.perf_counter()
+    try:
+        yield extraction
+    finally:
+        current_extraction.reset(token)
+        extraction_duration.observe(time.perf_counter() - start, mode, "ok" if extraction.ok else "error")
+        agent_iterations.observe(extraction.llm_calls, mode)
@@ -0,0 +1,88 @@
+# app/agent/chunking.py
+import os
+import re
+from typing import List
+
+from app.agent.tokens import count_tokens, split_tokens
+
+try:
+    from dateutil import parser as date_parser
+except ImportError:  # dates are then compared as written
+    date_parser = None
+
+# Text longer than this is extracted in chunks of at most this many tokens,
+# each repeating the last CHUNK_OVERLAP_TOKENS of the one before so an event
+# cut at a boundary is still whole in one of them
+LONG_TEXT_TOKENS = int(os.getenv("LONG_TEXT_TOKENS", "1500"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "100"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def split_text(text: str, max_tokens: int = LONG_TEXT_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    Split text into chunks of whole sentences of at most max_tokens tokens,
+    each starting with about overlap_tokens worth of the previous chunk's
+    last sentences. A sentence longer than max_tokens is cut on tokens.
+    """
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if tokens > max_tokens:
+            sentences += [(piece, count_tokens(piece)) for piece in split_tokens(sentence, max_tokens - overlap_tokens)]
+        else:
+            sentences.append((sentence, tokens))
+
+    chunks, current, size = [], [], 0
+    for sentence, tokens in sentences:
+        if current and size + tokens > max_tokens:
+            chunks.append(" ".join(text for text, _ in current))
+
+            # Carry the tail of this chunk over into the next one
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                if overlap_size + previous[1] > overlap_tokens or overlap_size + previous[1] + tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous[1]
+            current, size = overlap, overlap_size
+
+        current.append((sentence, tokens))
+        size += tokens
+
+    if current:
+        chunks.append(" ".join(text for text, _ in current))
+    return chunks
+
+
+def _normalize_date(date: str) -> str:
+    if date_parser is not None:
+        try:
+            return date_parser.parse(date, fuzzy=True).isoformat()
+        except (ValueError, OverflowError):
+            pass
+    return _NON_WORD.sub(" ", date.lower()).strip()
+
+
+def event_key(event: dict) -> tuple:
+    """The normalized (date, title) two extractions of the same event share."""
+    return (
+        _normalize_date(str(event.get("date", ""))),
+        _NON_WORD.sub(" ", str(event.get("title", "")).lower()).strip(),
+    )
+
+
+def merge_events(results: List[list]) -> list:
+    """Concatenate the events of several chunks, keeping the first of each duplicate."""
+    events, seen = [], set()
+    for chunk_events in results:
+        for event in chunk_events:
+            key = event_key(event)
+            if key not in seen:
+                seen.add(key)
+                events.append(event)
+    return events
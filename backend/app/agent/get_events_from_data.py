@@ -1,8 +1,10 @@
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from typing import List, Tuple
 from langchain_core.agents import AgentActionMessageLog, AgentFinish
+import hashlib
 import json
+import logging
+import threading
 from langchain.agents import AgentExecutor
 from langchain.agents.format_scratchpad import format_to_openai_function_messages
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -12,17 +14,28 @@ from langchain_community.retrievers import WikipediaRetriever
 import dotenv
 import os
 
+from app.agent.callbacks import with_metrics
+
 dotenv.load_dotenv()
 
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+logger = logging.getLogger(__name__)
 
-retriever = WikipediaRetriever()
+# What to do with the agent when the app starts:
+#   "none"   - nothing, the agent is built on the first extraction
+#   "build"  - construct the clients and the executor (no network)
+#   "invoke" - also run one probe extraction so the first request is hot
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "build").lower()
 
-retriever_tool = create_retriever_tool(
-    retriever,
-    "state-of-union-retriever",
-    "Query a retriever to get information about state of the union address",
-)
+MODEL_NAME = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+# How events are extracted unless a request asks otherwise:
+#   "agent"      - the AgentExecutor loop, where the model may also call the
+#                  Wikipedia retriever before answering
+#   "structured" - a single call that must answer with the Response schema
+EXTRACTION_MODES = ("agent", "structured")
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "agent").lower()
+
+WARMUP_INPUT = "You have homework due on the 21st of november 2024 and a test on the 22nd of november 2024"
 
 
 class Response(BaseModel):
@@ -31,15 +44,14 @@ class Response(BaseModel):
     event_title: List[str] = Field(description="The title of event")
     event_description: List[str] = Field(description="The description of event")
 
-model = ChatOpenAI(model="gpt-4", temperature=0)
 
 def transform_event_data(data):
     """
     Transform event data from parallel arrays format to a list of event dictionaries.
-    
+
     Args:
         data (dict): Dictionary with 'event_date' and 'event_title' as parallel arrays
-        
+
     Returns:
         list: List of dictionaries, each containing 'date' and 'title' for an event
     """
@@ -71,63 +83,211 @@ def parse(output):
         return AgentActionMessageLog(
             tool=name, tool_input=inputs, log="", message_log=[output]
         )
-    
+
+
+SYSTEM_PROMPT = "You are a helpful assistant. Any date should be written in a parsable format. If there are no events then return an empty string."
 
 prompt = ChatPromptTemplate.from_messages(
     [
-        ("system", "You are a helpful assistant. Any date should be written in a parsable format. If there are no events then return an empty string."),
+        ("system", SYSTEM_PROMPT),
         ("user", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
     ]
 )
 
-llm = ChatOpenAI(temperature=0)
-
-llm_with_tools = llm.bind_functions([retriever_tool, Response])
-
-agent = (
-    {
-        "input": lambda x: x["input"],
-        # Format agent scratchpad from intermediate steps
-        "agent_scratchpad": lambda x: format_to_openai_function_messages(
-            x["intermediate_steps"]
-        ),
-    }
-    | prompt
-    | llm_with_tools
-    | parse
+# The same conversation without the scratchpad, for the structured mode
+structured_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", SYSTEM_PROMPT),
+        ("user", "{input}"),
+    ]
 )
 
-agent_executor = AgentExecutor(tools=[retriever_tool], agent=agent, verbose=True)
+# Changes whenever the prompt, schema or model does, so cached extractions
+# from an older configuration are never served
+EXTRACTION_VERSION = hashlib.sha256(
+    json.dumps([SYSTEM_PROMPT, Response.schema(), MODEL_NAME], sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
 
-data = agent_executor.invoke(
-    # {"input": "what did the president say about ketanji brown jackson"},
-    {"input": "You have homework due on the 21st of november 2024 and a test on the 22nd of november 2024"},
-    return_only_outputs=True,
-)
 
-new_data = transform_event_data(data)
+def build_agent_executor(llm=None, retriever=None):
+    """
+    Build a new event extraction agent.
+
+    Nothing here talks to the network; the OpenAI and Wikipedia clients only
+    connect once the executor is invoked.
+
+    Args:
+        llm: Chat model to drive the agent. Defaults to ChatOpenAI.
+        retriever: Retriever behind the agent's tool. Defaults to WikipediaRetriever.
+
+    Returns:
+        AgentExecutor: The executor passed to output_agent_results
+    """
+    if retriever is None:
+        retriever = WikipediaRetriever()
+
+    retriever_tool = create_retriever_tool(
+        retriever,
+        "state-of-union-retriever",
+        "Query a retriever to get information about state of the union address",
+    )
+
+    if llm is None:
+        llm = get_llm()
+
+    llm_with_tools = with_metrics(llm.bind_functions([retriever_tool, Response]))
+
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            # Format agent scratchpad from intermediate steps
+            "agent_scratchpad": lambda x: format_to_openai_function_messages(
+                x["intermediate_steps"]
+            ),
+        }
+        | prompt
+        | llm_with_tools
+        | parse
+    )
+
+    return AgentExecutor(tools=[retriever_tool], agent=agent, verbose=True)
 
 
-# def output_agent_results(agent_executor,note_data):
-#     """
-#     Output the results of the agent to the console.
-    
-#     Args:
-#         data (dict): The data returned by the agent
-#     """
-#     data = agent_executor.invoke(
-#         {"input":note_data},
-#         return_only_outputs=True,
-#     )
+def parse_response(output):
+    """Read the arguments of the Response function call the model was made to make."""
+    return json.loads(output.additional_kwargs["function_call"]["arguments"])
+
+
+def build_structured_extractor(llm=None):
+    """
+    Build a single-call extractor: the model is forced to call Response
+    directly, so there is no tool loop and no scratchpad.
+
+    Args:
+        llm: Chat model to use. Defaults to ChatOpenAI.
+
+    Returns:
+        Runnable: Takes {"input": note text} and returns the Response arguments
+    """
+    if llm is None:
+        llm = get_llm()
+
+    return (
+        structured_prompt
+        | with_metrics(llm.bind_functions([Response], function_call={"name": "Response"}))
+        | parse_response
+    )
+
+
+_llm = None
+_agent_executor = None
+_structured_extractor = None
+_agent_lock = threading.RLock()
+
+
+def get_llm():
+    """
+    Return the process-wide chat model, creating it on first use.
+    """
+    global _llm
+
+    if _llm is None:
+        with _agent_lock:
+            if _llm is None:
+                _llm = ChatOpenAI(model=MODEL_NAME, temperature=0)
+    return _llm
+
+
+def set_llm(llm):
+    """
+    Replace the process-wide chat model. Agents that were already built keep
+    theirs; call set_agent_executor(None) to rebuild with the new one.
+    """
+    global _llm
+
+    with _agent_lock:
+        _llm = llm
+
+
+def get_agent_executor():
+    """
+    Return the process-wide agent, building it on first use.
+    """
+    global _agent_executor
+
+    if _agent_executor is None:
+        with _agent_lock:
+            if _agent_executor is None:
+                _agent_executor = build_agent_executor()
+    return _agent_executor
+
+
+def set_agent_executor(agent_executor):
+    """
+    Replace the process-wide agent, e.g. with a fake in benchmarks.
+    Passing None makes the next get_agent_executor() build a fresh one.
+    """
+    global _agent_executor
+
+    with _agent_lock:
+        _agent_executor = agent_executor
+
+
+def get_structured_extractor():
+    """
+    Return the process-wide structured extractor, building it on first use.
+    """
+    global _structured_extractor
+
+    if _structured_extractor is None:
+        with _agent_lock:
+            if _structured_extractor is None:
+                _structured_extractor = build_structured_extractor()
+    return _structured_extractor
+
+
+def set_structured_extractor(extractor):
+    """
+    Replace the process-wide structured extractor. Passing None makes the
+    next get_structured_extractor() build a fresh one.
+    """
+    global _structured_extractor
+
+    with _agent_lock:
+        _structured_extractor = extractor
+
+
+def warm_up(mode: str = None):
+    """
+    Prepare the agent ahead of the first request according to AGENT_WARMUP.
+
+    Args:
+        mode (str): Overrides AGENT_WARMUP ("none", "build" or "invoke")
+    """
+    mode = (mode or AGENT_WARMUP).lower()
+    if mode in ("", "none", "off", "false", "0"):
+        return
+
+    # Only the default extraction mode is prepared
+    if EXTRACTION_MODE == "structured":
+        extractor = get_structured_extractor()
+        if mode == "invoke":
+            try:
+                extractor.invoke({"input": WARMUP_INPUT})
+            except Exception:
+                logger.exception("Warm-up extraction failed")
+        return
+
+    agent_executor = get_agent_executor()
+    if mode == "invoke":
+        output_agent_results(agent_executor, WARMUP_INPUT)
 
-#     data = transform_event_data(data)
-#     return data
 
 def output_agent_results(agent_executor, note_data):
     """
     Output the results of the agent to the console.
-    
+
     Args:
         data (dict): The data returned by the agent
     """
@@ -140,18 +300,57 @@ def output_agent_results(agent_executor, note_data):
         # Return empty dict if data is string
         if isinstance(data, str):
             return {}
-            
+
         data = transform_event_data(data)
         return data
-        
-    except Exception as e:
-        print(f"Error processing data: {str(e)}")
+
+    except Exception:
+        logger.exception("Agent extraction failed")
+        return {}
+
+
+async def aoutput_structured_results(extractor, note_data):
+    """
+    Run a structured extractor on a note, failing the same way
+    aoutput_agent_results does.
+    """
+    try:
+        data = await extractor.ainvoke({"input": note_data})
+        return transform_event_data(data)
+
+    except Exception:
+        logger.exception("Structured extraction failed")
+        return {}
+
+
+async def aoutput_agent_results(agent_executor, note_data):
+    """
+    Async version of output_agent_results, awaits the agent with ainvoke
+    instead of blocking the event loop for the whole run.
+
+    Args:
+        data (dict): The data returned by the agent
+    """
+    try:
+        data = await agent_executor.ainvoke(
+            {"input": note_data},
+            return_only_outputs=True,
+        )
+
+        # Return empty dict if data is string
+        if isinstance(data, str):
+            return {}
+
+        data = transform_event_data(data)
+        return data
+
+    except Exception:
+        logger.exception("Agent extraction failed")
         return {}
 
 
 if __name__ == "__main__":
-    # resi = output_agent_results(agent_executor,"You have homework due on the 21st of november 2024 and a test on the 22nd of november 2024")
-    resi = output_agent_results(agent_executor,"I am a cool guy")
+    # resi = output_agent_results(get_agent_executor(),"You have homework due on the 21st of november 2024 and a test on the 22nd of november 2024")
+    resi = output_agent_results(get_agent_executor(),"I am a cool guy")
 
     x= 0
-
@@ -0,0 +1,104 @@
+# app/agent/incremental.py
+import asyncio
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+from app.agent.cache import normalize_text
+from app.agent.get_events_from_data import EXTRACTION_MODE, EXTRACTION_VERSION
+from app.agent.pipeline import extract_events
+from app.agent.tokens import count_tokens
+
+# Paragraphs are grouped into chunks of at least CHUNK_MIN_TOKENS so a note
+# of many short lines doesn't turn into as many LLM calls. A chunk ends at
+# a paragraph chosen by its content, so an edit only moves the boundaries
+# around it. Chunks never grow past CHUNK_MAX_TOKENS of whole paragraphs.
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "200"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "800"))
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def fingerprint(text: str, mode: str = None) -> str:
+    """Identifies a chunk's text and the extraction setup (and mode, if given) that reads it."""
+    digest = hashlib.sha256()
+    digest.update(EXTRACTION_VERSION.encode("utf-8"))
+    digest.update(b"\0")
+    if mode is not None:
+        digest.update(mode.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def split_chunks(text: str, min_tokens: int = CHUNK_MIN_TOKENS, max_tokens: int = CHUNK_MAX_TOKENS) -> List[str]:
+    """
+    Split note content into chunks of whole paragraphs.
+
+    Returns:
+        list: The chunks in note order, blank paragraphs dropped
+    """
+    paragraphs = [paragraph.strip() for paragraph in _PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+
+    chunks, current, tokens = [], [], 0
+    for paragraph in paragraphs:
+        current.append(paragraph)
+        tokens += count_tokens(paragraph)
+        # Ending on about every other paragraph by content lets boundaries
+        # after an edit fall back in line with the previous version
+        anchored = int(fingerprint(paragraph)[-1], 16) % 2 == 0
+        if tokens >= max_tokens or (tokens >= min_tokens and anchored):
+            chunks.append("\n\n".join(current))
+            current, tokens = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+async def extract_chunks(text: str, previous: Optional[List[dict]] = None, mode: str = None) -> dict:
+    """
+    Extract the events of a note, chunk by chunk, re-running extraction
+    only on chunks that aren't in previous.
+
+    Args:
+        text (str): The note content
+        previous (list): The 'chunks' stored with the note's events last time
+        mode (str): Extraction mode for the changed chunks, see extract_events
+
+    Returns:
+        dict: 'chunks', a list of {'fingerprint', 'events'} to store, only
+            with the chunks that were extracted successfully, 'events' of
+            all of them in note order, and the number of chunks 'extracted'
+            now and 'failed'
+    """
+    known = {chunk['fingerprint']: chunk['events'] for chunk in previous or []}
+
+    # Chunks extracted in another mode don't match, so switching modes
+    # re-extracts the note
+    mode = mode or EXTRACTION_MODE
+    texts = split_chunks(text)
+    fingerprints = [fingerprint(chunk, mode) for chunk in texts]
+    changed = {
+        key: chunk for key, chunk in zip(fingerprints, texts) if key not in known
+    }
+
+    # A chunk whose long text only partly extracted counts as failed, its
+    # events would be stored as complete and never retried
+    results = await asyncio.gather(*(extract_events(chunk, mode, partial=False) for chunk in changed.values()))
+    # Failures come back as {} and are left out so the next run retries them
+    extracted = {key: events for key, events in zip(changed, results) if isinstance(events, list)}
+
+    chunks, events = [], []
+    for key in fingerprints:
+        chunk_events = known.get(key, extracted.get(key))
+        if chunk_events is not None:
+            chunks.append({'fingerprint': key, 'events': chunk_events})
+            events.extend(chunk_events)
+
+    return {
+        'chunks': chunks,
+        'events': events,
+        'extracted': len(changed),
+        'failed': len(changed) - len(extracted),
+    }
@@ -0,0 +1,96 @@
+# app/agent/pipeline.py
+import asyncio
+import os
+
+from app.agent.cache import build_extraction_cache
+from app.agent.callbacks import track_extraction
+from app.agent.chunking import LONG_TEXT_TOKENS, merge_events, split_text
+from app.agent.get_events_from_data import (
+    EXTRACTION_MODE,
+    EXTRACTION_MODES,
+    EXTRACTION_VERSION,
+    aoutput_agent_results,
+    aoutput_structured_results,
+    get_agent_executor,
+    get_structured_extractor,
+)
+from app.agent.prefilter import PREFILTER_ENABLED, PREFILTER_EXCERPTS, has_temporal_expression, temporal_excerpt
+from app.agent.tokens import count_tokens
+from app.metrics import span
+
+# Maximum number of agent runs in flight per worker. Extra requests wait
+# for a slot instead of piling more concurrent calls onto OpenAI.
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "32"))
+
+_limiter = None
+
+extraction_cache = build_extraction_cache(EXTRACTION_VERSION)
+
+
+def get_extraction_limiter() -> asyncio.Semaphore:
+    global _limiter
+
+    if _limiter is None:
+        _limiter = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+    return _limiter
+
+
+async def _extract(text: str, mode: str):
+    async with get_extraction_limiter():
+        with span("extraction", mode=mode), track_extraction(mode) as extraction:
+            if mode == "structured":
+                events = await aoutput_structured_results(get_structured_extractor(), text)
+            else:
+                events = await aoutput_agent_results(get_agent_executor(), text)
+            if extraction is not None:
+                extraction.ok = isinstance(events, list)
+    return events
+
+
+async def extract_events(text: str, mode: str = None, partial: bool = True):
+    """
+    Extract events from a piece of text without blocking the event loop.
+    Text without any date-like expression never reaches the LLM, and
+    text extracted before in the same mode is answered from the extraction
+    cache. Text longer than
+    LONG_TEXT_TOKENS is split into overlapping chunks that are extracted
+    concurrently, and their events merged without duplicates.
+
+    Args:
+        text (str): The note content
+        mode (str): "agent" or "structured", defaults to EXTRACTION_MODE
+        partial (bool): When some chunks fail, return the events of the
+            others; False treats that as a failure of the whole text
+
+    Returns:
+        list: Events as returned by transform_event_data, or {} on failure
+    """
+    mode = mode or EXTRACTION_MODE
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {mode}")
+
+    if PREFILTER_ENABLED and not has_temporal_expression(text):
+        return []
+
+    if extraction_cache is not None:
+        cached = await extraction_cache.get(text, mode)
+        if cached is not None:
+            return cached
+
+    prompt_text = temporal_excerpt(text) if PREFILTER_EXCERPTS else text
+    if count_tokens(prompt_text) > LONG_TEXT_TOKENS:
+        chunks = split_text(prompt_text)
+    else:
+        chunks = [prompt_text]
+
+    results = await asyncio.gather(*(_extract(chunk, mode) for chunk in chunks))
+    extracted = [events for events in results if isinstance(events, list)]
+    complete = len(extracted) == len(results)
+
+    # Failures come back as {}. Events from the chunks that worked are still
+    # returned if partial, but only a complete result is cached so the rest
+    # is retried
+    events = merge_events(extracted) if extracted and (complete or partial) else {}
+    if extraction_cache is not None and complete:
+        await extraction_cache.set(text, events, mode)
+    return events
@@ -0,0 +1,120 @@
+# app/agent/prefilter.py
+import os
+import re
+from typing import List, Tuple
+
+# Skip the LLM for notes without any date-like text
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Send only the sentences that contain a temporal expression to the LLM
+PREFILTER_EXCERPTS = os.getenv("PREFILTER_EXCERPTS", "false").lower() in ("1", "true", "yes")
+
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+# "sat" and "sun" are ordinary words too, they only count in the places a day would be, see below
+_WEEKDAYS = r"mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?|saturday|sunday"
+_HOLIDAYS = (
+    r"christmas(?:\s+eve)?|xmas|thanksgiving|halloween|easter|hanukkah|passover|ramadan|diwali"
+    r"|new\s+year'?s?(?:\s+(?:eve|day))?|valentine'?s(?:\s+day)?|(?:mother|father)'?s\s+day"
+    r"|(?:memorial|labou?r|independence|boxing|presidents'?)\s+day|st\.?\s+patrick'?s(?:\s+day)?"
+)
+_ORDINALS = (
+    r"first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|eleventh|twelfth|thirteenth"
+    r"|fourteenth|fifteenth|sixteenth|seventeenth|eighteenth|nineteenth|twentieth|thirtieth"
+    r"|twenty[-\s](?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth)|thirty[-\s]first"
+)
+_HOUR_WORDS = r"one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve"
+_PERIODS = r"day|week|month|year|quarter|semester|term"
+_UNITS = r"minutes?|mins?|hours?|hrs?|days?|weeks?|wks?|months?|years?|yrs?"
+_NUMBER_WORDS = r"\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|couple(?: of)?|few"
+
+_TEMPORAL = re.compile(
+    "|".join([
+        # 2024-11-21, 2024/11/21
+        r"\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b",
+        # 21/11/2024, 11-21-24, 21.11.
+        r"\b\d{1,2}[-/.]\d{1,2}(?:[-/.]\d{2,4})?\b",
+        # 21st of november, 3 mar, november 21st, Nov. 21
+        rf"\b\d{{1,2}}(?:st|nd|rd|th)?(?:\s+of)?\s+(?:{_MONTHS})\b\.?",
+        rf"\b(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?\b",
+        # the 21st, on the 3rd
+        r"\b\d{1,2}(?:st|nd|rd|th)\b",
+        # march, in december, by friday
+        r"\b(?:january|february|march|april|june|july|august|september|october|november|december)\b",
+        rf"\b(?:{_WEEKDAYS})\b",
+        # on sat, this sun, sat night, lunch w/ sam sun
+        r"\b(?:on|this|next|by|until|till|every)\s+(?:sat|sun)\b",
+        r"\b(?:sat|sun)\b(?=\s*(?:$|[,;!)]|\.(?:\s|$)|\s+(?:morning|afternoon|evening|night|am|pm|\d)))",
+        # christmas, new years eve, thanksgiving
+        rf"\b(?:{_HOLIDAYS})\b",
+        # on the twelfth, the third of may
+        rf"\b(?:on|by|until|till|before|after|from)\s+the\s+(?:{_ORDINALS})\b",
+        rf"\bthe\s+(?:{_ORDINALS})\s+of\b",
+        # 10am, 3:30 pm, 14:00
+        r"\b\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)(?![a-z])",
+        r"\b(?:[01]?\d|2[0-3]):[0-5]\d\b",
+        r"\b(?:noon|midnight|tonight|tonite|today|tomorrow|tmrw|tmr|tmw|2moro|2morrow|yesterday|weekend"
+        r"|eod|eow|eom|eoq|eoy|fortnights?)\b",
+        # meeting at 3, at 7 sharp; not "at 3 options" or "at 3.5%"
+        r"\bat\s+(?:[1-9]|1[0-2])\b(?![.,:/%]\d|%|\s+[a-z]+s\b)",
+        # gym at six; not "at one point" or "at one of them"
+        rf"\bat\s+(?:{_HOUR_WORDS})\b(?!\s+(?:of|point|time|another|[a-z]+s)\b)",
+        # in the evening, at night
+        r"\b(?:in|during)\s+the\s+(?:morning|afternoon|evening|night)\b",
+        r"\bat\s+night\b",
+        # half past six, quarter to 5, six o'clock
+        rf"\b(?:half|quarter)\s+(?:past|to)\s+(?:{_HOUR_WORDS}|\d{{1,2}})\b",
+        rf"\b(?:{_HOUR_WORDS}|\d{{1,2}})\s+o'?clock\b",
+        # next week, this month, last year
+        rf"\b(?:next|this|last|coming|every)\s+(?:{_PERIODS}|morning|afternoon|evening|night)\b",
+        # at the end of the month, start of next year
+        rf"\b(?:end|start|beginning|middle)\s+of\s+(?:the\s+|this\s+|next\s+)?(?:{_PERIODS})\b",
+        # daily standup, weekly review
+        r"\b(?:everyday|daily|nightly|weekly|biweekly|fortnightly|monthly|quarterly|yearly|annually)\b",
+        # this summer, before spring, winter break; "spring" and "fall" only
+        # where a season would be
+        r"\b(?:summer|winter|autumn)\b",
+        r"\b(?:this|next|last|in|by|before|after|until|till|over|during|every|since|early|late|mid)[-\s]+"
+        r"(?:the\s+)?(?:spring|fall)\b",
+        r"\b(?:spring|fall)\s+(?:break|semester|term|quarter|vacation)\b",
+        # in 3 days, two weeks from now, a couple of hours ago
+        rf"\b(?:in|within|after|for)\s+(?:{_NUMBER_WORDS})\s+(?:{_UNITS})\b",
+        rf"\b(?:{_NUMBER_WORDS})\s+(?:{_UNITS})\s+(?:from now|later|ago)\b",
+        # years on their own: 1999, 2025
+        r"\b(?:19|20)\d{2}\b",
+    ]),
+    re.IGNORECASE,
+)
+
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+
+
+def find_temporal_expressions(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Find the date and time expressions in text.
+
+    Args:
+        text (str): The note content
+
+    Returns:
+        list: (start, end, matched text) for every expression found
+    """
+    return [(match.start(), match.end(), match.group(0)) for match in _TEMPORAL.finditer(text)]
+
+
+def has_temporal_expression(text: str) -> bool:
+    return _TEMPORAL.search(text) is not None
+
+
+def temporal_excerpt(text: str) -> str:
+    """
+    Keep only the sentences of text that contain a temporal expression, so
+    a long note costs fewer prompt tokens.
+    """
+    sentences = [
+        sentence.strip()
+        for sentence in _SENTENCE.findall(text)
+        if has_temporal_expression(sentence)
+    ]
+    return "\n".join(sentences)
@@ -0,0 +1,34 @@
+# app/agent/tokens.py
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing or its encoding file can't be fetched
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens OpenAI models will see for text. Falls back to the
+    usual four-characters-per-token estimate when tiktoken is unavailable.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, max_tokens: int) -> list:
+    """Cut text into consecutive pieces of at most max_tokens tokens."""
+    encoding = _encoding()
+    if encoding is None:
+        size = max_tokens * 4
+        return [text[start:start + size] for start in range(0, len(text), size)]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens), max_tokens)]
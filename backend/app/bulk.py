@@ -0,0 +1,111 @@
+# app/bulk.py
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+# Notes per Firestore WriteBatch, Firestore allows at most 500 writes per batch
+BULK_BATCH_SIZE = min(int(os.getenv("BULK_BATCH_SIZE", "500")), 500)
+# Batches committed at the same time by one import
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+# Notes per chunk of the NDJSON export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+
+
+class BulkNote(BaseModel):
+    title: str
+    content: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+async def read_notes(request, chunk_size: int = BULK_BATCH_SIZE):
+    """
+    Yield the notes in a request body in lists of up to chunk_size.
+
+    An application/x-ndjson body is parsed as it streams in, one note per
+    line. Anything else is read as a JSON array.
+    """
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        chunk, buffer = [], b""
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    chunk.append(json.loads(line))
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if buffer.strip():
+            chunk.append(json.loads(buffer))
+        if chunk:
+            yield chunk
+    else:
+        notes = await request.json()
+        if not isinstance(notes, list):
+            raise ValueError("Expected a JSON array of notes")
+        for start in range(0, len(notes), chunk_size):
+            yield notes[start:start + chunk_size]
+
+
+class NoteImporter:
+    """
+    Writes a user's notes in Firestore WriteBatches of up to BULK_BATCH_SIZE.
+
+    Ids for each batch are reserved from the id allocator in one go, so an
+    import of n notes costs about n / BULK_BATCH_SIZE commits plus as many
+    counter transactions, instead of a create_note call per note.
+    """
+
+    def __init__(self, store, id_allocator, user_id: str, concurrency: int = BULK_CONCURRENCY):
+        self.store = store
+        self.id_allocator = id_allocator
+        self.user_id = user_id
+        self.imported = []
+        self._commits = []
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def add(self, chunk: list):
+        """
+        Validate and start writing one chunk of notes.
+
+        Raises:
+            ValueError: If a note in the chunk is invalid, nothing of the chunk is written
+        """
+        notes = [BulkNote.model_validate(note) for note in chunk]
+        ids = await self.id_allocator.reserve(self.user_id, 'note_id', len(notes))
+
+        await self._slots.acquire()
+        self._commits.append(asyncio.ensure_future(self._commit(ids, notes)))
+
+    async def _commit(self, ids: range, notes: list):
+        try:
+            now = datetime.now()
+            batch = self.store.client.batch()
+            documents = []
+            for note_id, note in zip(ids, notes):
+                document = {
+                    'note_id': note_id,
+                    'title': note.title,
+                    'content': note.content,
+                    'created_at': note.created_at or now,
+                    'updated_at': note.updated_at or note.created_at or now
+                }
+                batch.set(self.store.collection(self.user_id).document(str(note_id)), document)
+                documents.append(document)
+
+            await self.store.run(batch.commit)
+            self.imported.extend(documents)
+        finally:
+            self._slots.release()
+
+    async def wait(self):
+        """Wait for every started batch, then raise the first commit error if any."""
+        results = await asyncio.gather(*self._commits, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
@@ -12,6 +12,13 @@ class Settings:
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
 
-    supabase = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+    _supabase = None
+
+    @property
+    def supabase(self):
+        # Created on first use so importing settings doesn't require Supabase credentials
+        if self._supabase is None:
+            self._supabase = supabase.create_client(self.SUPABASE_URL, self.SUPABASE_KEY)
+        return self._supabase
 
 settings = Settings()
\ No newline at end of file
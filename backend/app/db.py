@@ -0,0 +1,88 @@
+# app/db.py
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import METRICS_ENABLED, record_firestore, span
+
+# Threads reserved for Firestore RPCs. 0 runs them inline on the event loop,
+# which is only useful to compare against in benchmarks.
+FIRESTORE_THREADS = int(os.getenv("FIRESTORE_THREADS", "32"))
+
+
+class AsyncFirestore:
+    """
+    Async access to the firebase_admin Firestore client.
+
+    The client itself is synchronous; every call that talks to Firestore is
+    run in a dedicated thread pool so a slow RPC only holds up the request
+    that made it. Building references and queries does no I/O and stays on
+    the event loop, e.g.
+
+        note = await store.run(db.collection(user_id).document(note_id).get)
+    """
+
+    def __init__(self, client=None, max_workers: int = FIRESTORE_THREADS, connect=None):
+        self._client = client
+        self._connect = connect
+        self._connect_lock = threading.Lock()
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="firestore")
+            if max_workers > 0 else None
+        )
+
+    @property
+    def client(self):
+        """The Firestore client. Without one, connect() is called on first use."""
+        if self._client is None:
+            with self._connect_lock:
+                if self._client is None:
+                    self._client = self._connect()
+        return self._client
+
+    def collection(self, name: str):
+        return self.client.collection(name)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking Firestore call in the pool and return its result."""
+        return await self._run(getattr(fn, "__name__", "call"), fn, *args, **kwargs)
+
+    async def _run(self, operation: str, fn, *args, **kwargs):
+        if not METRICS_ENABLED:
+            return await self._call(fn, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            with span(f"firestore.{operation}"):
+                return await self._call(fn, *args, **kwargs)
+        finally:
+            record_firestore(operation, time.perf_counter() - start)
+
+    async def _call(self, fn, *args, **kwargs):
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def get(self, collection: str, doc_id: str):
+        return await self.run(self.client.collection(collection).document(doc_id).get)
+
+    async def get_all(self, collection: str, doc_ids) -> dict:
+        """
+        Fetch many documents of one collection in a single batched read.
+
+        Returns:
+            dict: doc_id -> snapshot, only for the documents that exist
+        """
+        refs = [self.client.collection(collection).document(doc_id) for doc_id in doc_ids]
+        if not refs:
+            return {}
+
+        snapshots = await self._run("get_all", lambda: list(self.client.get_all(refs)))
+        return {snapshot.id: snapshot for snapshot in snapshots if snapshot.exists}
+
+    async def stream(self, query) -> list:
+        return await self._run("stream", lambda: list(query.stream()))
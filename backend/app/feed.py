@@ -0,0 +1,216 @@
+# app/feed.py
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+
+# Changes buffered per subscriber. A subscriber that falls this far behind
+# loses its backlog and is sent a reset, telling it to refetch, instead of
+# holding up the writers or growing without bound.
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "100"))
+# Recent changes kept per user, replayed to a client reconnecting with
+# Last-Event-ID
+FEED_REPLAY_SIZE = int(os.getenv("FEED_REPLAY_SIZE", "100"))
+# Users whose recent changes are kept, least recently written dropped first
+FEED_REPLAY_USERS = int(os.getenv("FEED_REPLAY_USERS", "10000"))
+# Open change streams allowed per user on one worker
+FEED_MAX_SUBSCRIBERS = int(os.getenv("FEED_MAX_SUBSCRIBERS", "100"))
+# Seconds between keep-alive comments on an idle stream
+FEED_HEARTBEAT = float(os.getenv("FEED_HEARTBEAT", "15"))
+
+RESET = object()
+
+
+class TooManySubscribersError(Exception):
+    """Raised by subscribe() when the user already has FEED_MAX_SUBSCRIBERS streams open."""
+
+
+def format_event(event_id: Optional[int], kind: str, data: str) -> str:
+    """One Server-Sent Events message."""
+    message = f"event: {kind}\ndata: {data}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+
+class Subscription:
+    """
+    One client's view of a user's changes: a bounded queue the feed fills
+    and the client's stream drains.
+    """
+
+    def __init__(self, feed, user_id: str, max_queued: int):
+        self.feed = feed
+        self.user_id = user_id
+        self.max_queued = max_queued
+        self.resets = 0
+        self._queue = deque()
+        self._ready = asyncio.Event()
+
+    def _push(self, message):
+        if len(self._queue) >= self.max_queued:
+            # Too slow to keep up: drop the backlog, it has to refetch anyway
+            self._queue.clear()
+            self._queue.append(RESET)
+            self.resets += 1
+            self.feed.resets += 1
+        else:
+            self._queue.append(message)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None):
+        """
+        The next change as an encoded SSE message, RESET if changes were
+        dropped, or None when nothing arrived within timeout.
+        """
+        while not self._queue:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._queue.popleft()
+
+    def close(self):
+        self.feed._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChangeFeed:
+    """
+    In-process publish/subscribe of each user's note and event changes.
+
+    The write routes publish() after their write succeeds; every open
+    subscription of that user gets the change, encoded once and shared.
+    Publishing never waits on subscribers, see FEED_QUEUE_SIZE.
+
+    Like the job queue, this reaches the subscribers of this process only;
+    with several uvicorn workers a client sees the writes its own worker
+    handled.
+    """
+
+    def __init__(
+        self,
+        max_queued: int = FEED_QUEUE_SIZE,
+        replay_size: int = FEED_REPLAY_SIZE,
+        replay_users: int = FEED_REPLAY_USERS,
+        max_subscribers: int = FEED_MAX_SUBSCRIBERS,
+    ):
+        self.max_queued = max_queued
+        self.replay_size = replay_size
+        self.replay_users = replay_users
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self.delivered = 0
+        self.resets = 0
+        self._subscribers = {}  # user_id -> set of Subscription
+        # user_id -> [id of the next change, deque of (event id, message)]
+        self._history = OrderedDict()
+
+    def subscribe(self, user_id: str, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Start receiving user_id's changes. With last_event_id, changes after
+        it that are still in the replay buffer are queued first, or RESET if
+        some are gone already.
+        """
+        subscribers = self._subscribers.setdefault(user_id, set())
+        if len(subscribers) >= self.max_subscribers:
+            raise TooManySubscribersError(f"User {user_id} has {len(subscribers)} change streams open")
+
+        subscription = Subscription(self, user_id, self.max_queued)
+        if last_event_id is not None:
+            self._replay(subscription, last_event_id)
+
+        subscribers.add(subscription)
+        return subscription
+
+    def _replay(self, subscription: Subscription, last_event_id: int):
+        history = self._history.get(subscription.user_id)
+        if history is None:
+            # Nothing kept for this user, whatever the client missed is gone
+            subscription._push(RESET)
+            return
+
+        next_id, recent = history
+        oldest = recent[0][0] if recent else next_id
+        if last_event_id >= next_id or last_event_id + 1 < oldest:
+            subscription._push(RESET)
+            return
+        for event_id, message in recent:
+            if event_id > last_event_id:
+                subscription._push(message)
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, kind: str, data: dict) -> int:
+        """
+        Send a change to every subscriber of user_id.
+
+        Args:
+            kind (str): The SSE event name, e.g. "note" or "event"
+            data (dict): The change, JSON-encoded once for all subscribers
+
+        Returns:
+            int: The change's id, sent as the SSE id
+        """
+        history = self._history.get(user_id)
+        if history is None:
+            # Ids start from the clock, so they keep increasing across
+            # restarts and a stale Last-Event-ID is recognized as such
+            history = self._history[user_id] = [time.time_ns() // 1000, deque(maxlen=self.replay_size)]
+            while len(self._history) > self.replay_users:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(user_id)
+
+        event_id = history[0]
+        history[0] += 1
+        message = format_event(event_id, kind, json.dumps(jsonable_encoder(data)))
+        history[1].append((event_id, message))
+
+        subscribers = self._subscribers.get(user_id, ())
+        for subscription in subscribers:
+            subscription._push(message)
+        self.published += 1
+        self.delivered += len(subscribers)
+        return event_id
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resets": self.resets,
+        }
+
+
+async def event_stream(subscription: Subscription, heartbeat: float = FEED_HEARTBEAT):
+    """
+    The SSE body for a subscription: changes as they arrive, a reset event
+    after dropped changes and a comment line when idle for heartbeat
+    seconds, which keeps proxies from closing the stream.
+    """
+    with subscription:
+        yield "retry: 3000\n\n"
+        while True:
+            message = await subscription.get(heartbeat)
+            if message is None:
+                yield ": keep-alive\n\n"
+            elif message is RESET:
+                yield format_event(None, "reset", "{}")
+            else:
+                yield message
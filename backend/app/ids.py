@@ -0,0 +1,95 @@
+# app/ids.py
+import asyncio
+import os
+import weakref
+from collections import OrderedDict
+
+from firebase_admin import firestore
+
+# Ids reserved per counter transaction. Each worker hands them out from
+# memory, so most creates need no extra Firestore round trip. Ids left in a
+# block when a worker exits are skipped, never reused.
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "10"))
+ID_COUNTERS_COLLECTION = "id_counters"
+# Collections whose block a worker keeps, least recently used dropped first.
+# There is one per user (notes and events), so this bounds the memory a
+# long-running worker spends on them; a dropped block's ids are skipped.
+ID_BLOCKS_KEPT = int(os.getenv("ID_BLOCKS_KEPT", "10000"))
+
+
+class IdAllocator:
+    """
+    Hands out unique, increasing integer ids per (collection, field), e.g.
+    note_id for the notes in a user's collection.
+
+    The last reserved id lives in a counter document in ID_COUNTERS_COLLECTION
+    and is advanced in a transaction, so concurrent creates, even across
+    workers, never get the same id.
+    """
+
+    def __init__(
+        self,
+        store,
+        block_size: int = ID_BLOCK_SIZE,
+        counters: str = ID_COUNTERS_COLLECTION,
+        max_blocks: int = ID_BLOCKS_KEPT,
+    ):
+        self.store = store
+        self.block_size = block_size
+        self.counters = counters
+        self.max_blocks = max_blocks
+        self._blocks = OrderedDict()
+        # Only while a reservation holds or waits for them
+        self._locks = weakref.WeakValueDictionary()
+
+    async def next_id(self, collection: str, field: str) -> int:
+        return (await self.reserve(collection, field, 1))[0]
+
+    async def reserve(self, collection: str, field: str, count: int) -> range:
+        """
+        Reserve count consecutive ids.
+
+        Args:
+            collection (str): The collection the ids are for
+            field (str): The document field holding the id
+
+        Returns:
+            range: The reserved ids
+        """
+        key = (collection, field)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            next_id, end = self._blocks.get(key, (0, 0))
+            if end - next_id < count:
+                size = max(count, self.block_size)
+                next_id = await self.store.run(self._reserve_block, collection, field, size)
+                end = next_id + size
+
+            self._blocks[key] = (next_id + count, end)
+            self._blocks.move_to_end(key)
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+            return range(next_id, next_id + count)
+
+    def _reserve_block(self, collection: str, field: str, size: int) -> int:
+        counter_ref = self.store.collection(self.counters).document(collection)
+        source = self.store.collection(collection)
+
+        @firestore.transactional
+        def reserve(transaction):
+            snapshot = counter_ref.get(transaction=transaction)
+            counter = snapshot.to_dict() if snapshot.exists else {}
+
+            if field in counter:
+                last_id = counter[field]
+            else:
+                # First allocation for this collection, continue after the
+                # documents created before the counter existed
+                docs = source.order_by(field, direction=firestore.Query.DESCENDING).limit(1).get(transaction=transaction)
+                last_id = docs[0].to_dict()[field] if len(docs) else 0
+
+            transaction.set(counter_ref, {field: last_id + size}, merge=True)
+            return last_id + 1
+
+        return reserve(self.store.client.transaction())
@@ -0,0 +1,182 @@
+# app/jobs.py
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from app.models.job import Job, JobStatus
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "1000"))
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "50"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "1.0"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "10000"))
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the queue, or the user's share of it, is full."""
+
+    def __init__(self, message: str, per_user: bool = False):
+        super().__init__(message)
+        self.per_user = per_user
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for errors that retrying will not fix."""
+
+
+class JobIncomplete(Exception):
+    """
+    Raised by a job handler when only part of the work succeeded and
+    another attempt may finish it. result is kept on the job, also when it
+    runs out of attempts.
+    """
+
+    def __init__(self, message: str, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class JobQueue:
+    """
+    In-process job queue drained by a pool of asyncio worker tasks.
+
+    Pending jobs are kept per user and workers take them round-robin across
+    users, so one user's burst cannot hold back everyone else. Failed jobs
+    are retried with exponential backoff up to max_attempts.
+
+    Job state lives in this process only; with several uvicorn workers a
+    status lookup must reach the worker that accepted the job.
+    """
+
+    def __init__(
+        self,
+        handler,
+        workers: int = JOB_WORKERS,
+        max_depth: int = JOB_QUEUE_DEPTH,
+        max_per_user: int = JOB_MAX_PER_USER,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_backoff: float = JOB_RETRY_BACKOFF,
+        history: int = JOB_HISTORY,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.history = history
+
+        self._jobs = {}
+        self._finished = deque()
+        self._pending = OrderedDict()  # user_id -> deque of jobs waiting to run
+        self._outstanding = {}  # user_id -> queued, retrying or running jobs
+        self._depth = 0
+        self._available = asyncio.Semaphore(0)
+        self._tasks = []
+        self._retries = set()
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries = set()
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def submit(self, user_id: str, **params) -> Job:
+        """
+        Queue a job for user_id and return it immediately.
+
+        Raises:
+            QueueFullError: If the queue or the user's share of it is full
+        """
+        if self._depth >= self.max_depth:
+            raise QueueFullError("Job queue is full")
+        if self._outstanding.get(user_id, 0) >= self.max_per_user:
+            raise QueueFullError("Too many pending jobs for this user", per_user=True)
+
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, params=params)
+        self._jobs[job.id] = job
+        self._outstanding[user_id] = self._outstanding.get(user_id, 0) + 1
+        self._depth += 1
+        self._enqueue(job)
+        return job
+
+    def _enqueue(self, job: Job):
+        self._pending.setdefault(job.user_id, deque()).append(job)
+        self._available.release()
+
+    def _next_job(self) -> Job:
+        # Take the first job of the user at the front, then move that user to
+        # the back so users are served in turn
+        user_id, jobs = next(iter(self._pending.items()))
+        job = jobs.popleft()
+        del self._pending[user_id]
+        if jobs:
+            self._pending[user_id] = jobs
+        return job
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+            job.status = JobStatus.RUNNING
+            job.attempts += 1
+            job.updated_at = datetime.now()
+
+            try:
+                job.result = await self.handler(job)
+                job.error = None
+                self._finish(job, JobStatus.SUCCEEDED)
+            except asyncio.CancelledError:
+                raise
+            except JobFailed as e:
+                job.error = str(e)
+                self._finish(job, JobStatus.FAILED)
+            except Exception as e:
+                logging.error("Job %s failed on attempt %d: %s", job.id, job.attempts, str(e))
+                job.error = str(e)
+                if isinstance(e, JobIncomplete):
+                    job.result = e.result
+                if job.attempts >= self.max_attempts:
+                    self._finish(job, JobStatus.FAILED)
+                else:
+                    job.status = JobStatus.RETRYING
+                    job.updated_at = datetime.now()
+                    delay = self.retry_backoff * 2 ** (job.attempts - 1)
+                    task = asyncio.create_task(self._retry_later(job, delay))
+                    self._retries.add(task)
+                    task.add_done_callback(self._retries.discard)
+
+    async def _retry_later(self, job: Job, delay: float):
+        await asyncio.sleep(delay)
+        job.status = JobStatus.QUEUED
+        job.updated_at = datetime.now()
+        self._enqueue(job)
+
+    def _finish(self, job: Job, status: JobStatus):
+        job.status = status
+        job.updated_at = datetime.now()
+        self._depth -= 1
+        self._outstanding[job.user_id] -= 1
+        if not self._outstanding[job.user_id]:
+            del self._outstanding[job.user_id]
+
+        # Keep the most recent finished jobs around for status lookups
+        self._finished.append(job.id)
+        while len(self._finished) > self.history:
+            self._jobs.pop(self._finished.popleft(), None)
@@ -1,16 +1,42 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import os
+import asyncio
+import contextlib
+import json
+import math
 import dotenv
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
+from google.api_core.exceptions import NotFound
 from datetime import datetime
+from typing import List, Literal, Optional, Tuple
 import logging
 import traceback
-
-from app.agent.get_events_from_data import agent_executor as event_agent_executor
-from app.agent.get_events_from_data import output_agent_results
+import weakref
+
+from app.agent.get_events_from_data import warm_up
+from app.agent.batch import BATCH_MAX_NOTES, extract_events_batch
+from app.agent.incremental import extract_chunks
+from app.agent.pipeline import extract_events, extraction_cache
+from app.bulk import EXPORT_CHUNK_SIZE, NoteImporter, read_notes
+from app.db import AsyncFirestore
+from app.feed import ChangeFeed, TooManySubscribersError, event_stream
+from app.ids import IdAllocator
+from app.jobs import JOB_RETRY_BACKOFF, JobFailed, JobIncomplete, JobQueue, QueueFullError
+from app.metrics import CONTENT_TYPE, METRICS_ENABLED, MetricsMiddleware, registry
+from app.models.event import EventDocument, EventPage
+from app.models.note import NoteDocument, NotePage
+from app.models.user import UserPage
+from app.pagination import clamp_page_size, firestore_page, ndjson_response, select_fields
+from app.ratelimit import RateLimitedError, build_extraction_limiter
+from app.responses import FastJSONResponse
+from app.search import NoteSearch
+from app.user_cache import UserCache, user_summary
+from app.versions import CollectionVersions, http_date, make_etag, not_modified, validator_headers
 
 from pydantic import BaseModel
 
@@ -24,7 +50,9 @@ dotenv.load_dotenv()
 app = FastAPI(
     title="Notes API",
     description="API for managing notes and user profiles",
-    version="1.0.0"
+    version="1.0.0",
+    # Rendered with orjson when installed, see app/responses.py
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware configuration
@@ -36,24 +64,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency injection
+# Per-route latency and Firestore usage, served at /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
-cred_dict = {
-    "type": "service_account",
-    "project_id": "alignly-98902",
-    "private_key_id": os.getenv("FIREBASE_PRIVATE_KEY_ID"),
-    "private_key": os.getenv("FIREBASE_PRIVATE_KEY").replace('\\n', '\n'),
-    "client_email": os.getenv("FIREBASE_CLIENT_EMAIL"),
-    "client_id": os.getenv("FIREBASE_CLIENT_ID"),
-    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-    "token_uri": "https://oauth2.googleapis.com/token",
-    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-    "client_x509_cert_url": os.getenv("FIREBASE_CLIENT_X509_CERT_URL")
-}
+@app.on_event("startup")
+def warm_up_event_agent():
+    # Controlled by AGENT_WARMUP, see app/agent/get_events_from_data.py
+    warm_up()
 
-cred = credentials.Certificate(cred_dict)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Dependency injection
+
+# Firebase is only set up when its credentials are, so the app still imports
+# without them (benchmarks, tooling); Firebase calls then fail until they are
+if os.getenv("FIREBASE_PRIVATE_KEY"):
+    cred_dict = {
+        "type": "service_account",
+        "project_id": "alignly-98902",
+        "private_key_id": os.getenv("FIREBASE_PRIVATE_KEY_ID"),
+        "private_key": os.getenv("FIREBASE_PRIVATE_KEY").replace('\\n', '\n'),
+        "client_email": os.getenv("FIREBASE_CLIENT_EMAIL"),
+        "client_id": os.getenv("FIREBASE_CLIENT_ID"),
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": os.getenv("FIREBASE_CLIENT_X509_CERT_URL")
+    }
+
+    cred = credentials.Certificate(cred_dict)
+    firebase_admin.initialize_app(cred)
+else:
+    logging.warning("FIREBASE_PRIVATE_KEY is not set, Firebase requests will fail")
+
+# The Firestore client is created on the first request that needs it
+store = AsyncFirestore(connect=firestore.client)
+id_allocator = IdAllocator(store)
+collection_versions = CollectionVersions(store)
+note_search = NoteSearch(store, collection_versions)
+change_feed = ChangeFeed()
+# None when RATE_LIMIT_ENABLED is off, see app/ratelimit.py
+extraction_limiter = build_extraction_limiter()
 
 
 # Note endpoints
@@ -61,19 +111,25 @@ db = firestore.client()
 
 # User profile endpoints
 
+user_cache = UserCache()
+
 @app.post("/users/create")
 async def create_user(user: UserCreate):
     try:
         # Create the user in Firebase Auth
-        user_record = auth.create_user(
+        user_record = await asyncio.to_thread(
+            auth.create_user,
             email=user.email,
             password=user.password
         )
-        
-        return {
-            'uuid': user_record.uid,
-            'email': user_record.email
-        }
+
+        # Drop anything cached for a previous account with this email and
+        # start the new user off cached
+        await user_cache.invalidate(uid=user_record.uid, email=user.email)
+        summary = user_summary(user_record)
+        await user_cache.set(summary)
+
+        return summary
         
     except auth.EmailAlreadyExistsError:
         raise HTTPException(status_code=400, detail="Email already exists")
@@ -84,11 +140,7 @@ async def create_user(user: UserCreate):
 @app.get("/users/{user_id}")
 async def get_user_profile_by_uuid(user_id: str):
     try:
-        user = auth.get_user(user_id)
-        return {
-            'uuid': user.uid,
-            'email': user.email
-        }
+        return await user_cache.get_user(user_id)
     except auth.UserNotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -97,11 +149,7 @@ async def get_user_profile_by_uuid(user_id: str):
 @app.get("/users/get_user_from_email/{email}")
 async def get_user_by_email(email: str):
     try:
-        user = auth.get_user_by_email(email)
-        return {
-            'uuid': user.uid,
-            'email': user.email
-        }
+        return await user_cache.get_user_by_email(email)
     except auth.UserNotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -109,40 +157,67 @@ async def get_user_by_email(email: str):
 
 
 
-@app.get("/users/")
-def list_all_users():
+# Firebase Auth returns at most this many users per page
+USERS_PAGE_SIZE = 1000
+
+# Users are listed a page at a time, pass next_page_token back as page_token
+# for the next page. stream=true walks the pages lazily and streams NDJSON.
+@app.get("/users/", response_model=UserPage)
+def list_all_users(page_token: Optional[str] = None, page_size: int = USERS_PAGE_SIZE, stream: bool = False):
     try:
-        users_list = []
-        page = auth.list_users()
-        
-        for user in page.users:
-            users_list.append({
-                'uuid': user.uid,
-                'email': user.email
-            })
-            
-        return users_list
-        
+        page = auth.list_users(page_token=page_token, max_results=max(1, min(page_size, USERS_PAGE_SIZE)))
+
+        if stream:
+            def lines():
+                # One chunk per Auth page, only a single page is held in memory
+                current = page
+                while current is not None:
+                    yield "".join(json.dumps(user_summary(user)) + "\n" for user in current.users)
+                    current = current.get_next_page()
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        return FastJSONResponse({
+            'users': [user_summary(user) for user in page.users],
+            'next_page_token': page.next_page_token or None
+        })
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-def get_next_note_id(user_id: str) -> int:
-    # Get the user's notes collection
-    notes_ref = db.collection(user_id).order_by('note_id', direction=firestore.Query.DESCENDING).limit(1)
-    notes = notes_ref.get()
-    
-    # If there are no existing notes, start with 1
-    if len(notes) == 0:
-        return 1
-    
-    # Get the highest note_id and increment by 1
-    return notes[0].to_dict()['note_id'] + 1
+
+async def bump_notes_version(user_id: str):
+    """
+    Bump the user's notes marker after a write, once the change has been
+    given to note_search, so this worker's index isn't rebuilt for it.
+
+    Never raises: the write has committed, and failing the request would
+    make the client repeat it.
+    """
+    if note_search.loaded(user_id):
+        # The transaction is only worth it with an index here to keep current,
+        # otherwise concurrent writes of one user would queue up on the marker
+        try:
+            previous, marker = await collection_versions.advance(user_id)
+            note_search.version_changed(user_id, previous, marker['version'])
+            return
+        except Exception as e:
+            logging.warning("Could not advance the notes version of user %s, bumping it: %s", user_id, e)
+    try:
+        await collection_versions.bump(user_id)
+    except Exception:
+        # Listings keep their old ETag and other workers' indexes their notes
+        # until the next write to this user's notes
+        logging.exception("Could not bump the notes version of user %s", user_id)
+
+async def get_next_note_id(user_id: str) -> int:
+    # Ids come from a per-user counter, see app/ids.py
+    return await id_allocator.next_id(user_id, 'note_id')
 
 @app.post("/users/{user_id}/create_notes")
 async def create_note(user_id: str, title: str, content: str):
     try:
         # Get the next note ID
-        next_id = get_next_note_id(user_id)
+        next_id = await get_next_note_id(user_id)
         
         # Create the note document
         note = {
@@ -154,8 +229,11 @@ async def create_note(user_id: str, title: str, content: str):
         }
         
         # Add to user's collection using the auto-incremented ID
-        doc_ref = db.collection(user_id).document(str(next_id))
-        doc_ref.set(note)
+        doc_ref = store.collection(user_id).document(str(next_id))
+        await store.run(doc_ref.set, note)
+        note_search.note_added(user_id, str(next_id), title, content)
+        await bump_notes_version(user_id)
+        change_feed.publish(user_id, 'note', {'action': 'created', **note, 'note_id': str(next_id)})
         
         return {
             'user_id': user_id,
@@ -166,18 +244,160 @@ async def create_note(user_id: str, title: str, content: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/users/{user_id}/notes")
-async def get_user_notes(user_id: str):
+async def conditional_page(request: Request, collection: str, field: str, cursor, page_size, fields=None):
+    """
+    A page of collection ordered by field, or 304 Not Modified when the
+    client's ETag still matches the collection's version marker, which
+    costs one read instead of the page's. With fields, only those fields
+    are read (see select_fields).
+
+    The page is encoded straight from the Firestore documents rather than
+    validated against the route's response_model item by item.
+    """
+    marker = await collection_versions.get(collection)
+    if marker is not None:
+        etag = make_etag(marker['version'], cursor, clamp_page_size(page_size), fields)
+        last_modified = http_date(marker['updated_at'])
+        if not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+    query = store.collection(collection).order_by(field)
+    if fields is not None:
+        query = query.select(fields)
+    page = await store.run(firestore_page, query, field, cursor, page_size)
+
+    if marker is None:
+        marker = await collection_versions.create(collection)
+    headers = {}
+    if marker is not None:
+        etag = make_etag(marker['version'], cursor, clamp_page_size(page_size), fields)
+        headers = validator_headers(etag, http_date(marker['updated_at']))
+    return FastJSONResponse(page, headers=headers)
+
+def projection(fields: Optional[str], model, key: str):
+    """The fields= query parameter as field paths, 422 if it names a field model doesn't have."""
     try:
-        notes = []
-        docs = db.collection(user_id).order_by('note_id').stream()
-        
-        for doc in docs:
-            note_data = doc.to_dict()
-            notes.append(note_data)
-            
-        return notes
-        
+        return select_fields(fields, model.model_fields, key)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def conditional_document(request: Request, response: Response, snapshot):
+    """A document, or 304 Not Modified when the client's copy has the same update time."""
+    data = snapshot.to_dict()
+    etag = make_etag(snapshot.id, getattr(snapshot, 'update_time', None) or data.get('updated_at'))
+    last_modified = http_date(data.get('updated_at'))
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+    response.headers.update(validator_headers(etag, last_modified))
+    return data
+
+# Notes are returned a page at a time, pass the returned next_cursor to get
+# the next page. stream=true streams every note as NDJSON instead. Pages
+# carry an ETag; send it back as If-None-Match to get 304 when unchanged.
+# fields=note_id,title,updated_at returns (and reads) only those fields,
+# e.g. to list notes without their content.
+@app.get("/users/{user_id}/notes", response_model=NotePage)
+async def get_user_notes(
+    user_id: str,
+    request: Request,
+    cursor: Optional[int] = None,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+    fields: Optional[str] = None
+):
+    selected = projection(fields, NoteDocument, 'note_id')
+    try:
+        if stream:
+            query = store.collection(user_id).order_by('note_id')
+            if selected is not None:
+                query = query.select(selected)
+            return ndjson_response(query, 'note_id', cursor)
+
+        return await conditional_page(request, user_id, 'note_id', cursor, page_size, selected)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Import many notes at once, as a JSON array or as NDJSON with one note per
+# line (Content-Type: application/x-ndjson). Notes are written in batches
+# as the body arrives; if a note is invalid the batches before it are kept.
+@app.post("/users/{user_id}/notes/bulk")
+async def import_notes(user_id: str, request: Request):
+    importer = NoteImporter(store, id_allocator, user_id)
+    error = None
+    try:
+        async for chunk in read_notes(request):
+            await importer.add(chunk)
+    except Exception as e:
+        error = e
+
+    # Batches already started are committed even after an invalid note, wait
+    # for them so everything stored is indexed, announced and reported
+    try:
+        await importer.wait()
+    except Exception as e:
+        error = error or e
+
+    try:
+        if importer.imported:
+            for note in importer.imported:
+                note_search.note_added(user_id, str(note['note_id']), note['title'], note['content'])
+            await bump_notes_version(user_id)
+            note_ids = sorted(note['note_id'] for note in importer.imported)
+            change_feed.publish(user_id, 'note', {
+                'action': 'imported',
+                'count': len(note_ids),
+                'first_note_id': str(note_ids[0]),
+                'last_note_id': str(note_ids[-1])
+            })
+    except Exception as e:
+        error = error or e
+
+    if isinstance(error, ValueError):
+        raise HTTPException(status_code=422, detail={'message': str(error), 'imported': len(importer.imported)})
+    if error is not None:
+        raise HTTPException(status_code=500, detail=str(error))
+
+    note_ids = sorted(note['note_id'] for note in importer.imported)
+    return {
+        'user_id': user_id,
+        'imported': len(note_ids),
+        'first_note_id': note_ids[0] if note_ids else None,
+        'last_note_id': note_ids[-1] if note_ids else None,
+        'message': 'Notes imported successfully'
+    }
+
+# Every note of a user as NDJSON, in note_id order, in the format the bulk
+# import accepts
+@app.get("/users/{user_id}/notes/export")
+async def export_notes(user_id: str):
+    try:
+        query = store.collection(user_id).order_by('note_id')
+        response = ndjson_response(query, 'note_id', chunk_size=EXPORT_CHUNK_SIZE)
+        response.headers['Content-Disposition'] = f'attachment; filename="notes-{user_id}.ndjson"'
+        return response
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Ranked full-text search over a user's notes. The last word of q also
+# matches as a prefix unless prefix=false.
+@app.get("/users/{user_id}/notes/search")
+async def search_notes(user_id: str, q: str, limit: Optional[int] = None, prefix: bool = True):
+    try:
+        index = await note_search.index(user_id)
+        results = index.search(q, clamp_page_size(limit), prefix)
+
+        notes = await store.get_all(user_id, [note_id for note_id, _ in results])
+        return {
+            'query': q,
+            'items': [
+                {**notes[note_id].to_dict(), 'score': score}
+                for note_id, score in results if note_id in notes
+            ]
+        }
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -190,25 +410,27 @@ class NoteUpdate(BaseModel):
 @app.put("/users/{user_id}/update_notes/{note_id}")
 async def update_note(user_id: str, note_id: str, note: NoteUpdate):
     try:
-        note_ref = db.collection(user_id).document(note_id)
-        
-        # Check if note exists
-        if not note_ref.get().exists:
-            raise HTTPException(status_code=404, detail="Note not found")
-        
-        # Update the note
-        note_ref.update({
+        note_ref = store.collection(user_id).document(note_id)
+
+        # Update the note, Firestore rejects the update if it doesn't exist
+        changes = {
             'title': note.title,
             'content': note.content,
             'updated_at': datetime.now()
-        })
-        
+        }
+        await store.run(note_ref.update, changes)
+        note_search.note_added(user_id, note_id, note.title, note.content)
+        await bump_notes_version(user_id)
+        change_feed.publish(user_id, 'note', {'action': 'updated', 'note_id': note_id, **changes})
+
         return {
             'user_id': user_id,
             'note_id': note_id,
             'message': 'Note updated successfully'
         }
-        
+
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Note not found")
     except Exception as e:
         logging.error("Error occured: %s", str(e))
         logging.debug("Traceback: %s", traceback.format_exc())
@@ -216,35 +438,67 @@ async def update_note(user_id: str, note_id: str, note: NoteUpdate):
     
 
 @app.get("/users/{user_id}/get_notes/{note_id}")
-async def get_note_from_user(user_id: str, note_id: str):
+async def get_note_from_user(user_id: str, note_id: str, request: Request, response: Response):
     try:
-        note_ref = db.collection(user_id).document(note_id)
-        note = note_ref.get()
-        
+        note = await store.get(user_id, note_id)
+
         if not note.exists:
             raise HTTPException(status_code=404, detail="Note not found")
-            
-        return note.to_dict()
-        
+
+        return conditional_document(request, response, note)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
-# Event Agent endpoints\
+# Event Agent endpoints. mode picks how the model is run for this request,
+# "agent" or "structured", see EXTRACTION_MODE in app/agent/get_events_from_data.py
+ExtractionMode = Literal["agent", "structured"]
+
+async def limit_extraction(user_id: str, cost: int = 1):
+    """429 with Retry-After when user_id is over its extraction rate limit or LLM token budget."""
+    if extraction_limiter is None:
+        return
+    try:
+        await extraction_limiter.check(user_id, cost)
+    except RateLimitedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': str(math.ceil(e.retry_after))})
+
+async def refund_extraction(user_id: str, cost: int = 1):
+    """Give back a limit_extraction() whose extraction never ran."""
+    if extraction_limiter is not None:
+        await extraction_limiter.refund(user_id, cost)
+
+def spending(user_id: str):
+    """Count the LLM tokens used inside the block toward user_id's budget."""
+    if extraction_limiter is None:
+        return contextlib.nullcontext()
+    return extraction_limiter.spending(user_id)
+
 @app.get("/event_from_text/{user_id}/{note_id}")
-async def get_event_from_text(user_id: str, note_id: str):
+async def get_event_from_text(user_id: str, note_id: str, mode: Optional[ExtractionMode] = None):
     try:
-        note_ref = db.collection(user_id).document(note_id)
-        note = note_ref.get()
+        note = await store.get(user_id, note_id)
+
+        if not note.exists:
+            raise HTTPException(status_code=404, detail="Note not found")
+
+        # Only extractions that will run count against the limits
+        await limit_extraction(user_id)
 
         note_data = note.to_dict()
 
         text = note_data['content']
 
-        results = output_agent_results(event_agent_executor, text)
+        async with spending(user_id):
+            results = await extract_events(text, mode)
         return results
         
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     # # Run the agent with the text
@@ -252,87 +506,396 @@ async def get_event_from_text(user_id: str, note_id: str):
     # return output_agent_results(response)
 
 # Utility function to get the next event ID
-def get_next_event_id(user_id: str) -> int:
-    events_ref = db.collection(f"{user_id}_events").order_by('event_id', direction=firestore.Query.DESCENDING).limit(1)
-    events = events_ref.get()
-    
-    # If there are no existing events, start with 1
-    if len(events) == 0:
-        return 1
-    
-    # Get the highest event_id and increment by 1
-    return events[0].to_dict()['event_id'] + 1
-
-# Endpoint to create an event based on a note's content
-@app.post("/users/{user_id}/create_event_from_note/{note_id}")
-async def create_event_from_note(user_id: str, note_id: str):
-    
+async def get_next_event_id(user_id: str) -> int:
+    return await id_allocator.next_id(f"{user_id}_events", 'event_id')
+
+async def save_event(user_id: str, note_id: str, event_id: Optional[int], results, chunks=None) -> Tuple[int, bool]:
+    """
+    Write a note's events to its event document: the one with event_id, or
+    a new one linked from the note when there is none yet. chunks None
+    leaves the document's stored chunks as they are. Callers hold the
+    note's lock and bump the version markers once after all their writes.
+
+    Returns:
+        tuple: The event_id, and whether the event document was created
+    """
+    now = datetime.now()
+    if event_id is not None:
+        changes = {'content': results, 'updated_at': now}
+        if chunks is not None:
+            changes['chunks'] = chunks
+        try:
+            await store.run(store.collection(f"{user_id}_events").document(str(event_id)).update, changes)
+            change_feed.publish(user_id, 'event', {
+                'action': 'updated',
+                'event_id': str(event_id),
+                'note_id': note_id,
+                'content': results,
+                'updated_at': now
+            })
+            return event_id, False
+        except NotFound:
+            # The note points at an event document that is gone, start a new one
+            pass
+
+    event_id = await get_next_event_id(user_id)
+    event = {
+        'event_id': event_id,
+        'note_id': note_id,
+        'content': results,
+        'created_at': now,
+        'updated_at': now
+    }
+    if chunks is not None:
+        event['chunks'] = chunks
+
+    await store.run(store.collection(f"{user_id}_events").document(str(event_id)).set, event)
+    await store.run(store.collection(user_id).document(note_id).update, {'event_id': event_id})
+    change_feed.publish(user_id, 'event', {
+        'action': 'created',
+        'event_id': str(event_id),
+        'note_id': note_id,
+        'content': results,
+        'updated_at': now
+    })
+    return event_id, True
+
+async def bump_event_versions(user_id: str, created: bool):
+    """
+    One marker write per collection a request changed, however many events
+    it wrote. Never raises, like bump_notes_version.
+    """
     try:
+        await collection_versions.bump(f"{user_id}_events")
+    except Exception:
+        logging.exception("Could not bump the events version of user %s", user_id)
+    if created:
+        # The notes now carry their event_id
+        await bump_notes_version(user_id)
+
+# One extraction per note at a time, so two runs don't both create its event document
+_note_locks = weakref.WeakValueDictionary()
+
+def note_lock(user_id: str, note_id: str) -> asyncio.Lock:
+    return _note_locks.setdefault((user_id, note_id), asyncio.Lock())
+
+async def create_event_for_note(user_id: str, note_id: str, mode: Optional[str] = None, charge: bool = False) -> dict:
+    async with note_lock(user_id, note_id):
         # Fetch the note
-        note_ref = db.collection(user_id).document(note_id)
-        note = note_ref.get()
-        
+        note = await store.get(user_id, note_id)
+
         if not note.exists:
             raise HTTPException(status_code=404, detail="Note not found")
-        
+
+        # Queued extractions were charged when they were queued
+        if charge:
+            await limit_extraction(user_id)
+
         note_data = note.to_dict()
-        text = note_data['content']
 
-        # Use the event agent to extract event information from the note's content
-        results = output_agent_results(event_agent_executor, text)
+        # A note's events live in one event document, which keeps the events
+        # of each chunk of the note so only edited chunks are extracted again
+        event = None
+        event_id = note_data.get('event_id')
+        if event_id is not None:
+            snapshot = await store.get(f"{user_id}_events", str(event_id))
+            event = snapshot.to_dict() if snapshot.exists else None
 
-        # Get the next event ID
-        next_event_id = get_next_event_id(user_id)
-        
-        # Structure the event data
-        event = {
-            'event_id': next_event_id,
-            'note_id': note_id,
-            'content': results,
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
+        async with spending(user_id):
+            extraction = await extract_chunks(note_data['content'], event.get('chunks') if event else None, mode)
+
+        event_id, created = await save_event(
+            user_id, note_id, event_id if event else None, extraction['events'], extraction['chunks']
+        )
+        await bump_event_versions(user_id, created)
+
+    return {
+        'user_id': user_id,
+        'event_id': event_id,
+        'extracted_chunks': extraction['extracted'],
+        'failed_chunks': extraction['failed'],
+        'message': 'Event created successfully' if created else 'Event updated successfully'
+    }
+
+async def run_event_job(job) -> dict:
+    try:
+        result = await create_event_for_note(job.user_id, job.params['note_id'], job.params.get('mode'))
+    except HTTPException as e:
+        # A missing note will still be missing on the next attempt
+        if e.status_code == 404:
+            await refund_extraction(job.user_id)
+            raise JobFailed(e.detail)
+        raise
+
+    # Model failures come back as failed chunks rather than exceptions.
+    # The chunks that worked are stored, so a retry only re-runs the others
+    if result['failed_chunks']:
+        raise JobIncomplete(f"Extraction failed for {result['failed_chunks']} chunks of the note", result)
+    return result
+
+job_queue = JobQueue(run_event_job)
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+# Endpoint to create an event based on a note's content. With background=true
+# the extraction is queued and a job id is returned right away.
+@app.post("/users/{user_id}/create_event_from_note/{note_id}")
+async def create_event_from_note(
+    user_id: str,
+    note_id: str,
+    response: Response,
+    background: bool = False,
+    mode: Optional[ExtractionMode] = None
+):
+    if background:
+        # Queued extractions count when they are queued, and are refunded
+        # if the note turns out to be missing
+        await limit_extraction(user_id)
+        try:
+            job = job_queue.submit(user_id, note_id=note_id, mode=mode)
+        except QueueFullError as e:
+            await refund_extraction(user_id)
+            raise HTTPException(
+                status_code=429 if e.per_user else 503,
+                detail=str(e),
+                headers={'Retry-After': str(int(JOB_RETRY_BACKOFF) or 1)}
+            )
+
+        response.status_code = 202
+        return {
+            'user_id': user_id,
+            'job_id': job.id,
+            'status': job.status,
+            'message': 'Event extraction queued'
         }
 
-        # Add the event to the user's event collection
-        doc_ref = db.collection(f"{user_id}_events").document(str(next_event_id))
-        doc_ref.set(event)
-        
+    try:
+        return await create_event_for_note(user_id, note_id, mode, charge=True)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchExtractRequest(BaseModel):
+    # Leave out to extract from every note of the user
+    note_ids: Optional[List[str]] = None
+
+# Endpoint to extract events from many notes, packed into fewer LLM calls
+@app.post("/users/{user_id}/events/extract_batch")
+async def extract_events_from_notes(user_id: str, request: BatchExtractRequest):
+    try:
+        notes = {}
+        missing = []
+
+        if request.note_ids is None:
+            for doc in await store.stream(store.collection(user_id)):
+                notes[doc.id] = doc.to_dict()['content']
+        else:
+            # One batched read for all the requested notes
+            found = await store.get_all(user_id, request.note_ids)
+            for note_id in request.note_ids:
+                if note_id in found:
+                    notes[note_id] = found[note_id].to_dict()['content']
+                else:
+                    missing.append(note_id)
+
+        # One unit per model call the batch will take, nothing when no note was found
+        if notes:
+            await limit_extraction(user_id, math.ceil(len(notes) / BATCH_MAX_NOTES))
+        async with spending(user_id):
+            results = await extract_events_batch(notes)
+
+        # Failures come back as {}; their notes keep the events they had
+        extracted = [note_id for note_id in notes if isinstance(results[note_id], list)]
+        failed = [note_id for note_id in notes if not isinstance(results[note_id], list)]
+
+        async def save(note_id):
+            # Same one-event-per-note upsert as create_event_for_note. The
+            # batch has no per-chunk events; the stored chunks are kept,
+            # their fingerprints still match the text they came from.
+            async with note_lock(user_id, note_id):
+                note = await store.get(user_id, note_id)
+                if not note.exists:
+                    return None, False
+                return await save_event(user_id, note_id, note.to_dict().get('event_id'), results[note_id])
+
+        saved = await asyncio.gather(*(save(note_id) for note_id in extracted))
+        if saved:
+            await bump_event_versions(user_id, any(created for _, created in saved))
+        events = [
+            {'note_id': note_id, 'event_id': event_id}
+            for note_id, (event_id, _) in zip(extracted, saved) if event_id is not None
+        ]
+
         return {
             'user_id': user_id,
-            'event_id': next_event_id,
-            'message': 'Event created successfully'
+            'events': events,
+            'missing': missing,
+            'failed': failed,
+            'message': 'Events created successfully' if not failed else 'Extraction failed for some notes, retry them'
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Endpoint to get all events for a user
-@app.get("/users/{user_id}/events")
-async def get_user_events(user_id: str):
+# Endpoint to check on a queued event extraction
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Server-Sent Events stream of a user's note and event changes as this
+# worker writes them: "note" and "event" messages, and "reset" when changes
+# were missed (too slow, or gone from the replay buffer on reconnect),
+# after which the client should refetch. Browsers reconnect on their own
+# and send Last-Event-ID to pick up where they left off.
+@app.get("/users/{user_id}/changes")
+async def stream_changes(user_id: str, last_event_id: Optional[str] = Header(None)):
     try:
-        events = []
-        docs = db.collection(f"{user_id}_events").order_by('event_id').stream()
-        
-        for doc in docs:
-            event_data = doc.to_dict()
-            events.append(event_data)
-            
-        return events
-        
+        last_seen = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_seen = -1
+
+    try:
+        subscription = change_feed.subscribe(user_id, last_seen)
+    except TooManySubscribersError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return StreamingResponse(
+        event_stream(subscription),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        # Also unsubscribes when the client leaves before the stream starts
+        background=BackgroundTask(subscription.close)
+    )
+
+# Endpoint to get all events for a user, paged and projected like notes
+@app.get("/users/{user_id}/events", response_model=EventPage)
+async def get_user_events(
+    user_id: str,
+    request: Request,
+    cursor: Optional[int] = None,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+    fields: Optional[str] = None
+):
+    selected = projection(fields, EventDocument, 'event_id')
+    try:
+        if stream:
+            query = store.collection(f"{user_id}_events").order_by('event_id')
+            if selected is not None:
+                query = query.select(selected)
+            return ndjson_response(query, 'event_id', cursor)
+
+        return await conditional_page(request, f"{user_id}_events", 'event_id', cursor, page_size, selected)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Endpoint to get a specific event by ID
 @app.get("/users/{user_id}/get_event/{event_id}")
-async def get_event(user_id: str, event_id: str):
+async def get_event(user_id: str, event_id: str, request: Request, response: Response):
     try:
-        event_ref = db.collection(f"{user_id}_events").document(event_id)
-        event = event_ref.get()
-        
+        event = await store.get(f"{user_id}_events", event_id)
+
         if not event.exists:
             raise HTTPException(status_code=404, detail="Event not found")
-            
-        return event.to_dict()
-        
+
+        return conditional_document(request, response, event)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# User lookup cache statistics, used to size USER_CACHE_SIZE / TTL
+@app.get("/user_cache/stats")
+async def get_user_cache_stats():
+    return user_cache.stats()
+
+
+# Note search index statistics, used to size NOTE_INDEX_USERS
+@app.get("/note_search/stats")
+async def get_note_search_stats():
+    return note_search.stats()
+
+
+# Change feed statistics, used to size FEED_QUEUE_SIZE
+@app.get("/changes/stats")
+async def get_change_feed_stats():
+    return change_feed.stats()
+
+
+# A user's LLM token spend in the current budget window
+@app.get("/users/{user_id}/llm_usage")
+async def get_llm_usage(user_id: str):
+    if extraction_limiter is None:
+        raise HTTPException(status_code=404, detail="Rate limiting is disabled")
+    try:
+        return await extraction_limiter.usage(user_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Extraction rate limit statistics, used to size EXTRACTION_RATE / LLM_TOKEN_BUDGET
+@app.get("/rate_limit/stats")
+async def get_rate_limit_stats():
+    if extraction_limiter is None:
+        return {'enabled': False}
+    return {'enabled': True, **extraction_limiter.stats()}
+
+
+# Extraction cache statistics, used to size EXTRACTION_CACHE_SIZE / TTL
+@app.get("/event_cache/stats")
+async def get_event_cache_stats():
+    if extraction_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **extraction_cache.stats()}
+
+
+def cache_metrics():
+    lookups = {}
+    if extraction_cache is not None:
+        lookups[('extraction', 'hit')] = extraction_cache.hits
+        lookups[('extraction', 'miss')] = extraction_cache.misses
+    lookups[('user', 'hit')] = user_cache.hits
+    lookups[('user', 'miss')] = user_cache.misses
+    lookups[('user', 'coalesced')] = user_cache.coalesced
+    return [('cache_lookups_total', 'counter', 'Cache lookups by outcome', ('cache', 'result'), lookups)]
+
+registry.register_collector(cache_metrics)
+
+# Users are labels only for the top spenders, to keep the series bounded
+LLM_SPENDERS_EXPORTED = 20
+
+def rate_limit_metrics():
+    if extraction_limiter is None:
+        return []
+    return [
+        ('extraction_rate_limited_total', 'counter', 'Extraction requests answered 429 by reason', ('reason',),
+         {(reason,): count for reason, count in extraction_limiter.limited.items()}),
+        ('llm_user_tokens_spent', 'gauge', 'LLM tokens of the top spending users in the budget window', ('user',),
+         {(user_id,): tokens for user_id, tokens in extraction_limiter.top_spenders(LLM_SPENDERS_EXPORTED)}),
+    ]
+
+registry.register_collector(rate_limit_metrics)
+
+
+# Prometheus metrics of this worker, see app/metrics.py
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(registry.render(), media_type=CONTENT_TYPE)
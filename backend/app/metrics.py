@@ -0,0 +1,279 @@
+# app/metrics.py
+import bisect
+import contextlib
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+# Collect request, Firestore and LLM metrics and serve them at GET /metrics.
+# When off, nothing is timed or counted and /metrics answers 404.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Also emit OpenTelemetry spans for requests, Firestore RPCs and LLM calls.
+# Needs the opentelemetry-api package and an SDK/exporter configured by the
+# deployment; without them tracing stays off.
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is then unavailable
+    trace = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, one per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Observations counted into fixed buckets, one set per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket plus +Inf, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *label_values) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+
+        lines = []
+        names = self.labels + ("le",)
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+
+    Collectors are functions called at scrape time that return a list of
+    (name, kind, help, label names, {label values: value}) for values kept elsewhere,
+    e.g. the cache hit counters, so reading them costs nothing per request.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for collector in self._collectors:
+            for name, kind, help, labels, values in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(
+                    f"{name}{_format_labels(labels, key)} {_format_value(value)}" for key, value in values.items()
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to handle a request, by route template", ("method", "route", "status")
+)
+firestore_rpcs = registry.counter(
+    "firestore_rpcs_total", "Firestore calls made through AsyncFirestore", ("operation",)
+)
+firestore_rpc_duration = registry.histogram(
+    "firestore_rpc_duration_seconds", "Time waiting on a Firestore call, thread pool queueing included", ("operation",)
+)
+firestore_request_rpcs = registry.histogram(
+    "firestore_rpcs_per_request", "Firestore calls made while handling one request", ("route",), COUNT_BUCKETS
+)
+firestore_request_duration = registry.histogram(
+    "firestore_seconds_per_request", "Time spent waiting on Firestore while handling one request", ("route",)
+)
+llm_call_duration = registry.histogram(
+    "llm_call_duration_seconds", "Latency of a single chat model call", ("model", "outcome"), LLM_LATENCY_BUCKETS
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens reported by the chat model", ("model", "direction")
+)
+extraction_duration = registry.histogram(
+    "extraction_duration_seconds", "Time to extract events from one piece of text", ("mode", "outcome"),
+    LLM_LATENCY_BUCKETS
+)
+agent_iterations = registry.histogram(
+    "extraction_llm_calls", "Chat model calls made for one extraction", ("mode",), COUNT_BUCKETS
+)
+agent_tool_calls = registry.counter(
+    "agent_tool_calls_total", "Tools the agent called before answering", ("tool",)
+)
+
+
+class RequestMetrics:
+    """Firestore usage of the request being handled, shared by every task it starts."""
+
+    __slots__ = ("rpcs", "seconds")
+
+    def __init__(self):
+        self.rpcs = 0
+        self.seconds = 0.0
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+def record_firestore(operation: str, seconds: float):
+    firestore_rpcs.inc(operation)
+    firestore_rpc_duration.observe(seconds, operation)
+    request = current_request.get()
+    if request is not None:
+        request.rpcs += 1
+        request.seconds += seconds
+
+
+def _tracer():
+    if TRACING_ENABLED and trace is not None:
+        return trace.get_tracer("alignly")
+    return None
+
+
+_TRACER = _tracer()
+
+
+def span(name: str, **attributes):
+    """An OpenTelemetry span around a block when tracing is on, otherwise a no-op."""
+    if _TRACER is None:
+        return contextlib.nullcontext()
+    return _TRACER.start_as_current_span(name, attributes=attributes)
+
+
+def start_span(name: str, **attributes):
+    """A span that isn't made current, for callbacks that end it elsewhere. None when tracing is off."""
+    if _TRACER is None:
+        return None
+    return _TRACER.start_span(name, attributes=attributes)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every request by its route template, e.g.
+    /users/{user_id}/notes, so ids don't become separate series. Requests
+    that match no route are counted under "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None): route.path for route in scope["app"].routes
+            }
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request = RequestMetrics()
+        token = current_request.set(request)
+        start = time.perf_counter()
+        try:
+            with span(f"HTTP {scope['method']}", **{"http.method": scope["method"], "http.target": scope["path"]}):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            route = self._route(scope)
+            http_request_duration.observe(elapsed, scope["method"], route, status)
+            firestore_request_rpcs.observe(request.rpcs, route)
+            firestore_request_duration.observe(request.seconds, route)
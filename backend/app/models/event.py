@@ -0,0 +1,17 @@
+# app/models/event.py
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+class EventDocument(BaseModel):
+    # An event as stored in Firestore; fields left out by a fields= projection are missing
+    event_id: int
+    note_id: Optional[str] = None
+    content: Optional[Any] = None
+    chunks: Optional[List[dict]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class EventPage(BaseModel):
+    items: List[EventDocument]
+    next_cursor: Optional[int] = None
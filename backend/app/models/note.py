@@ -1,6 +1,6 @@
 # app/models/note.py
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -22,3 +22,17 @@ class Note(NoteBase):
 
     class Config:
         from_attributes = True
+
+class NoteDocument(BaseModel):
+    # A note as stored in Firestore; fields left out by a fields= projection are missing
+    note_id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    # Set once events were extracted from the note
+    event_id: Optional[int] = None
+
+class NotePage(BaseModel):
+    items: List[NoteDocument]
+    next_cursor: Optional[int] = None
@@ -1,6 +1,6 @@
 # app/models/user.py
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, EmailStr
 
@@ -19,4 +19,11 @@ class UserProfile(UserProfileBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class UserSummary(BaseModel):
+    uuid: str
+    email: Optional[str] = None
+
+class UserPage(BaseModel):
+    users: List[UserSummary]
+    next_page_token: Optional[str] = None
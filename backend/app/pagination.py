@@ -0,0 +1,85 @@
+# app/pagination.py
+from typing import Iterable, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.responses import dumps
+
+
+def clamp_page_size(page_size: Optional[int] = None) -> int:
+    if page_size is None:
+        page_size = settings.DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, settings.MAX_PAGE_SIZE))
+
+
+def select_fields(fields: Optional[str], allowed: Iterable[str], key: str) -> Optional[List[str]]:
+    """
+    Parse a fields= projection such as "title,updated_at" into the field
+    paths for Firestore's select(). The ordering key is always selected,
+    pages need it for the cursor.
+
+    Raises:
+        ValueError: If a field isn't one of allowed
+    """
+    if fields is None:
+        return None
+    selected = [key]
+    for name in fields.split(","):
+        name = name.strip()
+        if not name or name in selected:
+            continue
+        if name not in allowed:
+            raise ValueError(f"Unknown field {name!r}, expected some of {', '.join(allowed)}")
+        selected.append(name)
+    return selected
+
+
+def firestore_page(query, field: str, cursor=None, page_size: Optional[int] = None) -> dict:
+    """
+    Read one page of a Firestore query ordered by field.
+
+    Args:
+        query: Query already ordered by field
+        field (str): The ordering field, e.g. 'note_id'
+        cursor: Value of field on the last document of the previous page
+        page_size (int): Documents per page, clamped to MAX_PAGE_SIZE
+
+    Returns:
+        dict: 'items' on this page and the 'next_cursor', None on the last page
+    """
+    page_size = clamp_page_size(page_size)
+    if cursor is not None:
+        query = query.start_after({field: cursor})
+
+    # One extra document tells us whether there is a next page
+    docs = [doc.to_dict() for doc in query.limit(page_size + 1).stream()]
+    next_cursor = docs[page_size - 1][field] if len(docs) > page_size else None
+
+    return {
+        'items': docs[:page_size],
+        'next_cursor': next_cursor
+    }
+
+
+def ndjson_response(query, field: str, cursor=None, chunk_size: int = 1) -> StreamingResponse:
+    """
+    Stream every document of query as newline-delimited JSON, as Firestore
+    delivers it. Lines are sent chunk_size documents at a time; larger
+    chunks mean fewer hops through the thread pool for large exports.
+    """
+    if cursor is not None:
+        query = query.start_after({field: cursor})
+
+    def lines():
+        chunk = []
+        for doc in query.stream():
+            chunk.append(dumps(doc.to_dict()) + b"\n")
+            if len(chunk) >= chunk_size:
+                yield b"".join(chunk)
+                chunk = []
+        if chunk:
+            yield b"".join(chunk)
+
+    # Starlette iterates sync generators in its thread pool
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
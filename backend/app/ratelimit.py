@@ -0,0 +1,318 @@
+# app/ratelimit.py
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+# Rate limit the extraction routes and count each user's LLM tokens.
+# When off, extractions are neither limited nor counted.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# "memory" keeps buckets and spend per worker, "redis" shares them between
+# workers (needs the redis package and RATE_LIMIT_URL)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "redis://localhost:6379/0")
+# Buckets and counters kept by the memory backend, least recently used dropped first
+RATE_LIMIT_KEYS = int(os.getenv("RATE_LIMIT_KEYS", "100000"))
+
+# Extractions a user may start per minute, and how many at once after being
+# idle (the bucket size). 0 turns the per-user limit off.
+EXTRACTION_RATE = float(os.getenv("EXTRACTION_RATE", "20"))
+EXTRACTION_BURST = float(os.getenv("EXTRACTION_BURST", "10"))
+# The same for all users together, off by default. Checked before the user's
+# own limit, so a global rejection doesn't cost the user a token, and given
+# back when the user's limit rejects, so a limited user can't use up
+# everyone else's share.
+EXTRACTION_GLOBAL_RATE = float(os.getenv("EXTRACTION_GLOBAL_RATE", "0"))
+EXTRACTION_GLOBAL_BURST = float(os.getenv("EXTRACTION_GLOBAL_BURST", "100"))
+
+# LLM tokens (prompt plus completion) a user may spend per LLM_BUDGET_WINDOW
+# seconds. Spend is counted after each extraction, so the extractions that
+# were running when the budget ran out still finish. 0 counts without limiting.
+LLM_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "200000"))
+LLM_BUDGET_WINDOW = int(os.getenv("LLM_BUDGET_WINDOW", str(24 * 60 * 60)))
+
+
+class RateLimitedError(Exception):
+    """Raised by ExtractionLimiter.check() when a request has to wait retry_after seconds."""
+
+    def __init__(self, message: str, reason: str, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class InMemoryLimitStore:
+    """
+    Token buckets and expiring counters of this process.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_KEYS):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put(self, key: str, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            # A dropped bucket comes back full, a dropped counter at 0
+            self._entries.popitem(last=False)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        """
+        Take cost tokens from the bucket at key, refilled at rate tokens per
+        second up to burst. Returns 0 if they were taken, otherwise the
+        seconds until they will be there (and takes nothing). A negative
+        cost gives tokens back; the next take caps them at burst again.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._entries.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._put(key, (tokens, now))
+        return wait
+
+    async def incr(self, key: str, amount: int, ttl: int) -> int:
+        now = time.monotonic()
+        with self._lock:
+            value, expires_at = self._entries.get(key, (0, now + ttl))
+            if expires_at <= now:
+                value, expires_at = 0, now + ttl
+            value += amount
+            self._put(key, (value, expires_at))
+        return value
+
+    async def get(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._entries.get(key, (0, 0))
+        return value if expires_at > time.monotonic() else 0
+
+
+# KEYS[1] bucket; ARGV rate, burst, cost. Uses the Redis clock so workers
+# with skewed clocks agree.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisLimitStore:
+    """
+    Token buckets and counters shared by every worker, stored in Redis.
+    A bucket is updated atomically by a Lua script.
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_URL, prefix: str = "alignly:limits:"):
+        # Optional dependency, only needed when this backend is selected
+        from redis import asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, burst, cost]))
+
+    async def incr(self, key: str, amount: int, ttl: int) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incrby(self.prefix + key, amount)
+            pipe.expire(self.prefix + key, ttl, nx=True)
+            value, _ = await pipe.execute()
+        return value
+
+    async def get(self, key: str) -> int:
+        value = await self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+
+class Spend:
+    """LLM tokens used by the extraction being run, see ExtractionLimiter.spending()."""
+
+    __slots__ = ("tokens",)
+
+    def __init__(self):
+        self.tokens = 0
+
+
+current_spend = ContextVar("current_spend", default=None)
+
+
+class ExtractionLimiter:
+    """
+    Token-bucket rate limits and LLM token budgets for extractions, per user.
+
+    Routes call check() before starting an extraction and run it inside
+    spending(), which adds the tokens the model reported (see LLMSpend in
+    app/agent/callbacks.py) to the user's spend for the current window.
+    """
+
+    def __init__(
+        self,
+        store,
+        rate: float = EXTRACTION_RATE,
+        burst: float = EXTRACTION_BURST,
+        global_rate: float = EXTRACTION_GLOBAL_RATE,
+        global_burst: float = EXTRACTION_GLOBAL_BURST,
+        budget: int = LLM_TOKEN_BUDGET,
+        window: int = LLM_BUDGET_WINDOW,
+    ):
+        self.store = store
+        # Configured per minute, buckets refill per second
+        self.rate = rate / 60
+        self.burst = burst
+        self.global_rate = global_rate / 60
+        self.global_burst = global_burst
+        self.budget = budget
+        self.window = window
+        self.allowed = 0
+        self.limited = {}  # reason -> count
+        # Tokens per user spent through this worker in the current window
+        self._window_index = None
+        self.spent = {}
+
+    def _window(self):
+        now = time.time()
+        index = int(now // self.window)
+        return index, (index + 1) * self.window - now
+
+    def _limited(self, reason: str, message: str, retry_after: float):
+        self.limited[reason] = self.limited.get(reason, 0) + 1
+        return RateLimitedError(message, reason, retry_after)
+
+    async def check(self, user_id: str, cost: float = 1):
+        """
+        Let an extraction of user_id through, counting cost against the
+        rate limits.
+
+        Raises:
+            RateLimitedError: If the user is out of budget, or the user's or
+                everyone's rate limit is reached
+        """
+        try:
+            if self.budget:
+                index, resets_in = self._window()
+                spent = await self.store.get(f"spend:{user_id}:{index}")
+                if spent >= self.budget:
+                    raise self._limited(
+                        "budget", f"User {user_id} has used its budget of {self.budget} LLM tokens", resets_in
+                    )
+
+            # Clamped to the bucket size, a larger cost could never be taken
+            if self.global_rate:
+                wait = await self.store.take(
+                    "rate:*", self.global_rate, self.global_burst, min(cost, self.global_burst)
+                )
+                if wait:
+                    raise self._limited("global", "Too many extractions, try again later", wait)
+            if self.rate:
+                wait = await self.store.take(f"rate:{user_id}", self.rate, self.burst, min(cost, self.burst))
+                if wait:
+                    if self.global_rate:
+                        await self.store.take(
+                            "rate:*", self.global_rate, self.global_burst, -min(cost, self.global_burst)
+                        )
+                    raise self._limited("user", f"User {user_id} is over its extraction rate limit", wait)
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            # An unreachable shared store shouldn't take extractions down with it
+            logging.warning("Rate limit check failed, letting the request through: %s", e)
+        self.allowed += 1
+
+    async def refund(self, user_id: str, cost: float = 1):
+        """Give back what check() took for an extraction that didn't run, e.g. of a missing note."""
+        try:
+            if self.global_rate:
+                await self.store.take("rate:*", self.global_rate, self.global_burst, -min(cost, self.global_burst))
+            if self.rate:
+                await self.store.take(f"rate:{user_id}", self.rate, self.burst, -min(cost, self.burst))
+        except Exception as e:
+            logging.warning("Could not refund %s extractions of user %s: %s", cost, user_id, e)
+
+    @contextlib.asynccontextmanager
+    async def spending(self, user_id: str):
+        """Count the LLM tokens used inside the block toward user_id's budget."""
+        spend = Spend()
+        token = current_spend.set(spend)
+        try:
+            yield spend
+        finally:
+            current_spend.reset(token)
+            if spend.tokens:
+                await self._charge(user_id, spend.tokens)
+
+    async def _charge(self, user_id: str, tokens: int):
+        index, _ = self._window()
+        if index != self._window_index:
+            self._window_index = index
+            self.spent = {}
+        self.spent[user_id] = self.spent.get(user_id, 0) + tokens
+        try:
+            await self.store.incr(f"spend:{user_id}:{index}", tokens, self.window)
+        except Exception as e:
+            logging.warning("Could not count %d LLM tokens of user %s: %s", tokens, user_id, e)
+
+    async def usage(self, user_id: str) -> dict:
+        index, resets_in = self._window()
+        spent = await self.store.get(f"spend:{user_id}:{index}")
+        return {
+            'user_id': user_id,
+            'spent_tokens': spent,
+            'budget_tokens': self.budget or None,
+            'remaining_tokens': max(0, self.budget - spent) if self.budget else None,
+            'resets_in': round(resets_in),
+        }
+
+    def top_spenders(self, count: int = 10) -> list:
+        """Users who spent the most tokens through this worker in the current window."""
+        index, _ = self._window()
+        if index != self._window_index:
+            return []
+        return sorted(self.spent.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.store).__name__,
+            "allowed": self.allowed,
+            "limited": dict(self.limited),
+            "users_spending": len(self.spent) if self._window_index == self._window()[0] else 0,
+            "top_spenders": dict(self.top_spenders()),
+        }
+
+
+def build_extraction_limiter(backend: str = RATE_LIMIT_BACKEND):
+    """
+    Create the limiter on the store selected by RATE_LIMIT_BACKEND ("memory"
+    or "redis"). Returns None when RATE_LIMIT_ENABLED is off.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    if backend == "redis":
+        return ExtractionLimiter(RedisLimitStore())
+    if backend == "memory":
+        return ExtractionLimiter(InMemoryLimitStore())
+    raise ValueError(f"Unknown rate limit backend: {backend}")
@@ -1,20 +1,92 @@
-from supabase import create_client, Client
+import base64
+import json
+from typing import Optional
+
+from postgrest import AsyncPostgrestClient
 from ..config import settings
+from .client import get_postgrest_client
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor for the sort key values of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _quote(value) -> str:
+    # Values in PostgREST logic filters are quoted so ':' and '.' in timestamps are kept
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
 
 class BaseRepository:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+    def __init__(self, client: AsyncPostgrestClient = None):
+        # Repositories share one pooled async client unless one is injected
+        self.supabase: AsyncPostgrestClient = client or get_postgrest_client()
         self.table: str = None  # To be set by child classes
 
     async def _paginate_query(self, query, page: int = 1, page_size: int = None):
         if page_size is None:
             page_size = settings.DEFAULT_PAGE_SIZE
-            
+
         page_size = min(page_size, settings.MAX_PAGE_SIZE)
         start = (page - 1) * page_size
         end = start + page_size - 1
-        
-        return query.range(start, end)
\ No newline at end of file
+
+        return query.range(start, end)
+
+    def _clamp_page_size(self, page_size: int = None) -> int:
+        if page_size is None:
+            page_size = settings.DEFAULT_PAGE_SIZE
+        return max(1, min(page_size, settings.MAX_PAGE_SIZE))
+
+    async def _keyset_page(self, query, cursor: Optional[str] = None, page_size: int = None) -> dict:
+        """
+        Read one page of query, newest first, keyed on (created_at, id).
+
+        Unlike _paginate_query every page costs the same, and rows inserted
+        while paging don't shift later pages.
+
+        Args:
+            query: Filtered select, not yet ordered
+            cursor (str): next_cursor of the previous page
+            page_size (int): Rows per page, capped at MAX_PAGE_SIZE
+
+        Returns:
+            dict: The raw rows in 'items' and the 'next_cursor', None on the last page
+        """
+        page_size = self._clamp_page_size(page_size)
+
+        if cursor is not None:
+            created_at, row_id = decode_cursor(cursor)
+            # The plain range on created_at is redundant but lets the
+            # (created_at, id) index bound the scan, the OR alone doesn't
+            query = query.lte('created_at', created_at).or_(
+                f"created_at.lt.{_quote(created_at)},"
+                f"and(created_at.eq.{_quote(created_at)},id.lt.{_quote(row_id)})"
+            )
+
+        # One extra row tells us whether there is a next page
+        response = await query.order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(page_size + 1)\
+            .execute()
+
+        rows = response.data
+        next_cursor = None
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+
+        return {
+            'items': rows[:page_size],
+            'next_cursor': next_cursor
+        }
@@ -0,0 +1,85 @@
+# app/repositories/client.py
+import os
+from typing import Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS, DEFAULT_POSTGREST_CLIENT_TIMEOUT
+
+from ..config import settings
+
+# Connection pool shared by every repository. Keep-alive connections are
+# reused across requests, so most queries skip the TCP and TLS handshake.
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """
+    AsyncPostgrestClient whose HTTP session has explicit pool limits. A
+    custom transport can be passed in, e.g. httpx.MockTransport in
+    benchmarks.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        headers: dict,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+    ):
+        # create_session is called from the base __init__
+        self._limits = limits or httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        )
+        self._transport = transport
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            follow_redirects=True,
+            http2=True,
+            limits=self._limits,
+            transport=self._transport,
+        )
+
+
+def create_postgrest_client(transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs) -> PooledPostgrestClient:
+    """Build a client for the Supabase REST API from settings."""
+    return PooledPostgrestClient(
+        f"{settings.SUPABASE_URL}/rest/v1",
+        headers={
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apikey": settings.SUPABASE_KEY,
+            "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+        },
+        transport=transport,
+        **kwargs,
+    )
+
+
+_client: Optional[PooledPostgrestClient] = None
+
+
+def get_postgrest_client() -> PooledPostgrestClient:
+    """The process-wide client, created on first use."""
+    global _client
+    if _client is None:
+        _client = create_postgrest_client()
+    return _client
+
+
+async def close_postgrest_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,18 +1,18 @@
 # app/repositories/note_repository.py
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
 from uuid import UUID
 from .base import BaseRepository
 from ..models.note import Note, NoteCreate, NoteUpdate
 
 class NoteRepository(BaseRepository):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client=None):
+        super().__init__(client)
         self.table = 'notes'
 
     async def create(self, note: NoteCreate) -> Note:
         data = {
-            **note.model_dump(),
+            **note.model_dump(mode='json'),
             'updated_at': datetime.now().isoformat()
         }
         response = await self.supabase.table(self.table).insert(data).execute()
@@ -27,24 +27,28 @@ class NoteRepository(BaseRepository):
         return Note.model_validate(response.data) if response.data else None
 
     async def get_user_notes(
-        self, 
-        user_id: UUID, 
-        page: int = 1, 
+        self,
+        user_id: UUID,
+        cursor: Optional[str] = None,
         page_size: int = None
-    ) -> List[Note]:
+    ) -> dict:
+        """
+        A user's notes, newest first, one page at a time.
+
+        Returns:
+            dict: Notes in 'items' and the 'next_cursor' to pass back for the next page
+        """
         query = self.supabase.table(self.table)\
             .select("*")\
-            .eq('user_id', str(user_id))\
-            .order('created_at', desc=True)
-        
-        query = await self._paginate_query(query, page, page_size)
-        response = await query.execute()
-        
-        return [Note.model_validate(note) for note in response.data]
+            .eq('user_id', str(user_id))
+
+        page = await self._keyset_page(query, cursor, page_size)
+        page['items'] = [Note.model_validate(note) for note in page['items']]
+        return page
 
     async def update(self, note_id: int, note: NoteUpdate) -> Optional[Note]:
         data = {
-            **note.model_dump(),
+            **note.model_dump(mode='json'),
             'updated_at': datetime.now().isoformat()
         }
         response = await self.supabase.table(self.table)\
@@ -1,14 +1,14 @@
 
 # app/repositories/user_repository.py
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
 from uuid import UUID
-from .base import BaseRepository
+from .base import BaseRepository, decode_cursor, encode_cursor
 from ..models.user import UserProfile, UserProfileUpdate
 
 class UserProfileRepository(BaseRepository):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client=None):
+        super().__init__(client)
         self.table = 'user_profiles'
 
     async def get(self, user_id: UUID) -> Optional[UserProfile]:
@@ -29,7 +29,7 @@ class UserProfileRepository(BaseRepository):
 
     async def update(self, user_id: UUID, profile: UserProfileUpdate) -> Optional[UserProfile]:
         data = {
-            **profile.model_dump(exclude_unset=True),
+            **profile.model_dump(mode='json', exclude_unset=True),
             'updated_at': datetime.now().isoformat()
         }
         response = await self.supabase.table(self.table)\
@@ -39,16 +39,39 @@ class UserProfileRepository(BaseRepository):
         return UserProfile.model_validate(response.data[0]) if response.data else None
 
     async def search(
-        self, 
-        search_term: str, 
-        page: int = 1, 
+        self,
+        search_term: str,
+        cursor: Optional[str] = None,
         page_size: int = None
-    ) -> List[UserProfile]:
-        query = self.supabase.table(self.table)\
-            .select("*")\
-            .or_(f"username.ilike.%{search_term}%,full_name.ilike.%{search_term}%")
-            
-        query = await self._paginate_query(query, page, page_size)
-        response = await query.execute()
-        
-        return [UserProfile.model_validate(profile) for profile in response.data]
\ No newline at end of file
+    ) -> dict:
+        """
+        Profiles matching search_term, best match first, one page at a time.
+
+        Every word matches as a prefix of a word in the username or full
+        name, so it also serves typeahead. Runs the search_user_profiles
+        function (backend/supabase/migrations), which uses indexes instead
+        of scanning the table.
+
+        Returns:
+            dict: Profiles in 'items' and the 'next_cursor' to pass back for the next page
+        """
+        page_size = self._clamp_page_size(page_size)
+        params = {
+            'search_query': search_term,
+            'result_limit': page_size + 1
+        }
+        if cursor is not None:
+            params['after_rank'], params['after_id'] = decode_cursor(cursor)
+
+        response = await self.supabase.rpc('search_user_profiles', params).execute()
+
+        rows = response.data
+        next_cursor = None
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            next_cursor = encode_cursor(last['rank'], last['id'])
+
+        return {
+            'items': [UserProfile.model_validate(profile) for profile in rows[:page_size]],
+            'next_cursor': next_cursor
+        }
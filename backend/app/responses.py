@@ -0,0 +1,45 @@
+# app/responses.py
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    # Optional dependency, several times faster than json + jsonable_encoder
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    # orjson only takes datetime itself, not subclasses such as Firestore's
+    # DatetimeWithNanoseconds; isoformat() is what jsonable_encoder gives
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return jsonable_encoder(value)
+
+
+def dumps(content) -> bytes:
+    """
+    Encode content as compact JSON, Firestore documents included as they
+    come (datetimes become ISO 8601 strings).
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+
+    Routes returning large lists build it themselves from the raw documents,
+    which skips FastAPI's validation and jsonable_encoder pass over every
+    item; their response_model then only documents the shape.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,324 @@
+# app/search.py
+import asyncio
+import heapq
+import math
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Users whose note index is kept in memory, least recently searched are
+# dropped first and rebuilt from Firestore on their next search
+NOTE_INDEX_USERS = int(os.getenv("NOTE_INDEX_USERS", "1000"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower())
+
+
+class NoteIndex:
+    """
+    Inverted index over one user's notes, ranked with BM25.
+
+    Each term maps to one flat array('I') of (doc, term frequency) pairs, so
+    a posting costs 8 bytes. Docs are numbered in the order they are added;
+    updating a note indexes it under a new number and leaves the old
+    postings behind as dead entries, which are dropped once replaced docs
+    make up half of the index. Nothing is ever re-tokenized.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._terms = []  # sorted for prefix lookups, see _sorted_terms
+        self._new_terms = []
+        self._doc_ids = []  # doc number -> note id, None once replaced
+        self._doc_lengths = array('I')
+        self._live = {}  # note id -> doc number
+        self._total_length = 0
+        self._postings_count = 0
+        self._dead_docs = 0
+        # Version marker of the collection the index reflects, see NoteSearch
+        self.version = None
+
+    def __len__(self):
+        return len(self._live)
+
+    def add(self, note_id: str, title: str, content: str):
+        """Index a note, replacing any earlier version of it."""
+        self.remove(note_id)
+
+        tokens = tokenize(title) + tokenize(content)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        doc = len(self._doc_ids)
+        self._doc_ids.append(note_id)
+        self._doc_lengths.append(len(tokens))
+        self._live[note_id] = doc
+        self._total_length += len(tokens)
+
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array('I')
+                self._new_terms.append(term)
+            postings.append(doc)
+            postings.append(count)
+        self._postings_count += len(counts)
+
+    def remove(self, note_id: str):
+        doc = self._live.pop(note_id, None)
+        if doc is None:
+            return
+
+        self._doc_ids[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._dead_docs += 1
+        if self._dead_docs * 2 > len(self._doc_ids):
+            self._compact()
+
+    def _compact(self):
+        """Renumber the live docs and drop the postings of replaced ones."""
+        renumber = {}
+        doc_ids, doc_lengths = [], array('I')
+        for doc, note_id in enumerate(self._doc_ids):
+            if note_id is not None:
+                renumber[doc] = len(doc_ids)
+                doc_ids.append(note_id)
+                doc_lengths.append(self._doc_lengths[doc])
+
+        postings_count = 0
+        for term in list(self._postings):
+            old = self._postings[term]
+            new = array('I')
+            for i in range(0, len(old), 2):
+                doc = renumber.get(old[i])
+                if doc is not None:
+                    new.append(doc)
+                    new.append(old[i + 1])
+            if new:
+                self._postings[term] = new
+                postings_count += len(new) // 2
+            else:
+                del self._postings[term]
+
+        self._terms = sorted(self._postings)
+        self._new_terms = []
+        self._doc_ids = doc_ids
+        self._doc_lengths = doc_lengths
+        self._live = {note_id: doc for doc, note_id in enumerate(doc_ids)}
+        self._postings_count = postings_count
+        self._dead_docs = 0
+
+    def _sorted_terms(self) -> list:
+        if self._new_terms:
+            # Sorted runs merge in linear time
+            self._terms += sorted(self._new_terms)
+            self._terms.sort()
+            self._new_terms = []
+        return self._terms
+
+    def _expand(self, token: str, prefix: bool) -> list:
+        if not prefix:
+            return [token] if token in self._postings else []
+        terms = self._sorted_terms()
+        start = bisect_left(terms, token)
+        end = bisect_left(terms, token + '\U0010ffff', start)
+        return terms[start:end]
+
+    def search(self, query: str, limit: int = 10, prefix: bool = True) -> list:
+        """
+        Rank the notes matching any word of query with BM25.
+
+        Args:
+            query (str): Words to look for
+            limit (int): Number of results
+            prefix (bool): Also match words starting with the last word of query
+
+        Returns:
+            list: (note_id, score) pairs, best first
+        """
+        tokens = tokenize(query)
+        if not tokens or not self._live:
+            return []
+
+        docs = len(self._live)
+        avg_length = self._total_length / docs
+        doc_ids, lengths = self._doc_ids, self._doc_lengths
+        scores = {}
+
+        for position, token in enumerate(tokens):
+            # A doc matching several expansions of a prefix counts once, with its best score
+            terms = self._expand(token, prefix and position == len(tokens) - 1)
+            token_scores = scores if len(terms) == 1 and not scores else {}
+            for term in terms:
+                postings = self._postings[term]
+                pairs = zip(postings[0::2], postings[1::2])
+                if self._dead_docs:
+                    pairs = [(doc, frequency) for doc, frequency in pairs if doc_ids[doc] is not None]
+                else:
+                    pairs = list(pairs)
+                if not pairs:
+                    continue
+
+                idf = math.log(1 + (docs - len(pairs) + 0.5) / (len(pairs) + 0.5))
+                k = K1 * (1 - B)
+                k_length = K1 * B / avg_length
+                for doc, frequency in pairs:
+                    score = idf * frequency * (K1 + 1) / (frequency + k + k_length * lengths[doc])
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+
+            if token_scores is not scores:
+                for doc, score in token_scores.items():
+                    scores[doc] = scores.get(doc, 0.0) + score
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self._doc_ids[doc], score) for doc, score in best]
+
+    def stats(self) -> dict:
+        postings_bytes = sum(postings.buffer_info()[1] * postings.itemsize for postings in self._postings.values())
+        terms_bytes = sum(sys.getsizeof(term) for term in self._postings)
+        return {
+            "notes": len(self._live),
+            "terms": len(self._postings),
+            "postings": self._postings_count,
+            "postings_bytes": postings_bytes,
+            "terms_bytes": terms_bytes,
+        }
+
+
+class NoteSearch:
+    """
+    Note indexes for the most recently searched users.
+
+    A user's index is built from their Firestore collection on their first
+    search. After that the note routes keep it current through note_added
+    and note_removed, including while the build is still reading Firestore.
+
+    Each worker keeps its own indexes. With versions (CollectionVersions),
+    every search first reads the collection's version marker and rebuilds
+    the index when it moved, e.g. after a write through another worker. The
+    routes report the marker changes of their own writes through
+    version_changed, which the index adopts when it was current before the
+    write, so it isn't rebuilt for changes it already has.
+    """
+
+    def __init__(self, store, versions=None, max_users: int = NOTE_INDEX_USERS):
+        self.store = store
+        self.versions = versions
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        self._building = {}
+        self._pending = {}
+        self.builds = 0
+        self.stale = 0
+
+    async def _version(self, user_id: str):
+        marker = await self.versions.get(user_id)
+        return marker['version'] if marker is not None else None
+
+    async def index(self, user_id: str) -> NoteIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            if self.versions is None or await self._version(user_id) == index.version:
+                if self._indexes.get(user_id) is index:
+                    self._indexes.move_to_end(user_id)
+                return index
+            # Written to through another worker since the index was built
+            if self._indexes.get(user_id) is index:
+                del self._indexes[user_id]
+                self.stale += 1
+
+        task = self._building.get(user_id)
+        if task is None:
+            self._pending[user_id] = []
+            task = asyncio.ensure_future(self._build(user_id))
+            self._building[user_id] = task
+
+            def done(_):
+                self._building.pop(user_id, None)
+                self._pending.pop(user_id, None)
+            task.add_done_callback(done)
+
+        # Shielded so one cancelled search doesn't cancel the build for the rest
+        return await asyncio.shield(task)
+
+    async def _build(self, user_id: str) -> NoteIndex:
+        # Read before the notes, so a write the stream misses moves it
+        version = await self._version(user_id) if self.versions is not None else None
+        docs = await self.store.stream(self.store.collection(user_id))
+        # Tokenizing is CPU bound, keep the event loop free for other requests
+        index = await asyncio.to_thread(self._index_docs, docs)
+        index.version = version
+
+        for note_id, note in self._pending.get(user_id, []):
+            if note is None:
+                index.remove(note_id)
+            else:
+                index.add(note_id, note['title'], note['content'])
+
+        self._indexes[user_id] = index
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        self.builds += 1
+        return index
+
+    @staticmethod
+    def _index_docs(docs) -> NoteIndex:
+        index = NoteIndex()
+        for doc in docs:
+            note = doc.to_dict()
+            index.add(doc.id, note.get('title', ''), note.get('content', ''))
+        return index
+
+    def _apply(self, user_id: str, note_id: str, note):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            if note is None:
+                index.remove(note_id)
+            else:
+                index.add(note_id, note['title'], note['content'])
+        elif user_id in self._pending:
+            self._pending[user_id].append((note_id, note))
+
+    def note_added(self, user_id: str, note_id: str, title: str, content: str):
+        """Index a created or updated note if the user's index is loaded."""
+        self._apply(user_id, note_id, {'title': title, 'content': content})
+
+    def note_removed(self, user_id: str, note_id: str):
+        self._apply(user_id, note_id, None)
+
+    def loaded(self, user_id: str) -> bool:
+        """Whether this worker has user_id's index, so version_changed has something to update."""
+        return user_id in self._indexes
+
+    def version_changed(self, user_id: str, previous, version: str):
+        """
+        Report that this worker moved the user's version marker from
+        previous to version (see CollectionVersions.advance), after
+        applying its writes through note_added and note_removed.
+        """
+        index = self._indexes.get(user_id)
+        if index is not None and index.version == previous:
+            index.version = version
+
+    def stats(self) -> dict:
+        indexes = [index.stats() for index in self._indexes.values()]
+        return {
+            "users": len(indexes),
+            "max_users": self.max_users,
+            "builds": self.builds,
+            "stale_rebuilds": self.stale,
+            "notes": sum(stats["notes"] for stats in indexes),
+            "postings_bytes": sum(stats["postings_bytes"] for stats in indexes),
+        }
@@ -0,0 +1,96 @@
+# app/user_cache.py
+import asyncio
+import os
+
+from firebase_admin import auth
+
+from app.agent.cache import InMemoryCacheBackend
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+
+def user_summary(user) -> dict:
+    return {
+        'uuid': user.uid,
+        'email': user.email
+    }
+
+
+class UserCache:
+    """
+    Read-through cache for Firebase Auth lookups by uid and by email.
+
+    Both lookups share the cached user summary, so resolving a user by email
+    also answers later lookups by uid and the other way round. Concurrent
+    misses for the same key wait on a single Firebase call, which runs in a
+    worker thread instead of blocking the event loop.
+    """
+
+    def __init__(self, ttl: int = USER_CACHE_TTL, max_entries: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.backend = InMemoryCacheBackend(max_entries)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_user(self, uid: str) -> dict:
+        """
+        Raises:
+            auth.UserNotFoundError: If there is no user with this uid
+        """
+        return await self._get(f"uid:{uid}", auth.get_user, uid)
+
+    async def get_user_by_email(self, email: str) -> dict:
+        """
+        Raises:
+            auth.UserNotFoundError: If there is no user with this email
+        """
+        return await self._get(f"email:{email.lower()}", auth.get_user_by_email, email)
+
+    async def _get(self, key: str, fetch, argument) -> dict:
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(fetch, argument))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one cancelled request doesn't cancel the fetch for the rest
+        return await asyncio.shield(task)
+
+    async def _fetch(self, fetch, argument) -> dict:
+        user = await asyncio.to_thread(fetch, argument)
+        summary = user_summary(user)
+        await self.set(summary)
+        return summary
+
+    async def set(self, summary: dict):
+        await self.backend.set(f"uid:{summary['uuid']}", summary, self.ttl)
+        if summary['email']:
+            await self.backend.set(f"email:{summary['email'].lower()}", summary, self.ttl)
+
+    async def invalidate(self, uid: str = None, email: str = None):
+        if uid is not None:
+            await self.backend.delete(f"uid:{uid}")
+        if email is not None:
+            await self.backend.delete(f"email:{email.lower()}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "ttl": self.ttl,
+            **self.backend.stats(),
+        }
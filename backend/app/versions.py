@@ -0,0 +1,117 @@
+# app/versions.py
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from firebase_admin import firestore
+from google.api_core.exceptions import Conflict
+
+# One marker document per collection, replaced by every write to it, so a
+# listing can be revalidated with a single read instead of a page scan
+VERSIONS_COLLECTION = "collection_versions"
+
+
+class CollectionVersions:
+    """
+    Version markers for collections, e.g. a user's notes.
+
+    Writers call bump() after writing; readers take the marker's version,
+    read before the data, as the listing's ETag. A marker that isn't there
+    yet is created after the data is read, so it can't vouch for a write
+    the data missed.
+    """
+
+    def __init__(self, store, collection: str = VERSIONS_COLLECTION):
+        self.store = store
+        self.collection = collection
+
+    def _marker(self) -> dict:
+        return {'version': uuid.uuid4().hex, 'updated_at': datetime.now(timezone.utc)}
+
+    async def bump(self, collection: str):
+        await self.store.run(self.store.collection(self.collection).document(collection).set, self._marker())
+
+    async def advance(self, collection: str) -> Tuple[Optional[str], dict]:
+        """
+        bump() in a transaction that also reads the marker it replaces, for
+        a reader keeping its own copy current that needs to tell its own
+        writes from everyone else's (see NoteSearch).
+
+        Returns:
+            tuple: The replaced version, None if there was no marker, and the new marker
+        """
+        return await self.store.run(self._advance, collection)
+
+    def _advance(self, collection: str):
+        marker_ref = self.store.collection(self.collection).document(collection)
+        marker = self._marker()
+
+        @firestore.transactional
+        def advance(transaction):
+            snapshot = marker_ref.get(transaction=transaction)
+            previous = snapshot.to_dict()['version'] if snapshot.exists else None
+            transaction.set(marker_ref, marker)
+            return previous
+
+        return advance(self.store.client.transaction()), marker
+
+    async def get(self, collection: str) -> Optional[dict]:
+        snapshot = await self.store.get(self.collection, collection)
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def create(self, collection: str) -> Optional[dict]:
+        """Create the marker if it's still missing. Returns it, or None if another write got there first."""
+        marker = self._marker()
+        try:
+            await self.store.run(self.store.collection(self.collection).document(collection).create, marker)
+        except Conflict:
+            return None
+        return marker
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value) -> Optional[str]:
+    if not isinstance(value, datetime):
+        return None
+    # Firestore hands back UTC; naive datetimes were stored as UTC too
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(request, etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """
+    Whether the client's copy is current, per If-None-Match, or
+    If-Modified-Since when there is no If-None-Match.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def validator_headers(etag: Optional[str], last_modified: Optional[str]) -> dict:
+    # no-cache: clients may keep the response but must revalidate it each time
+    headers = {'Cache-Control': 'private, no-cache'}
+    if etag is not None:
+        headers['ETag'] = etag
+    if last_modified is not None:
+        headers['Last-Modified'] = last_modified
+    return headers
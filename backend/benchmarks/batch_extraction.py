@@ -0,0 +1,102 @@
+# benchmarks/batch_extraction.py
+"""
+Compare LLM calls, tokens and wall-clock time for extracting events from N
+notes one agent run at a time vs. packed into batched calls.
+
+Run from the backend directory:
+
+    python -m benchmarks.batch_extraction --notes 200 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+# Measure the model calls themselves, not the extraction cache
+os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.agent.batch import build_batches, extract_batch
+from app.agent.get_events_from_data import aoutput_agent_results, build_agent_executor
+from app.agent.pipeline import get_extraction_limiter
+from benchmarks.fakes import FakeChatModel
+
+SENTENCES = [
+    "You have homework due on the 21st of november 2024.",
+    "Team standup moved to Tuesday at 10am.",
+    "Remember to call mom.",
+    "The physics midterm is on March 3rd and covers chapters 1-5.",
+    "Grocery list: eggs, milk, bread.",
+    "Dentist appointment next Friday at 2pm.",
+]
+
+
+def make_notes(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        (str(note_id), " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 6))))
+        for note_id in range(1, count + 1)
+    ]
+
+
+def usage(model: FakeChatModel, elapsed: float, notes: int) -> dict:
+    return {
+        "llm_calls": model.calls,
+        "prompt_tokens": model.prompt_tokens,
+        "completion_tokens": model.completion_tokens,
+        "tokens_per_note": (model.prompt_tokens + model.completion_tokens) / notes,
+        "wall_s": elapsed,
+    }
+
+
+async def unbatched(notes, latency):
+    model = FakeChatModel(latency=latency)
+    agent_executor = build_agent_executor(llm=model)
+    agent_executor.verbose = False
+
+    async def run(text):
+        async with get_extraction_limiter():
+            return await aoutput_agent_results(agent_executor, text)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(text) for _, text in notes))
+    return usage(model, time.perf_counter() - start, len(notes))
+
+
+async def batched(notes, latency):
+    model = FakeChatModel(latency=latency)
+
+    async def run(batch):
+        async with get_extraction_limiter():
+            return await extract_batch(batch, model)
+
+    start = time.perf_counter()
+    results = {}
+    for batch_results in await asyncio.gather(*(run(batch) for batch in build_batches(notes))):
+        results.update(batch_results)
+    assert set(results) == {note_id for note_id, _ in notes}
+    return usage(model, time.perf_counter() - start, len(notes))
+
+
+async def run(args):
+    notes = make_notes(args.notes)
+    return {
+        "notes": args.notes,
+        "llm_latency_s": args.llm_latency,
+        "unbatched": await unbatched(notes, args.llm_latency),
+        "batched": await batched(notes, args.llm_latency),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bulk_notes.py
+"""
+Notes/sec and Firestore RPCs for moving notes in and out of the app on the
+in-memory Firestore fake with per-RPC latency: one create_note call per
+note vs. POST /users/{user_id}/notes/bulk (JSON array and NDJSON), and
+GET /users/{user_id}/notes/export.
+
+Run from the backend directory:
+
+    python -m benchmarks.bulk_notes --notes 10000 --rpc-latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from benchmarks.fakes import install_firebase_stub
+
+
+def notes(count):
+    return [{"title": f"Note {i}", "content": f"Lunch with Sam on Friday, item {i}"} for i in range(count)]
+
+
+async def run(args):
+    import httpx
+
+    db = install_firebase_stub(latency=args.rpc_latency)
+
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {}
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench", timeout=None) as client:
+        async def measure(name, user_id, count, send):
+            rpcs = db.rpcs
+            start = time.perf_counter()
+            await send()
+            elapsed = time.perf_counter() - start
+            stored = len(db.collection(user_id).get())
+            assert stored == count, f"{name}: {stored} of {count} notes stored"
+            results[name] = {
+                "notes": count,
+                "notes_per_s": round(count / elapsed),
+                "firestore_rpcs": db.rpcs - rpcs - 1,  # minus the check above
+            }
+
+        async def one_by_one():
+            for note in notes(args.sequential):
+                response = await client.post("/users/one-by-one/create_notes", params=note)
+                response.raise_for_status()
+
+        async def bulk_json():
+            response = await client.post("/users/bulk-json/notes/bulk", json=notes(args.notes))
+            response.raise_for_status()
+
+        async def bulk_ndjson():
+            async def body():
+                for note in notes(args.notes):
+                    yield (json.dumps(note) + "\n").encode()
+
+            response = await client.post(
+                "/users/bulk-ndjson/notes/bulk",
+                content=body(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            response.raise_for_status()
+
+        await measure("create_note_per_note", "one-by-one", args.sequential, one_by_one)
+        await measure("bulk_json", "bulk-json", args.notes, bulk_json)
+        await measure("bulk_ndjson", "bulk-ndjson", args.notes, bulk_ndjson)
+
+        rpcs = db.rpcs
+        start = time.perf_counter()
+        lines = 0
+        async with client.stream("GET", "/users/bulk-json/notes/export") as response:
+            async for line in response.aiter_lines():
+                lines += bool(line)
+        elapsed = time.perf_counter() - start
+        results["export"] = {
+            "notes": lines,
+            "notes_per_s": round(lines / elapsed),
+            "firestore_rpcs": db.rpcs - rpcs,
+        }
+
+    return {"rpc_latency_s": args.rpc_latency, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--sequential", type=int, default=1000, help="notes created one call at a time")
+    parser.add_argument("--rpc-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# benchmarks/change_feed.py
+"""
+Fan-out and backpressure of the change feed.
+
+In-process: thousands of subscribers spread over a few users drain their
+subscriptions while changes are published; a share of them are slow
+consumers. Reports the cost of publish(), delivery latency, and that slow
+subscribers are reset rather than queueing without bound or slowing the
+others down.
+
+With --http the app is served by uvicorn on the Firestore fake and
+clients hold GET /users/{user_id}/changes streams open over real sockets
+while notes are created through the API, measuring end-to-end latency
+from the write request to each stream.
+
+Run from the backend directory:
+
+    python -m benchmarks.change_feed --subscribers 5000 --users 50 --changes 10000
+    python -m benchmarks.change_feed --http --subscribers 1000 --users 20 --changes 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+
+from benchmarks.common import summarize
+from benchmarks.fakes import install_firebase_stub
+
+
+def event_id(message: str) -> int:
+    return int(message.split("\n", 1)[0][len("id: "):])
+
+
+async def in_process(args):
+    from app.feed import RESET, ChangeFeed
+
+    feed = ChangeFeed(max_subscribers=args.subscribers)
+    published_at = {}
+    latencies = {"fast": [], "slow": []}
+    resets = {"fast": 0, "slow": 0}
+    peak_queue = 0
+
+    async def consume(subscription, kind):
+        nonlocal peak_queue
+        while True:
+            peak_queue = max(peak_queue, len(subscription._queue))
+            message = await subscription.get()
+            if message is RESET:
+                resets[kind] += 1
+                continue
+            latencies[kind].append(time.perf_counter() - published_at[event_id(message)])
+            if kind == "slow":
+                await asyncio.sleep(args.slow_delay)
+
+    tasks = []
+    for index in range(args.subscribers):
+        kind = "slow" if index < args.subscribers * args.slow_share else "fast"
+        subscription = feed.subscribe(f"user-{index % args.users}")
+        tasks.append(asyncio.create_task(consume(subscription, kind)))
+    await asyncio.sleep(0.1)
+
+    publish_times = []
+    start = time.perf_counter()
+    for index in range(args.changes):
+        sent = time.perf_counter()
+        change_id = feed.publish(f"user-{index % args.users}", "note", {"action": "created", "note_id": str(index)})
+        published_at[change_id] = sent
+        publish_times.append(time.perf_counter() - sent)
+        # Let consumers run between changes, as they would between requests
+        await asyncio.sleep(args.interval)
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(0.5)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "subscribers": args.subscribers,
+        "users": args.users,
+        "changes": args.changes,
+        "publish_s": round(elapsed, 3),
+        "publish_call": summarize(publish_times),
+        "fast_delivery": {**summarize(latencies["fast"]), "resets": resets["fast"]},
+        "slow_delivery": {**summarize(latencies["slow"]), "resets": resets["slow"]},
+        "peak_queue": peak_queue,
+        "queue_limit": feed.max_queued,
+        "stats": feed.stats(),
+    }
+
+
+def serve(app):
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def over_http(args):
+    import httpx
+
+    install_firebase_stub()
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.main.change_feed.max_subscribers = args.subscribers
+
+    server, url = serve(app.main.app)
+    sent_at = {}
+    latencies = []
+    received = 0
+    connected = 0
+    all_connected = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        async def listen(index):
+            nonlocal received, connected
+            user = index % args.users
+            # Changes go round-robin over the users
+            expected = len(range(user, args.changes, args.users))
+            async with client.stream("GET", f"/users/user-{user}/changes") as response:
+                connected += 1
+                if connected == args.subscribers:
+                    all_connected.set()
+                seen = 0
+                async for line in response.aiter_lines():
+                    if line.startswith("data: ") and '"title"' in line:
+                        title = json.loads(line[len("data: "):])["title"]
+                        latencies.append(time.perf_counter() - sent_at[title])
+                        received += 1
+                        seen += 1
+                        if seen == expected:
+                            return
+
+        listeners = [asyncio.create_task(listen(index)) for index in range(args.subscribers)]
+        await asyncio.wait_for(all_connected.wait(), 60)
+        # The stream is open once headers arrive; give the server a moment to register every subscriber
+        while app.main.change_feed.stats()["subscribers"] < args.subscribers:
+            await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        for index in range(args.changes):
+            title = f"change-{index}"
+            sent_at[title] = time.perf_counter()
+            response = await client.post(
+                f"/users/user-{index % args.users}/create_notes", params={"title": title, "content": "Lunch on Friday"}
+            )
+            response.raise_for_status()
+        await asyncio.wait_for(asyncio.gather(*listeners), 60)
+        elapsed = time.perf_counter() - start
+
+    server.should_exit = True
+    return {
+        "subscribers": args.subscribers,
+        "users": args.users,
+        "changes": args.changes,
+        "deliveries": received,
+        "wall_s": round(elapsed, 3),
+        "write_to_stream": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--changes", type=int, default=10000)
+    parser.add_argument("--interval", type=float, default=0, help="seconds between changes")
+    parser.add_argument("--slow-share", type=float, default=0.1, help="share of slow subscribers")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="seconds a slow subscriber takes per change")
+    parser.add_argument("--http", action="store_true", help="end to end over SSE instead of in-process")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(over_http(args) if args.http else in_process(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/conditional_gets.py
+"""
+Bytes and Firestore document reads per polling client, with and without
+revalidation: clients poll a user's note list, one note and the event
+list, and another client edits a note every --write-every polls. Plain
+clients re-download everything each time, as the frontend did;
+revalidating clients send back the ETag they got as If-None-Match.
+
+Run from the backend directory:
+
+    python -m benchmarks.conditional_gets --clients 20 --polls 50 --notes 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from benchmarks.fakes import install_firebase_stub, seed_notes
+
+USER_ID = "bench-user"
+
+RESOURCES = [
+    f"/users/{USER_ID}/notes?page_size=100",
+    f"/users/{USER_ID}/get_notes/1",
+    f"/users/{USER_ID}/events?page_size=100",
+]
+
+
+async def poll(client, polls, revalidate, totals):
+    etags = {}
+    for _ in range(polls):
+        for url in RESOURCES:
+            headers = {"If-None-Match": etags[url]} if revalidate and url in etags else {}
+            response = await client.get(url, headers=headers)
+            if response.status_code == 200:
+                totals["bytes"] += len(response.content)
+                etags[url] = response.headers.get("etag")
+            elif response.status_code == 304:
+                totals["not_modified"] += 1
+            else:
+                response.raise_for_status()
+            totals["requests"] += 1
+
+
+async def run(args):
+    import httpx
+
+    db = install_firebase_stub(latency=args.rpc_latency)
+    seed_notes(db, USER_ID, args.notes)
+    for event_id in range(1, args.notes + 1):
+        db.collection(f"{USER_ID}_events").document(str(event_id)).set({
+            'event_id': event_id,
+            'note_id': str(event_id),
+            'content': [{"date": "2025-03-03", "title": "Meeting with the team", "description": "Meeting"}],
+        })
+
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {}
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench", timeout=None) as client:
+        async def writer(polls):
+            for i in range(polls // args.write_every):
+                await asyncio.sleep(args.write_interval)
+                response = await client.put(
+                    f"/users/{USER_ID}/update_notes/{i % args.notes + 1}",
+                    json={"title": f"Edit {i}", "content": "Meeting moved to the 4th of march 2025"},
+                )
+                response.raise_for_status()
+
+        for name, revalidate in (("plain", False), ("revalidating", True)):
+            totals = {"requests": 0, "bytes": 0, "not_modified": 0}
+            reads = db.reads
+            start = time.perf_counter()
+            await asyncio.gather(
+                writer(args.polls),
+                *(poll(client, args.polls, revalidate, totals) for _ in range(args.clients)),
+            )
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                "requests": totals["requests"],
+                "not_modified": totals["not_modified"],
+                "bytes_per_client": totals["bytes"] // args.clients,
+                "firestore_reads_per_client": (db.reads - reads) // args.clients,
+                "wall_s": round(elapsed, 3),
+            }
+
+    return {
+        "clients": args.clients,
+        "polls": args.polls,
+        "notes": args.notes,
+        "write_every": args.write_every,
+        **results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--write-every", type=int, default=10, help="polls per note edit")
+    parser.add_argument("--write-interval", type=float, default=0.05, help="seconds between edits")
+    parser.add_argument("--rpc-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
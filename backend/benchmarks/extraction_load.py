@@ -0,0 +1,87 @@
+# benchmarks/extraction_load.py
+"""
+Load test: keep many event extractions in flight against a slow fake LLM and
+measure the latency of the note CRUD endpoints on the same worker.
+
+Run from the backend directory:
+
+    python -m benchmarks.extraction_load --extractions 50 --llm-latency 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from benchmarks.common import percentile
+from benchmarks.fakes import FakeAgentExecutor, install_firebase_stub, seed_notes
+
+USER_ID = "bench-user"
+
+
+async def crud_loop(client, deadline, latencies):
+    note_id = 1
+    while time.perf_counter() < deadline:
+        for method, url, kwargs in (
+            ("GET", f"/users/{USER_ID}/notes", {}),
+            ("GET", f"/users/{USER_ID}/get_notes/{note_id}", {}),
+            ("PUT", f"/users/{USER_ID}/update_notes/{note_id}", {"json": {"title": "t", "content": "c"}}),
+        ):
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+        note_id = note_id % 10 + 1
+
+
+async def run(args):
+    import httpx
+
+    # Every extraction should reach the fake agent, from a single user
+    os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    db = install_firebase_stub()
+    seed_notes(db, USER_ID, 10)
+
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from app.agent.get_events_from_data import set_agent_executor
+
+    agent = FakeAgentExecutor(latency=args.llm_latency)
+    set_agent_executor(agent)
+
+    latencies = []
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        start = time.perf_counter()
+        extractions = [
+            asyncio.create_task(client.get(f"/event_from_text/{USER_ID}/{i % 10 + 1}"))
+            for i in range(args.extractions)
+        ]
+        # Give the extractions a moment to get in flight before measuring
+        await asyncio.sleep(0.05)
+        await crud_loop(client, time.perf_counter() + args.llm_latency, latencies)
+        responses = await asyncio.gather(*extractions)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "extractions": args.extractions,
+        "llm_latency_s": args.llm_latency,
+        "extraction_errors": sum(r.status_code != 200 for r in responses),
+        "extraction_wall_s": elapsed,
+        "crud_requests": len(latencies),
+        "crud_p50_ms": percentile(latencies, 50) * 1000,
+        "crud_p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--extractions", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
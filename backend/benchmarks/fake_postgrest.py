@@ -0,0 +1,292 @@
+# benchmarks/fake_postgrest.py
+"""
+A small PostgREST stand-in backed by SQLite, enough to run the Supabase
+repositories offline. It understands the parts of the PostgREST API the
+repositories use: eq/neq/gt/gte/lt/lte/like/ilike filters, or=(...) with
+nested and(...), order, limit/offset, single-object responses, insert,
+update and delete, plus the search_user_profiles RPC (prefix full-text
+search only, without the trigram fallback).
+
+Use handle() with httpx.MockTransport, or asgi_app() to serve it over a
+real socket.
+"""
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+import httpx
+
+SCHEMA = """
+CREATE TABLE notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX notes_user_created_id ON notes (user_id, created_at, id);
+
+CREATE TABLE user_profiles (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    full_name TEXT,
+    bio TEXT,
+    avatar_url TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+-- Stands in for the search_vector index of search_user_profiles
+CREATE VIRTUAL TABLE user_profiles_fts USING fts5(username, full_name, content='user_profiles');
+CREATE TRIGGER user_profiles_fts_insert AFTER INSERT ON user_profiles BEGIN
+    INSERT INTO user_profiles_fts (rowid, username, full_name) VALUES (new.rowid, new.username, new.full_name);
+END;
+CREATE TRIGGER user_profiles_fts_delete AFTER DELETE ON user_profiles BEGIN
+    INSERT INTO user_profiles_fts (user_profiles_fts, rowid, username, full_name)
+    VALUES ('delete', old.rowid, old.username, old.full_name);
+END;
+CREATE TRIGGER user_profiles_fts_update AFTER UPDATE ON user_profiles BEGIN
+    INSERT INTO user_profiles_fts (user_profiles_fts, rowid, username, full_name)
+    VALUES ('delete', old.rowid, old.username, old.full_name);
+    INSERT INTO user_profiles_fts (rowid, username, full_name) VALUES (new.rowid, new.username, new.full_name);
+END;
+"""
+
+_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "LIKE",  # SQLite's LIKE is already case-insensitive for ASCII
+}
+_RESERVED = {"select", "order", "limit", "offset", "or", "and", "columns", "on_conflict"}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _column(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Bad column: {name}")
+    return name
+
+
+def _split_top_level(text: str):
+    """Split a PostgREST logic expression on the commas outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _condition(column: str, expression: str, args: list) -> str:
+    operator, _, criteria = expression.partition(".")
+    if operator not in _OPERATORS:
+        raise ValueError(f"Unsupported operator: {operator}")
+    if len(criteria) > 1 and criteria[0] == criteria[-1] == '"':
+        criteria = criteria[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    args.append(criteria.replace("*", "%") if operator in ("like", "ilike") else criteria)
+    return f"{_column(column)} {_OPERATORS[operator]} ?"
+
+
+def _logic(joiner: str, body: str, args: list) -> str:
+    clauses = []
+    for part in _split_top_level(body):
+        if part.startswith(("and(", "or(")):
+            name, _, rest = part.partition("(")
+            clauses.append(_logic(" AND " if name == "and" else " OR ", rest[:-1], args))
+        else:
+            column, _, expression = part.partition(".")
+            clauses.append(_condition(column, expression, args))
+    return "(" + joiner.join(clauses) + ")"
+
+
+class FakePostgrest:
+    def __init__(self):
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    # Seeding helpers
+
+    def insert_rows(self, table: str, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        columns = list(rows[0])
+        with self.lock:
+            self.db.executemany(
+                f"INSERT INTO {_column(table)} ({', '.join(map(_column, columns))}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [tuple(row[column] for column in columns) for row in rows],
+            )
+            self.db.commit()
+
+    # Request handling
+
+    def _where(self, params, args) -> str:
+        clauses = []
+        for key, value in params.multi_items():
+            if key in _RESERVED:
+                if key in ("or", "and"):
+                    clauses.append(_logic(" OR " if key == "or" else " AND ", value[1:-1], args))
+                continue
+            clauses.append(_condition(key, value, args))
+        return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+    def _select(self, table, params):
+        args = []
+        sql = f"SELECT * FROM {table}" + self._where(params, args)
+        if "order" in params:
+            terms = []
+            for term in params["order"].split(","):
+                column, *modifiers = term.split(".")
+                terms.append(_column(column) + (" DESC" if "desc" in modifiers else ""))
+            sql += " ORDER BY " + ", ".join(terms)
+        if "limit" in params or "offset" in params:
+            sql += " LIMIT ? OFFSET ?"
+            args += [int(params.get("limit", -1)), int(params.get("offset", 0))]
+        return [dict(row) for row in self.db.execute(sql, args)]
+
+    def _insert(self, table, body):
+        rows = body if isinstance(body, list) else [body]
+        created = []
+        now = datetime.now().isoformat()
+        for row in rows:
+            row = {"created_at": now, "updated_at": now, **row}
+            if table == "user_profiles":
+                row.setdefault("id", str(uuid.uuid4()))
+            columns = list(row)
+            cursor = self.db.execute(
+                f"INSERT INTO {table} ({', '.join(map(_column, columns))}) VALUES ({', '.join('?' for _ in columns)})",
+                [row[column] for column in columns],
+            )
+            key = row.get("id", cursor.lastrowid)
+            created.append(dict(self.db.execute(f"SELECT * FROM {table} WHERE id = ?", [key]).fetchone()))
+        self.db.commit()
+        return created
+
+    def _update(self, table, params, body):
+        args = []
+        where = self._where(params, args)
+        matched = [row["id"] for row in self.db.execute(f"SELECT id FROM {table}" + where, args)]
+        assignments = ", ".join(f"{_column(column)} = ?" for column in body)
+        for key in matched:
+            self.db.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", [*body.values(), key])
+        self.db.commit()
+        return [dict(self.db.execute(f"SELECT * FROM {table} WHERE id = ?", [key]).fetchone()) for key in matched]
+
+    def _delete(self, table, params):
+        args = []
+        where = self._where(params, args)
+        rows = [dict(row) for row in self.db.execute(f"SELECT * FROM {table}" + where, args)]
+        self.db.execute(f"DELETE FROM {table}" + where, args)
+        self.db.commit()
+        return rows
+
+    def rpc_search_user_profiles(self, params):
+        terms = [term for term in re.split(r"\W+", params["search_query"].lower()) if term]
+        if not terms:
+            return []
+
+        args = [" AND ".join(f'"{term}"*' for term in terms)]
+        sql = (
+            "SELECT p.*, -bm25(user_profiles_fts, 2.0, 1.0) AS search_rank "
+            "FROM user_profiles_fts JOIN user_profiles p ON p.rowid = user_profiles_fts.rowid "
+            "WHERE user_profiles_fts MATCH ?"
+        )
+        if params.get("after_rank") is not None:
+            sql += " AND (search_rank, p.id) < (?, ?)"
+            args += [params["after_rank"], params["after_id"]]
+        sql += " ORDER BY search_rank DESC, p.id DESC LIMIT ?"
+        args.append(params.get("result_limit", 10))
+
+        rows = []
+        for row in self.db.execute(sql, args):
+            row = dict(row)
+            row["rank"] = row.pop("search_rank")
+            rows.append(row)
+        return rows
+
+    def respond(self, method: str, path: str, params, headers, body: bytes):
+        """Answer one PostgREST request; returns (status, JSON-serializable payload)."""
+        self.requests += 1
+        prefix, _, name = path.rstrip("/").rpartition("/")
+        table = _column(name)
+        payload = json.loads(body) if body else None
+        if prefix.endswith("/rpc") and not hasattr(self, f"rpc_{table}"):
+            return 404, {"message": f"Could not find the function {table}", "code": "PGRST202", "hint": None, "details": None}
+
+        try:
+            with self.lock:
+                if prefix.endswith("/rpc"):
+                    rows = getattr(self, f"rpc_{table}")(payload)
+                elif method == "GET":
+                    rows = self._select(table, params)
+                elif method == "POST":
+                    rows = self._insert(table, payload)
+                elif method == "PATCH":
+                    rows = self._update(table, params, payload)
+                elif method == "DELETE":
+                    rows = self._delete(table, params)
+                else:
+                    return 405, {"message": f"Unsupported method {method}"}
+        except (ValueError, sqlite3.Error) as e:
+            return 400, {"message": str(e), "code": "PGRST100", "hint": None, "details": None}
+
+        if "vnd.pgrst.object" in headers.get("accept", ""):
+            if len(rows) != 1:
+                return 406, {
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                    "hint": None,
+                    "details": f"The result contains {len(rows)} rows",
+                }
+            return 200, rows[0]
+        return 201 if method == "POST" else 200, rows
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        status, payload = self.respond(
+            request.method, request.url.path, request.url.params, request.headers, request.content
+        )
+        return httpx.Response(status, json=payload)
+
+    def asgi_app(self):
+        async def app(scope, receive, send):
+            if scope["type"] != "http":
+                return
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+
+            headers = {key.decode().lower(): value.decode() for key, value in scope["headers"]}
+            params = httpx.QueryParams(scope["query_string"].decode())
+            status, payload = self.respond(scope["method"], scope["path"], params, headers, body)
+
+            content = json.dumps(payload).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())],
+            })
+            await send({"type": "http.response.body", "body": content})
+
+        return app
@@ -0,0 +1,613 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for Firebase and the event agent so the app can be imported
+and exercised without credentials or network access.
+
+Call install_firebase_stub() before importing app.main.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+from google.api_core.exceptions import Conflict, NotFound
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, FunctionMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.utils.function_calling import convert_to_openai_function
+
+from app.agent.tokens import count_tokens
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data, update_time=None):
+        self.id = doc_id
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self, transaction=None):
+        self._collection._client._rpc(reads=1)
+        return self._collection._snapshot(self.id)
+
+    def set(self, data, merge=False):
+        self._collection._client._rpc()
+        self._write(data, merge)
+
+    def create(self, data):
+        self._collection._client._rpc()
+        if self.id in self._collection._docs:
+            raise Conflict(f"Document already exists: {self.id}")
+        self._write(data)
+
+    def _write(self, data, merge=False):
+        if merge and self.id in self._collection._docs:
+            self._collection._docs[self.id].update(data)
+        else:
+            self._collection._docs[self.id] = dict(data)
+        self._collection._times[self.id] = self._collection._client._now()
+
+    def update(self, data):
+        self._collection._client._rpc()
+        if self.id not in self._collection._docs:
+            raise NotFound(f"No document to update: {self.id}")
+        self._write(data, merge=True)
+
+    def delete(self):
+        self._collection._client._rpc()
+        self._collection._docs.pop(self.id, None)
+        self._collection._times.pop(self.id, None)
+
+
+class FakeQuery:
+    def __init__(self, collection, order=(), limit=None, start_after=None, fields=None):
+        self._collection = collection
+        self._order = list(order)
+        self._limit = limit
+        self._start_after = start_after
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = {
+            "order": self._order,
+            "limit": self._limit,
+            "start_after": self._start_after,
+            "fields": self._fields,
+            **changes,
+        }
+        return FakeQuery(self._collection, **state)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order=self._order + [(field, direction)])
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, values):
+        if isinstance(values, FakeSnapshot):
+            values = values.to_dict()
+        return self._copy(start_after=values)
+
+    def _snapshots(self):
+        items = list(self._collection._docs.items())
+        for field, direction in reversed(self._order):
+            items.sort(key=lambda item: item[1].get(field), reverse=direction == "DESCENDING")
+        if self._start_after is not None:
+            # Cursors on a single ascending/descending order_by field
+            field, direction = self._order[0]
+            cursor = self._start_after[field]
+            if direction == "DESCENDING":
+                items = [item for item in items if item[1].get(field) < cursor]
+            else:
+                items = [item for item in items if item[1].get(field) > cursor]
+        if self._limit is not None:
+            items = items[:self._limit]
+        snapshots = [self._collection._snapshot(doc_id) for doc_id, _ in items]
+        if self._fields is not None:
+            for snapshot in snapshots:
+                snapshot._data = {field: snapshot._data[field] for field in self._fields if field in snapshot._data}
+        return snapshots
+
+    def get(self, transaction=None):
+        snapshots = self._snapshots()
+        self._collection._client._rpc(reads=max(1, len(snapshots)))
+        return snapshots
+
+    def stream(self):
+        snapshots = self._snapshots()
+        self._collection._client._rpc(reads=max(1, len(snapshots)))
+        yield from snapshots
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client, name):
+        self.name = name
+        self._client = client
+        self._docs = {}
+        self._times = {}
+        super().__init__(self)
+
+    def document(self, doc_id):
+        return FakeDocumentReference(self, str(doc_id))
+
+    def _snapshot(self, doc_id):
+        return FakeSnapshot(doc_id, self._docs.get(doc_id), self._times.get(doc_id))
+
+
+class FakeTransaction:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref, data, merge))
+
+    def commit(self):
+        self._client._rpc()
+        for ref, data, merge in self._writes:
+            ref._write(data, merge)
+        self._writes = []
+
+
+def transactional(fn):
+    """
+    Like firestore.transactional: run fn(transaction) and commit its
+    writes. Transactions on one fake client run one at a time, which is
+    what Firestore's optimistic retries amount to.
+    """
+
+    def run(transaction, *args, **kwargs):
+        with transaction._client._transaction_lock:
+            result = fn(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+
+    return run
+
+
+class FakeFirestoreClient:
+    """
+    In-memory Firestore. Every RPC sleeps for `latency` seconds and is
+    counted in `rpcs`; `reads` counts document reads the way Firestore
+    bills them, at least one per query.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rpcs = 0
+        self.reads = 0
+        self._collections = {}
+        self._transaction_lock = threading.Lock()
+        self._clock = 0
+
+    def _rpc(self, reads=0):
+        self.rpcs += 1
+        self.reads += reads
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _now(self):
+        # Strictly increasing, like the update_time Firestore gives each write
+        self._clock += 1
+        return datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=self._clock)
+
+    def collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def batch(self):
+        # A WriteBatch is a transaction without reads: its writes go out in one commit
+        return FakeTransaction(self)
+
+    def get_all(self, references):
+        references = list(references)
+        self._rpc(reads=len(references))
+        for ref in references:
+            yield ref._collection._snapshot(ref.id)
+
+
+class FakeUserRecord:
+    def __init__(self, uid, email):
+        self.uid = uid
+        self.email = email
+
+
+class FakeListUsersPage:
+    def __init__(self, users, page_token, max_results):
+        self._all = users
+        self._start = int(page_token or 0)
+        self._max_results = max_results
+        self.users = [users[uid] for uid in list(users)[self._start:self._start + max_results]]
+
+    @property
+    def next_page_token(self):
+        end = self._start + self._max_results
+        return str(end) if end < len(self._all) else ""
+
+    @property
+    def has_next_page(self):
+        return bool(self.next_page_token)
+
+    def get_next_page(self):
+        if not self.has_next_page:
+            return None
+        return FakeListUsersPage(self._all, self.next_page_token, self._max_results)
+
+    def iterate_all(self):
+        page = self
+        while page is not None:
+            yield from page.users
+            page = page.get_next_page()
+
+
+def _build_auth_module():
+    auth = types.ModuleType("firebase_admin.auth")
+
+    class UserNotFoundError(Exception):
+        pass
+
+    class EmailAlreadyExistsError(Exception):
+        pass
+
+    users = {}
+
+    def create_user(email, password):
+        if any(user.email == email for user in users.values()):
+            raise EmailAlreadyExistsError(email)
+        record = FakeUserRecord(f"uid-{len(users) + 1}", email)
+        users[record.uid] = record
+        return record
+
+    def get_user(uid):
+        if uid not in users:
+            raise UserNotFoundError(uid)
+        return users[uid]
+
+    def get_user_by_email(email):
+        for user in users.values():
+            if user.email == email:
+                return user
+        raise UserNotFoundError(email)
+
+    def list_users(page_token=None, max_results=1000):
+        return FakeListUsersPage(users, page_token, max_results)
+
+    auth.UserNotFoundError = UserNotFoundError
+    auth.EmailAlreadyExistsError = EmailAlreadyExistsError
+    auth.create_user = create_user
+    auth.get_user = get_user
+    auth.get_user_by_email = get_user_by_email
+    auth.list_users = list_users
+    auth._users = users
+    return auth
+
+
+def install_firebase_stub(latency: float = 0.0):
+    """
+    Register fake firebase_admin modules in sys.modules and fill in the
+    environment app.main reads at import. Returns the fake Firestore client.
+    """
+    for name in ("FIREBASE_PRIVATE_KEY_ID", "FIREBASE_PRIVATE_KEY", "FIREBASE_CLIENT_EMAIL",
+                 "FIREBASE_CLIENT_ID", "FIREBASE_CLIENT_X509_CERT_URL"):
+        os.environ.setdefault(name, "fake")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    db = FakeFirestoreClient(latency)
+
+    firebase_admin = types.ModuleType("firebase_admin")
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+
+    credentials = types.ModuleType("firebase_admin.credentials")
+    credentials.Certificate = lambda cred: cred
+
+    firestore = types.ModuleType("firebase_admin.firestore")
+    firestore.Query = types.SimpleNamespace(ASCENDING="ASCENDING", DESCENDING="DESCENDING")
+    firestore.client = lambda *args, **kwargs: db
+    firestore.transactional = transactional
+
+    auth = _build_auth_module()
+
+    firebase_admin.credentials = credentials
+    firebase_admin.firestore = firestore
+    firebase_admin.auth = auth
+
+    sys.modules["firebase_admin"] = firebase_admin
+    sys.modules["firebase_admin.credentials"] = credentials
+    sys.modules["firebase_admin.firestore"] = firestore
+    sys.modules["firebase_admin.auth"] = auth
+    return db
+
+
+class FakeAgentExecutor:
+    """
+    Stands in for the AgentExecutor: sleeps for `latency` seconds and then
+    returns the same Response payload for every input.
+    """
+
+    def __init__(self, latency: float = 0.0, response: dict = None):
+        self.latency = latency
+        self.calls = 0
+        self.response = response or {
+            "event_date": ["2024-11-21"],
+            "event_title": ["Homework due"],
+            "event_description": ["Homework is due"],
+        }
+
+    def invoke(self, inputs, return_only_outputs=False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return dict(self.response)
+
+    async def ainvoke(self, inputs, return_only_outputs=False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return dict(self.response)
+
+
+def _fake_events(text: str) -> dict:
+    title = " ".join(text.split()[:5])
+    return {
+        "event_date": ["2024-11-21"],
+        "event_title": [title],
+        "event_description": [text[:80]],
+    }
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model that answers OpenAI function calls the way the real
+    model would for the Response and BatchResponse schemas, and counts the
+    calls and tokens it was charged for.
+
+    When `lookup` is a regex and the agent's retriever tool is bound, notes
+    matching it get a retriever call first and Response on the next turn,
+    the way the model was seen to consult Wikipedia for named occasions.
+
+    `token_latency` adds that many seconds per prompt token to `latency`,
+    and prompts over `context_window` tokens fail the way OpenAI rejects
+    them.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    context_window: int = None
+    lookup: str = None
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-openai-functions"
+
+    def bind_functions(self, functions, function_call=None, **kwargs):
+        formatted = [convert_to_openai_function(fn) for fn in functions]
+        if function_call is not None:
+            kwargs["function_call"] = function_call
+        return self.bind(functions=formatted, **kwargs)
+
+    def _respond(self, messages, functions=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        names = [fn["name"] for fn in functions or []]
+
+        if "BatchResponse" in names:
+            name = "BatchResponse"
+            arguments = {"notes": [
+                {"note_id": note_id, **_fake_events(text)}
+                for note_id, text in re.findall(r'<note id="([^"]*)">\n(.*?)\n</note>', prompt, re.S)
+            ]}
+        elif (
+            self.lookup
+            and len(names) > 1
+            and not any(isinstance(message, FunctionMessage) for message in messages)
+            and re.search(self.lookup, str(messages[-1].content), re.I)
+        ):
+            name = names[0]
+            arguments = {"query": re.search(self.lookup, str(messages[-1].content), re.I).group(0)}
+        else:
+            name = "Response"
+            user = [message for message in messages if message.type == "human"][-1]
+            arguments = _fake_events(str(user.content))
+
+        arguments = json.dumps(arguments)
+        prompt_tokens = count_tokens(prompt) + count_tokens(json.dumps(functions or []))
+        completion_tokens = count_tokens(arguments)
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+        message = AIMessage(content="", additional_kwargs={"function_call": {"name": name, "arguments": arguments}})
+        # Reported the way ChatOpenAI does
+        llm_output = {
+            "token_usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            "model_name": "fake-openai",
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output=llm_output)
+
+    def _delay(self, messages) -> float:
+        tokens = count_tokens("\n".join(str(message.content) for message in messages))
+        if self.context_window is not None and tokens > self.context_window:
+            raise ValueError(
+                f"This model's maximum context length is {self.context_window} tokens, "
+                f"however you requested {tokens} tokens"
+            )
+        return self.latency + self.token_latency * tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self._delay(messages)
+        if delay:
+            time.sleep(delay)
+        return self._respond(messages, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self._delay(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(messages, **kwargs)
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that answers from a recording of a real model's responses,
+    so benchmarks see real outputs without calling OpenAI.
+
+    Each response is stored under a hash of the messages and the functions
+    bound for the call. With `record` set to a live model (e.g. ChatOpenAI),
+    calls that aren't in the recording go to it and are added; call save()
+    afterwards. Otherwise they go to `fallback`, or fail when there is none.
+    Replayed responses take `latency` seconds.
+    """
+
+    path: str
+    latency: float = 0.0
+    record: BaseChatModel = None
+    fallback: BaseChatModel = None
+    responses: dict = None
+    calls: int = 0
+    misses: int = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.responses is None:
+            try:
+                with open(self.path) as f:
+                    self.responses = json.load(f)
+            except FileNotFoundError:
+                self.responses = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_functions(self, functions, function_call=None, **kwargs):
+        formatted = [convert_to_openai_function(fn) for fn in functions]
+        if function_call is not None:
+            kwargs["function_call"] = function_call
+        return self.bind(functions=formatted, **kwargs)
+
+    @staticmethod
+    def key(messages, **kwargs) -> str:
+        payload = [
+            [[message.type, message.content, message.additional_kwargs] for message in messages],
+            kwargs.get("functions"),
+            kwargs.get("function_call"),
+        ]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.responses, f, indent=1, sort_keys=True)
+
+    def _replay(self, key) -> ChatResult:
+        self.calls += 1
+        response = self.responses[key]
+        message = AIMessage(content=response["content"], additional_kwargs=response["additional_kwargs"])
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output=response["llm_output"])
+
+    def _store(self, key, result: ChatResult) -> ChatResult:
+        message = result.generations[0].message
+        self.responses[key] = {
+            "content": message.content,
+            "additional_kwargs": message.additional_kwargs,
+            "llm_output": result.llm_output,
+        }
+        return result
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self.key(messages, **kwargs)
+        if key in self.responses:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._replay(key)
+
+        self.misses += 1
+        if self.record is not None:
+            return self._store(key, self.record._generate(messages, stop=stop, **kwargs))
+        if self.fallback is not None:
+            return self.fallback._generate(messages, stop=stop, **kwargs)
+        raise KeyError(f"No recorded response for this prompt in {self.path}")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self.key(messages, **kwargs)
+        if key in self.responses:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self._replay(key)
+
+        self.misses += 1
+        if self.record is not None:
+            return self._store(key, await self.record._agenerate(messages, stop=stop, **kwargs))
+        if self.fallback is not None:
+            return await self.fallback._agenerate(messages, stop=stop, **kwargs)
+        raise KeyError(f"No recorded response for this prompt in {self.path}")
+
+
+class FakeRetriever(BaseRetriever):
+    """Stands in for WikipediaRetriever: sleeps for `latency` seconds and returns one page."""
+
+    latency: float = 0.0
+    calls: int = 0
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [Document(page_content=f"{query} is an annual occasion. " * 20, metadata={"title": query})]
+
+    async def _aget_relevant_documents(self, query, *, run_manager=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [Document(page_content=f"{query} is an annual occasion. " * 20, metadata={"title": query})]
+
+
+def seed_users(count: int):
+    """Add count users to the fake Firebase Auth installed by install_firebase_stub()."""
+    users = sys.modules["firebase_admin.auth"]._users
+    for index in range(len(users) + 1, len(users) + count + 1):
+        users[f"uid-{index}"] = FakeUserRecord(f"uid-{index}", f"user{index}@example.com")
+
+
+def seed_notes(db, user_id: str, count: int, content: str = "Meeting with the team on the 3rd of march 2025"):
+    collection = db.collection(user_id)
+    for note_id in range(1, count + 1):
+        collection.document(str(note_id)).set({
+            'note_id': note_id,
+            'title': f"Note {note_id}",
+            'content': content,
+            'created_at': datetime.now(),
+            'updated_at': datetime.now(),
+        })
@@ -0,0 +1,98 @@
+# benchmarks/firestore_throughput.py
+"""
+Throughput of the note endpoints against the in-memory Firestore fake with
+per-RPC latency, with Firestore calls run in the thread pool vs. inline on
+the event loop (FIRESTORE_THREADS=0, how the routes used to behave).
+
+Run from the backend directory:
+
+    python -m benchmarks.firestore_throughput --clients 50 --requests 20 --rpc-latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile
+from benchmarks.fakes import install_firebase_stub, seed_notes
+
+USER_ID = "bench-user"
+
+
+async def client_loop(client, client_id, requests, latencies):
+    for i in range(requests):
+        note_id = (client_id + i) % 50 + 1
+        for method, url, kwargs in (
+            ("GET", f"/users/{USER_ID}/get_notes/{note_id}", {}),
+            ("PUT", f"/users/{USER_ID}/update_notes/{note_id}", {"json": {"title": "t", "content": "c"}}),
+            ("POST", f"/users/{USER_ID}/create_notes", {"params": {"title": "t", "content": "c"}}),
+            ("GET", f"/users/{USER_ID}/notes", {}),
+        ):
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+
+async def run(args):
+    import httpx
+
+    db = install_firebase_stub(latency=args.rpc_latency)
+    seed_notes(db, USER_ID, 50)
+
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    latencies = []
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, client_id, args.requests, latencies)
+            for client_id in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "firestore_threads": int(os.environ.get("FIRESTORE_THREADS", "32")),
+        "requests": len(latencies),
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rpc-latency", type=float, default=0.005)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args))))
+        return
+
+    # Each mode in a fresh interpreter, FIRESTORE_THREADS is read at import
+    results = []
+    for threads in ("0", "32"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.firestore_throughput", "--child",
+             "--clients", str(args.clients), "--requests", str(args.requests),
+             "--rpc-latency", str(args.rpc_latency)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "FIRESTORE_THREADS": threads},
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({"rpc_latency_s": args.rpc_latency, "runs": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
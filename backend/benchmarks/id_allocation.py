@@ -0,0 +1,120 @@
+# benchmarks/id_allocation.py
+"""
+Fire concurrent note creates against the in-memory Firestore fake and check
+that every note gets a unique id.
+
+Part one sends parallel create_note requests to one app worker. Part two
+simulates several workers, each a thread with its own event loop and
+allocator, and compares them with the old max-query allocation, which
+hands out duplicate ids under the same load.
+
+Run from the backend directory:
+
+    python -m benchmarks.id_allocation --creates 500 --workers 4 --rpc-latency 0.002
+"""
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.fakes import install_firebase_stub
+
+USER_ID = "bench-user"
+
+
+def legacy_next_id(db, user_id):
+    notes = db.collection(user_id).order_by('note_id', direction="DESCENDING").limit(1).get()
+    return notes[0].to_dict()['note_id'] + 1 if len(notes) else 1
+
+
+def write_note(db, user_id, note_id):
+    db.collection(user_id).document(str(note_id)).set({
+        'note_id': note_id,
+        'title': 't',
+        'content': 'c',
+        'created_at': datetime.now(),
+        'updated_at': datetime.now(),
+    })
+
+
+async def single_worker(db, creates):
+    import httpx
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    rpcs = db.rpcs
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post(f"/users/{USER_ID}/create_notes", params={"title": "t", "content": "c"})
+            for _ in range(creates)
+        ))
+        elapsed = time.perf_counter() - start
+
+    ids = [response.json()['note_id'] for response in responses]
+    return {
+        "creates": creates,
+        "unique_ids": len(set(ids)),
+        "stored_notes": len(db.collection(USER_ID).get()),
+        "firestore_rpcs_per_create": (db.rpcs - rpcs) / creates,
+        "creates_per_s": creates / elapsed,
+    }
+
+
+def multi_worker(db, creates, workers, legacy):
+    from app.db import AsyncFirestore
+    from app.ids import IdAllocator
+
+    user_id = f"{USER_ID}-{'legacy' if legacy else 'allocator'}"
+    ids = []
+
+    def worker():
+        allocator = IdAllocator(AsyncFirestore(db))
+
+        async def create():
+            note_id = legacy_next_id(db, user_id) if legacy else await allocator.next_id(user_id, 'note_id')
+            write_note(db, user_id, note_id)
+            ids.append(note_id)
+
+        async def run():
+            await asyncio.gather(*(create() for _ in range(creates // workers)))
+
+        asyncio.run(run())
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "creates": len(ids),
+        "unique_ids": len(set(ids)),
+        "stored_notes": len(db.collection(user_id).get()),
+        "creates_per_s": len(ids) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--creates", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpc-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    db = install_firebase_stub(latency=args.rpc_latency)
+    result = {
+        "single_worker": asyncio.run(single_worker(db, args.creates)),
+        "multi_worker_allocator": multi_worker(db, args.creates, args.workers, legacy=False),
+        "multi_worker_legacy_max_query": multi_worker(db, args.creates, args.workers, legacy=True),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
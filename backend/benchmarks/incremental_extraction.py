@@ -0,0 +1,109 @@
+# benchmarks/incremental_extraction.py
+"""
+LLM calls, tokens and latency of re-extracting events after a one
+paragraph edit to a long note: create_event_from_note, which only sends
+changed chunks, vs. sending the whole note through the agent again, as
+it used to.
+
+Run from the backend directory:
+
+    python -m benchmarks.incremental_extraction --paragraphs 40 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+# Measure the model calls themselves, not the extraction cache or rate limits
+os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from benchmarks.batch_extraction import SENTENCES
+from benchmarks.fakes import FakeChatModel, install_firebase_stub
+
+USER_ID = "bench-user"
+
+
+def make_note(paragraphs: int) -> list:
+    return [
+        " ".join(SENTENCES[(index + offset) % len(SENTENCES)] for offset in range(4)) + f" (item {index})"
+        for index in range(paragraphs)
+    ]
+
+
+def usage(model: FakeChatModel, calls: int, tokens: int, elapsed: float) -> dict:
+    return {
+        "llm_calls": model.calls - calls,
+        "tokens": model.prompt_tokens + model.completion_tokens - tokens,
+        "wall_s": round(elapsed, 3),
+    }
+
+
+async def run(args):
+    import httpx
+
+    install_firebase_stub()
+
+    import app.main
+    from app.agent.get_events_from_data import aoutput_agent_results, build_agent_executor, set_agent_executor
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    model = FakeChatModel(latency=args.llm_latency)
+    agent_executor = build_agent_executor(llm=model)
+    agent_executor.verbose = False
+    set_agent_executor(agent_executor)
+
+    paragraphs = make_note(args.paragraphs)
+    edited = list(paragraphs)
+    edited[len(edited) // 2] = "Dentist appointment moved to next Monday at 9am."
+
+    async def measure(fn):
+        calls, tokens = model.calls, model.prompt_tokens + model.completion_tokens
+        start = time.perf_counter()
+        result = await fn()
+        return usage(model, calls, tokens, time.perf_counter() - start), result
+
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench", timeout=None) as client:
+        response = await client.post(
+            f"/users/{USER_ID}/create_notes",
+            params={"title": "Long note", "content": "\n\n".join(paragraphs)},
+        )
+        note_id = response.json()['note_id']
+
+        async def extract():
+            response = await client.post(f"/users/{USER_ID}/create_event_from_note/{note_id}")
+            response.raise_for_status()
+            return response.json()
+
+        first, _ = await measure(extract)
+
+        await client.put(
+            f"/users/{USER_ID}/update_notes/{note_id}",
+            json={"title": "Long note", "content": "\n\n".join(edited)},
+        )
+        incremental, result = await measure(extract)
+
+    whole_note, _ = await measure(lambda: aoutput_agent_results(agent_executor, "\n\n".join(edited)))
+
+    return {
+        "paragraphs": args.paragraphs,
+        "chunks_reextracted": result['extracted_chunks'],
+        "first_extraction": first,
+        "after_edit_incremental": incremental,
+        "after_edit_whole_note": whole_note,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/keyset_pagination.py
+"""
+Latency by page depth for offset pagination (BaseRepository._paginate_query,
+how get_user_notes used to page) vs. keyset pagination on (created_at, id),
+over one user's notes in the SQLite-backed PostgREST stand-in.
+
+Run from the backend directory:
+
+    python -m benchmarks.keyset_pagination --notes 1000000 --page-size 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.repositories import USER_ID
+
+START = datetime(2024, 1, 1)
+
+
+def seed(fake, notes):
+    batch = 50000
+    for offset in range(0, notes, batch):
+        fake.insert_rows("notes", (
+            {
+                "user_id": str(USER_ID),
+                "title": f"Note {i}",
+                "content": "Lunch with Sam on Friday",
+                "created_at": (START + timedelta(seconds=i)).isoformat(),
+                "updated_at": (START + timedelta(seconds=i)).isoformat(),
+            }
+            for i in range(offset, min(offset + batch, notes))
+        ))
+
+
+async def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+async def run(args):
+    from app.repositories.base import encode_cursor
+    from app.repositories.client import create_postgrest_client
+    from app.repositories.note import NoteRepository
+
+    fake = FakePostgrest()
+    start = time.perf_counter()
+    seed(fake, args.notes)
+    seed_s = time.perf_counter() - start
+
+    client = create_postgrest_client(transport=httpx.MockTransport(fake.handle))
+    notes = NoteRepository(client)
+
+    async def offset_page(page):
+        query = notes.supabase.table(notes.table)\
+            .select("*")\
+            .eq('user_id', str(USER_ID))\
+            .order('created_at', desc=True)\
+            .order('id', desc=True)
+        query = await notes._paginate_query(query, page, args.page_size)
+        return [row['id'] for row in (await query.execute()).data]
+
+    async def keyset_page(page):
+        cursor = None
+        if page > 1:
+            # The last note of the previous page; note i has id i + 1 and is
+            # created i seconds after START, newest first
+            i = args.notes - (page - 1) * args.page_size
+            cursor = encode_cursor((START + timedelta(seconds=i)).isoformat(), i + 1)
+        result = await notes.get_user_notes(USER_ID, cursor, args.page_size)
+        return [note.id for note in result['items']]
+
+    depths = [1]
+    while depths[-1] * 10 * args.page_size <= args.notes:
+        depths.append(depths[-1] * 10)
+
+    pages = []
+    for page in depths:
+        offset_s, offset_ids = await timed(lambda: offset_page(page), args.repeat)
+        keyset_s, keyset_ids = await timed(lambda: keyset_page(page), args.repeat)
+        assert offset_ids == keyset_ids, f"page {page} differs"
+        pages.append({
+            "page": page,
+            "offset_ms": round(offset_s * 1000, 3),
+            "keyset_ms": round(keyset_s * 1000, 3),
+        })
+
+    await client.aclose()
+    return {"notes": args.notes, "page_size": args.page_size, "seed_s": round(seed_s, 1), "pages": pages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
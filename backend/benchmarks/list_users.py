@@ -0,0 +1,109 @@
+# benchmarks/list_users.py
+"""
+List every user of a large fake Firebase Auth backend and compare peak
+memory for collecting all pages into one JSON list vs. streaming the
+NDJSON listing of GET /users/?stream=true.
+
+The ASGI app is driven directly and response chunks are discarded as they
+arrive, so the memory figures are the server's alone.
+
+Run from the backend directory:
+
+    python -m benchmarks.list_users --users 100000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+
+from benchmarks.fakes import install_firebase_stub, seed_users
+
+
+async def drive(app, path, query_string=b""):
+    """Send one GET through the ASGI app and count the body bytes it streams back."""
+    received = {"status": None, "bytes": 0, "lines": 0}
+    requested = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client stays connected until the response is done
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            received["bytes"] += len(body)
+            received["lines"] += body.count(b"\n")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "headers": [],
+        "client": ("bench", 1),
+        "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return received
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args()
+
+    install_firebase_stub()
+    seed_users(args.users)
+
+    import app.main
+    from firebase_admin import auth
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    def collect_all():
+        # What a non-streaming handler has to do to return everyone
+        users = [{'uuid': user.uid, 'email': user.email} for user in auth.list_users().iterate_all()]
+        return {"users": len(users), "bytes": len(json.dumps(users))}
+
+    def stream_all():
+        received = asyncio.run(drive(app.main.app, "/users/", b"stream=true"))
+        return {"users": received["lines"], "bytes": received["bytes"]}
+
+    results = {}
+    for name, fn in (("collect_all_pages", collect_all), ("stream_ndjson", stream_all)):
+        result, elapsed, peak = measure(fn)
+        results[name] = {
+            **result,
+            "wall_s": elapsed,
+            "users_per_s": result["users"] / elapsed,
+            "peak_memory_mb": peak / 1024 / 1024,
+        }
+
+    print(json.dumps({"users": args.users, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# benchmarks/load.py
+"""
+Load driver for the whole API, fully offline: the app runs in-process on
+the in-memory Firestore and Firebase Auth fakes and is driven through
+httpx over ASGI with a fixed, seeded mix of requests. Reports throughput
+and p50/p95/p99 latency per endpoint as JSON, tagged with the git
+revision, so results of different commits can be compared.
+
+The event agent uses FakeChatModel, or with --recording the responses a
+real model gave, replayed with --llm-latency (see ReplayChatModel). To
+record them, run once with --record and OPENAI_API_KEY set.
+
+Run from the backend directory:
+
+    python -m benchmarks.load --requests 5000 --concurrency 50 --output before.json
+    python -m benchmarks.load --requests 5000 --concurrency 50 --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime
+
+# Every extraction should reach the model unless asked otherwise
+os.environ.setdefault("EXTRACTION_CACHE_BACKEND", "none")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.batch_extraction import SENTENCES
+from benchmarks.common import environment, summarize
+from benchmarks.fakes import FakeChatModel, ReplayChatModel, install_firebase_stub, seed_users
+
+SEARCH_TERMS = ["homework", "standup", "midterm", "dentist", "grocery", "mom", "chap"]
+
+# name, weight, method, path, keyword arguments for the request
+ENDPOINTS = [
+    ("get_note", 30, "GET", "/users/{user}/get_notes/{note}", {}),
+    ("list_notes", 15, "GET", "/users/{user}/notes", {}),
+    ("create_note", 10, "POST", "/users/{user}/create_notes", {"params": {"title": "Load", "content": "{text}"}}),
+    ("update_note", 10, "PUT", "/users/{user}/update_notes/{note}", {"json": {"title": "Load", "content": "{text}"}}),
+    ("search_notes", 10, "GET", "/users/{user}/notes/search", {"params": {"q": "{term}"}}),
+    ("get_user", 10, "GET", "/users/{uid}", {}),
+    ("list_events", 5, "GET", "/users/{user}/events", {}),
+    ("extract_events", 5, "GET", "/event_from_text/{user}/{note}", {}),
+]
+
+
+def fill(value, values):
+    if isinstance(value, str):
+        return value.format(**values)
+    if isinstance(value, dict):
+        return {key: fill(item, values) for key, item in value.items()}
+    return value
+
+
+def plan(args) -> list:
+    """The requests to send, the same list for the same arguments."""
+    rng = random.Random(args.seed)
+    weights = [endpoint[1] for endpoint in ENDPOINTS]
+
+    requests = []
+    for _ in range(args.requests):
+        name, _, method, path, kwargs = rng.choices(ENDPOINTS, weights)[0]
+        values = {
+            "user": f"load-user-{rng.randrange(args.users)}",
+            "uid": f"uid-{rng.randrange(args.users) + 1}",
+            "note": rng.randrange(args.notes) + 1,
+            "text": " ".join(rng.sample(SENTENCES, 2)),
+            "term": rng.choice(SEARCH_TERMS),
+        }
+        requests.append((name, method, fill(path, values), fill(kwargs, values)))
+    return requests
+
+
+def seed(db, args):
+    rng = random.Random(args.seed)
+    for user in range(args.users):
+        collection = db.collection(f"load-user-{user}")
+        for note_id in range(1, args.notes + 1):
+            collection.document(str(note_id)).set({
+                'note_id': note_id,
+                'title': f"Note {note_id}",
+                'content': " ".join(rng.sample(SENTENCES, 3)),
+                'created_at': datetime(2025, 1, 1),
+                'updated_at': datetime(2025, 1, 1),
+            })
+    seed_users(args.users)
+
+
+def chat_model(args):
+    fake = FakeChatModel(latency=args.llm_latency)
+    if args.recording is None:
+        return fake
+    if args.record:
+        from langchain_openai import ChatOpenAI
+        from app.agent.get_events_from_data import MODEL_NAME
+        return ReplayChatModel(path=args.recording, record=ChatOpenAI(model=MODEL_NAME, temperature=0))
+    return ReplayChatModel(path=args.recording, latency=args.llm_latency, fallback=fake)
+
+
+def compare(result: dict, baseline: dict) -> dict:
+    """Ratios of this run to a baseline run, above 1 means this run is higher."""
+    changes = {}
+    for name, current in result["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if not previous or not previous.get("count") or not current.get("count"):
+            continue
+        changes[name] = {
+            key: round(current[key] / previous[key], 3)
+            for key in ("requests_per_s", "p50_ms", "p95_ms", "p99_ms") if previous[key]
+        }
+    return {"revision": baseline["environment"]["revision"], "ratios": changes}
+
+
+async def run(args):
+    import httpx
+
+    db = install_firebase_stub(latency=args.rpc_latency)
+    seed(db, args)
+
+    import app.main
+    from app.agent.get_events_from_data import build_agent_executor, set_agent_executor
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    model = chat_model(args)
+    agent_executor = build_agent_executor(llm=model)
+    agent_executor.verbose = False
+    set_agent_executor(agent_executor)
+
+    requests = plan(args)
+    queue = iter(requests)
+    latencies = {name: [] for name, *_ in ENDPOINTS}
+    errors = {name: 0 for name, *_ in ENDPOINTS}
+
+    async def worker(client):
+        for name, method, url, kwargs in queue:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if args.record:
+        model.save()
+
+    return {
+        "environment": environment(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "wall_s": round(elapsed, 3),
+        "requests_per_s": round(len(requests) / elapsed, 1),
+        "endpoints": {
+            name: {
+                "requests_per_s": round(len(samples) / elapsed, 1),
+                "errors": errors[name],
+                **summarize(samples),
+            }
+            for name, samples in latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--notes", type=int, default=50, help="notes seeded per user")
+    parser.add_argument("--rpc-latency", type=float, default=0.002, help="seconds per Firestore call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per model call")
+    parser.add_argument("--recording", help="JSON file of recorded model responses to replay")
+    parser.add_argument("--record", action="store_true", help="call OpenAI for prompts missing from --recording")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the result to this file")
+    parser.add_argument("--baseline", help="result file of an earlier run to compare against")
+    args = parser.parse_args()
+    if args.record and args.recording is None:
+        parser.error("--record needs --recording")
+
+    result = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["baseline"] = compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
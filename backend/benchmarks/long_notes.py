@@ -0,0 +1,91 @@
+# benchmarks/long_notes.py
+"""
+Latency and outcome of extracting events from one very long note: a
+single agent run over the whole note, as output_agent_results did, vs.
+extract_events, which splits notes over LONG_TEXT_TOKENS into overlapping
+chunks, extracts them concurrently and merges their events.
+
+The model's latency grows with the prompt (--token-latency) and prompts
+over --context-window tokens fail, as they do against OpenAI.
+
+Run from the backend directory:
+
+    python -m benchmarks.long_notes --sentences 2000 --token-latency 0.0002 --context-window 16000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# Measure the model calls themselves, not the extraction cache
+os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.agent.chunking import LONG_TEXT_TOKENS, split_text
+from app.agent.get_events_from_data import aoutput_agent_results, build_agent_executor, set_agent_executor
+from app.agent.pipeline import extract_events
+from app.agent.tokens import count_tokens
+from benchmarks.batch_extraction import SENTENCES
+from benchmarks.fakes import FakeChatModel
+
+
+def make_note(sentences: int) -> str:
+    return " ".join(f"{SENTENCES[index % len(SENTENCES)]}" for index in range(sentences))
+
+
+async def measure(model: FakeChatModel, extract):
+    start = time.perf_counter()
+    events = await extract()
+    return {
+        "llm_calls": model.calls,
+        "prompt_tokens": model.prompt_tokens,
+        "wall_s": round(time.perf_counter() - start, 3),
+        "failed": not isinstance(events, list),
+        "events": len(events) if isinstance(events, list) else 0,
+    }
+
+
+async def run(args):
+    note = make_note(args.sentences)
+
+    def model():
+        return FakeChatModel(
+            latency=args.llm_latency, token_latency=args.token_latency, context_window=args.context_window
+        )
+
+    single_model = model()
+    agent_executor = build_agent_executor(llm=single_model)
+    agent_executor.verbose = False
+    single = await measure(single_model, lambda: aoutput_agent_results(agent_executor, note))
+
+    chunked_model = model()
+    agent_executor = build_agent_executor(llm=chunked_model)
+    agent_executor.verbose = False
+    set_agent_executor(agent_executor)
+    chunked = await measure(chunked_model, lambda: extract_events(note, "agent"))
+
+    chunks = split_text(note)
+    return {
+        "note_tokens": count_tokens(note),
+        "long_text_tokens": LONG_TEXT_TOKENS,
+        "chunks": len(chunks),
+        "duplicates_merged": len(chunks) - chunked["events"],
+        "single_call": single,
+        "map_reduce": chunked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.0002)
+    parser.add_argument("--context-window", type=int, default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/metrics_overhead.py
+"""
+Cost of the /metrics instrumentation: requests/sec of a cheap note read
+and of event extraction against the fake chat model, each in a fresh
+worker with METRICS_ENABLED on and off. The settings alternate for
+--runs rounds and the best round of each is kept, which filters out
+noise from the rest of the machine. Also prints a sample of the metrics
+the instrumented run exposed.
+
+Run from the backend directory:
+
+    python -m benchmarks.metrics_overhead --requests 5000 --extractions 500 --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Executed in a fresh interpreter per setting, METRICS_ENABLED is read at import
+CHILD = r"""
+import asyncio, json, logging, os, sys, time
+os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+from benchmarks.fakes import FakeChatModel, install_firebase_stub, seed_notes
+
+requests, extractions = int(sys.argv[1]), int(sys.argv[2])
+db = install_firebase_stub()
+seed_notes(db, "bench-user", 10)
+
+import httpx
+import app.main
+from app.agent.get_events_from_data import build_agent_executor, set_agent_executor
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+agent_executor = build_agent_executor(llm=FakeChatModel())
+agent_executor.verbose = False
+set_agent_executor(agent_executor)
+
+async def main():
+    result = {}
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        for name, url, count in (
+            ("get_note", "/users/bench-user/get_notes/1", requests),
+            ("event_from_text", "/event_from_text/bench-user/1", extractions),
+        ):
+            start = time.perf_counter()
+            for _ in range(count):
+                (await client.get(url)).raise_for_status()
+            result[name + "_per_s"] = round(count / (time.perf_counter() - start))
+
+        response = await client.get("/metrics")
+        result["metrics_status"] = response.status_code
+        if response.status_code == 200:
+            result["sample"] = [
+                line for line in response.text.splitlines()
+                if line.startswith(("http_request_duration_seconds_count", "firestore_rpcs_total",
+                                    "llm_tokens_total", "extraction_llm_calls_sum", "cache_lookups_total"))
+            ]
+    print(json.dumps(result))
+
+asyncio.run(main())
+"""
+
+
+def run_once(enabled: bool, args) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(args.requests), str(args.extractions)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "METRICS_ENABLED": "true" if enabled else "false"},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--extractions", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds = {False: [], True: []}
+    for _ in range(args.runs):
+        for enabled in (False, True):
+            rounds[enabled].append(run_once(enabled, args))
+
+    def best(results):
+        return {key: max(result[key] for result in results) for key in ("get_note_per_s", "event_from_text_per_s")}
+
+    print(json.dumps({
+        "disabled": best(rounds[False]),
+        "enabled": best(rounds[True]),
+        "sample": rounds[True][-1]["sample"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/note_search.py
+"""
+Index build time, query latency and index size of the note search index
+for one user with many notes, through GET /users/{user_id}/notes/search on
+the in-memory Firestore fake. Also times the incremental update a note
+create makes to the loaded index.
+
+Run from the backend directory:
+
+    python -m benchmarks.note_search --notes 50000 --queries 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import string
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.common import percentile
+from benchmarks.fakes import install_firebase_stub
+
+USER_ID = "bench-user"
+
+
+def vocabulary(rng, size):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(size)]
+
+
+def seed(db, rng, words, weights, notes, words_per_note):
+    collection = db.collection(USER_ID)
+    for note_id in range(1, notes + 1):
+        collection.document(str(note_id)).set({
+            'note_id': note_id,
+            'title': " ".join(rng.choices(words, weights, k=3)),
+            'content': " ".join(rng.choices(words, weights, k=words_per_note)),
+            'created_at': datetime.now(),
+            'updated_at': datetime.now(),
+        })
+
+
+async def run(args):
+    import httpx
+
+    rng = random.Random(0)
+    words = vocabulary(rng, args.vocabulary)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]  # Zipf-like
+
+    db = install_firebase_stub()
+    seed(db, rng, words, weights, args.notes, args.words_per_note)
+
+    import app.main
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        async def search(q, **params):
+            start = time.perf_counter()
+            response = await client.get(f"/users/{USER_ID}/notes/search", params={"q": q, **params})
+            response.raise_for_status()
+            return time.perf_counter() - start, response.json()['items']
+
+        # The first search builds the index
+        build_s, _ = await search(words[0])
+
+        latencies = {"rare_term": [], "common_term": [], "two_terms": [], "prefix": []}
+        for _ in range(args.queries):
+            a, b = rng.choices(words, k=2)
+            latencies["rare_term"].append((await search(a, prefix="false"))[0])
+            latencies["common_term"].append((await search(rng.choice(words[:10]), prefix="false"))[0])
+            latencies["two_terms"].append((await search(f"{a} {b}", prefix="false"))[0])
+            latencies["prefix"].append((await search(a[:3]))[0])
+
+        # Incremental update: a created note is searchable right away
+        marker = "zzbenchmarkmarker"
+        response = await client.post(f"/users/{USER_ID}/create_notes", params={"title": "new", "content": marker})
+        response.raise_for_status()
+        _, found = await search(marker, prefix="false")
+        assert [note['note_id'] for note in found] == [response.json()['note_id']]
+
+        start = time.perf_counter()
+        for note_id in range(1, 1001):
+            app.main.note_search.note_added(USER_ID, str(note_id), "updated", " ".join(rng.choices(words, k=30)))
+        update_us = (time.perf_counter() - start) / 1000 * 1e6
+
+        stats = app.main.note_search._indexes[USER_ID].stats()
+
+    # Peak memory of building the same index outside the app
+    docs = db.collection(USER_ID).get()
+    tracemalloc.start()
+    app.main.note_search._index_docs(docs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "notes": args.notes,
+        "index_build_s": round(build_s, 2),
+        "index_build_peak_mb": round(peak / 1e6, 1),
+        "index": stats,
+        "query_ms": {
+            name: {
+                "p50": round(percentile(samples, 50) * 1000, 2),
+                "p99": round(percentile(samples, 99) * 1000, 2),
+            }
+            for name, samples in latencies.items()
+        },
+        "note_update_us": round(update_us, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--words-per-note", type=int, default=30)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
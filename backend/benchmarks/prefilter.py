@@ -0,0 +1,141 @@
+# benchmarks/prefilter.py
+"""
+Precision/recall of the temporal-expression pre-filter on a labelled corpus
+of notes, and its throughput in notes/sec on a single core.
+
+Run from the backend directory:
+
+    python -m benchmarks.prefilter --repeat 2000
+"""
+import argparse
+import json
+import time
+
+from app.agent.prefilter import has_temporal_expression
+
+# (note, contains a date or time worth extracting)
+CORPUS = [
+    ("You have homework due on the 21st of november 2024 and a test on the 22nd of november 2024", True),
+    ("I am a cool guy", False),
+    ("Dentist appointment next Friday at 2pm", True),
+    ("Team standup moved to Tuesday at 10am", True),
+    ("Remember to call mom", False),
+    ("Physics midterm on March 3rd, covers chapters 1-5", True),
+    ("Grocery list: eggs, milk, bread, butter", False),
+    ("Project kickoff 2025-01-15", True),
+    ("Flight leaves 12/24 at 6:45 am", True),
+    ("Ideas for the blog: productivity, habits, reading", False),
+    ("Rent is due on the 1st", True),
+    ("Submit the report by tomorrow", True),
+    ("Book club meets every week at Sam's place", True),
+    ("Read chapter four of the textbook", False),
+    ("Doctor said to rest in 3 days and come back", True),
+    ("Quote: the only way out is through", False),
+    ("Birthday party Saturday night", True),
+    ("Interview with Acme on Oct 7", True),
+    ("Buy a new charger for the laptop", False),
+    ("Final exam 14:00 in room 204", True),
+    ("Password hints are in the other notebook", False),
+    ("Parent teacher conference this month, date TBD", True),
+    ("Workout plan: squats, push-ups, plank", False),
+    ("Concert tickets go on sale at noon", True),
+    ("Thesis draft due end of semester", True),
+    ("Call the landlord about the leaking sink", False),
+    ("Vacation from july 3 to july 10", True),
+    ("Recipe: 2 cups flour, 1 cup sugar, 3 eggs", False),
+    ("Pay credit card bill before 15 jan", True),
+    ("Learn more about neural networks", False),
+    ("Team retro two weeks from now", True),
+    ("The sun was out and I sat in the park", False),
+    ("Lab report due Wed", True),
+    ("Notes from lecture: mitochondria is the powerhouse of the cell", False),
+    ("Meeting moved to tonight", True),
+    ("Gift ideas for Alex: book, scarf, headphones", False),
+    ("Car service due in 6 months", True),
+    ("Trip to Lisbon in december", True),
+    ("Reminder: water the plants", False),
+    ("Hackathon 21.11.2024 - 23.11.2024", True),
+    ("I may go to the gym later", False),
+    ("Coffee with Jordan on Monday morning", True),
+    ("Movie list: Dune, Arrival, Her", False),
+    ("Assignment 3 due 11/30 11:59pm", True),
+    ("Practice guitar scales", False),
+    ("Graduation ceremony May 18th", True),
+    ("Clean out the garage", False),
+    ("Quarterly review next quarter", True),
+    ("Buy 3.5 kg of rice", False),
+    ("Volunteer shift 9am-1pm on Sunday", True),
+    # Phrasing seen in real notes that the first version of the filter missed
+    ("Party at Christmas", True),
+    ("Dinner on Thanksgiving", True),
+    ("Halloween costume party", True),
+    ("New Years Eve party", True),
+    ("Dentist on Sat", True),
+    ("lunch w/ sam sun", True),
+    ("Exam tmr", True),
+    ("Call mom tonite", True),
+    ("Meeting at 3", True),
+    ("meet on the twelfth", True),
+    ("Recital at half past six", True),
+    ("Sat on the couch and read all afternoon", False),
+    ("Sun screen and hat for the beach", False),
+    ("Write the first draft of the essay", False),
+    ("Look at 3 options for the car", False),
+    ("Mortgage rate is at 3.5%", False),
+    ("Vacation this summer", True),
+    ("Pay rent at the end of the month", True),
+    ("Standup every day", True),
+    ("Gym daily at six", True),
+    ("Call mom in the evening", True),
+    ("Dentist in a fortnight", True),
+    ("Report due EOM", True),
+    ("Renew passport before spring", True),
+    ("Trip over winter break", True),
+    ("Lunch at one", True),
+    ("At one point we should repaint the fence", False),
+    ("The spring in the mattress is broken", False),
+    ("Don't let the kids fall off the trampoline", False),
+    ("End of the story: the dog came home", False),
+]
+
+
+def evaluate():
+    tp = fp = fn = tn = 0
+    for text, expected in CORPUS:
+        predicted = has_temporal_expression(text)
+        if predicted and expected:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif expected:
+            fn += 1
+        else:
+            tn += 1
+
+    return {
+        "notes": len(CORPUS),
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "skipped_llm_calls": tn + fn,
+        "missed_notes_with_dates": fn,
+    }
+
+
+def throughput(repeat: int):
+    notes = [text for text, _ in CORPUS] * repeat
+    start = time.perf_counter()
+    for text in notes:
+        has_temporal_expression(text)
+    elapsed = time.perf_counter() - start
+    return {"notes": len(notes), "notes_per_s": len(notes) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps({"accuracy": evaluate(), "throughput": throughput(args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/profile_search.py
+"""
+Profile search latency over a large seeded user_profiles table: the old
+or=(username.ilike.%term%,full_name.ilike.%term%) filter, newest first,
+which scans every row, vs. UserProfileRepository.search and its indexed
+search_user_profiles RPC, emulated with SQLite FTS5 in the PostgREST
+stand-in.
+
+The queries include a typeahead sequence, one request per keystroke.
+
+Run from the backend directory:
+
+    python -m benchmarks.profile_search --profiles 1000000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.keyset_pagination import timed
+
+FIRST_NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy",
+               "mallory", "niaj", "olivia", "peggy", "rupert", "sybil", "trent", "victor", "walter", "zoe"]
+LAST_NAMES = ["smith", "jones", "taylor", "brown", "williams", "wilson", "johnson", "davies", "robinson",
+              "wright", "thompson", "evans", "walker", "white", "roberts", "green", "hall", "wood", "jackson", "clarke"]
+QUERIES = ["al", "ali", "alic", "alice", "alice sm", "alice smith", "walker", "alice4242", "trent9999", "zoe"]
+
+
+def seed(fake, profiles):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    batch = 50000
+    for offset in range(0, profiles, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, profiles)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            rows.append({
+                "id": str(uuid.UUID(int=i + 1)),
+                "username": f"{first}{i}",
+                "full_name": f"{first.title()} {last.title()}",
+                "bio": None,
+                "avatar_url": None,
+                "created_at": (start + timedelta(seconds=i)).isoformat(),
+                "updated_at": (start + timedelta(seconds=i)).isoformat(),
+            })
+        fake.insert_rows("user_profiles", rows)
+
+
+async def run(args):
+    from app.repositories.client import create_postgrest_client
+    from app.repositories.user import UserProfileRepository
+
+    fake = FakePostgrest()
+    start = time.perf_counter()
+    seed(fake, args.profiles)
+    seed_s = time.perf_counter() - start
+
+    client = create_postgrest_client(transport=httpx.MockTransport(fake.handle))
+    profiles = UserProfileRepository(client)
+
+    async def ilike(term):
+        response = await client.table('user_profiles')\
+            .select("*")\
+            .or_(f"username.ilike.%{term}%,full_name.ilike.%{term}%")\
+            .order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(args.page_size)\
+            .execute()
+        return [row['username'] for row in response.data]
+
+    async def indexed(term):
+        page = await profiles.search(term, page_size=args.page_size)
+        return [profile.username for profile in page['items']]
+
+    queries = []
+    for term in QUERIES:
+        ilike_s, ilike_top = await timed(lambda: ilike(term), args.repeat)
+        search_s, search_top = await timed(lambda: indexed(term), args.repeat)
+        queries.append({
+            "query": term,
+            "ilike_ms": round(ilike_s * 1000, 2),
+            "search_ms": round(search_s * 1000, 2),
+            "search_top": search_top[:3],
+        })
+
+    await client.aclose()
+    return {"profiles": args.profiles, "seed_s": round(seed_s, 1), "queries": queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", type=int, default=1000000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
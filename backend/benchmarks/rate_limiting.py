@@ -0,0 +1,136 @@
+# benchmarks/rate_limiting.py
+"""
+What one abusive user does to everyone else's extractions, with and
+without the extraction rate limiter.
+
+The app is served by uvicorn on the Firestore fake and FakeChatModel, with
+EXTRACTION_CONCURRENCY standing in for the OpenAI quota; the clients run
+in their own event loop, as they would over the network. One user sends
+--abuser-concurrency requests to /event_from_text back to back while
+--users other users each send one every --interval seconds. Reports the
+latency and outcome of both, next to the other users on their own, and
+the cost of a limiter check.
+
+Run from the backend directory:
+
+    python -m benchmarks.rate_limiting --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+# Every extraction should reach the model, and the quota be small
+os.environ.setdefault("EXTRACTION_CACHE_BACKEND", "none")
+os.environ.setdefault("EXTRACTION_CONCURRENCY", "8")
+
+from benchmarks.change_feed import serve
+from benchmarks.common import summarize
+from benchmarks.fakes import FakeChatModel, install_firebase_stub, seed_notes
+
+
+async def scenario(client, args, abusers: int) -> dict:
+    latencies = {"abuser": [], "others": []}
+    statuses = {"abuser": {}, "others": {}}
+    deadline = time.perf_counter() + args.seconds
+
+    async def request(kind, user_id, note_id):
+        start = time.perf_counter()
+        response = await client.get(f"/event_from_text/{user_id}/{note_id}")
+        statuses[kind][response.status_code] = statuses[kind].get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            latencies[kind].append(time.perf_counter() - start)
+        return response
+
+    async def abuser(worker):
+        note_id = 0
+        while time.perf_counter() < deadline:
+            note_id = note_id % args.notes + 1
+            response = await request("abuser", "abuser", note_id)
+            if response.status_code == 429 and args.honor_retry_after:
+                await asyncio.sleep(float(response.headers["Retry-After"]))
+
+    async def user(index):
+        note_id = 0
+        while time.perf_counter() < deadline:
+            note_id = note_id % args.notes + 1
+            await request("others", f"user-{index}", note_id)
+            await asyncio.sleep(args.interval)
+
+    await asyncio.gather(
+        *(abuser(worker) for worker in range(abusers)),
+        *(user(index) for index in range(args.users)),
+    )
+    return {
+        kind: {"statuses": {str(code): count for code, count in statuses[kind].items()}, **summarize(latencies[kind])}
+        for kind in latencies
+    }
+
+
+async def check_cost(limiter, count: int = 100000) -> float:
+    start = time.perf_counter()
+    for index in range(count):
+        try:
+            await limiter.check(f"user-{index % 1000}")
+        except Exception:
+            pass
+    return (time.perf_counter() - start) / count
+
+
+async def run(args) -> dict:
+    import httpx
+
+    db = install_firebase_stub()
+    for user_id in ["abuser"] + [f"user-{index}" for index in range(args.users)]:
+        seed_notes(db, user_id, args.notes)
+
+    import app.main
+    from app.agent.get_events_from_data import build_agent_executor, set_agent_executor
+    from app.ratelimit import ExtractionLimiter, InMemoryLimitStore
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    agent_executor = build_agent_executor(llm=FakeChatModel(latency=args.llm_latency))
+    agent_executor.verbose = False
+    set_agent_executor(agent_executor)
+
+    def limiter():
+        return ExtractionLimiter(InMemoryLimitStore(), rate=args.rate, burst=args.burst)
+
+    server, url = serve(app.main.app)
+    results = {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        # "alone" is the well-behaved users without the abuser, for reference
+        for name, current, abusers in (
+            ("alone", None, 0),
+            ("unlimited", None, args.abuser_concurrency),
+            ("limited", limiter(), args.abuser_concurrency),
+        ):
+            app.main.extraction_limiter = current
+            results[name] = await scenario(client, args, abusers)
+    server.should_exit = True
+
+    results["check_us"] = round(await check_cost(limiter()) * 1e6, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=10, help="well-behaved users")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between their requests")
+    parser.add_argument("--abuser-concurrency", type=int, default=50)
+    parser.add_argument("--honor-retry-after", action="store_true", help="the abuser waits out 429s")
+    parser.add_argument("--notes", type=int, default=20, help="notes seeded per user")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per model call")
+    parser.add_argument("--rate", type=float, default=20, help="extractions per minute per user")
+    parser.add_argument("--burst", type=float, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/repositories.py
+"""
+Requests/sec per Supabase repository method against the SQLite-backed
+PostgREST stand-in in benchmarks/fake_postgrest.py.
+
+Part one goes through httpx.MockTransport and measures the repository and
+client overhead alone. Part two serves the stand-in over a local socket and
+compares the shared pooled client with a new client per repository
+instance, which is how BaseRepository used to work.
+
+Run from the backend directory:
+
+    python -m benchmarks.repositories --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+
+import httpx
+
+from benchmarks.fake_postgrest import FakePostgrest
+
+USER_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+def seed(fake, notes, profiles):
+    start = datetime(2024, 1, 1)
+    fake.insert_rows("notes", (
+        {
+            "user_id": str(USER_ID),
+            "title": f"Note {i}",
+            "content": "Lunch with Sam on Friday",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "updated_at": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(notes)
+    ))
+    fake.insert_rows("user_profiles", (
+        {
+            "id": str(uuid.UUID(int=i + 1)),
+            "username": f"user{i}",
+            "full_name": f"Bench User {i}",
+            "bio": None,
+            "avatar_url": None,
+            "created_at": start.isoformat(),
+            "updated_at": start.isoformat(),
+        }
+        for i in range(profiles)
+    ))
+
+
+def methods(notes, profiles):
+    from app.models.note import NoteCreate, NoteUpdate
+    from app.models.user import UserProfileUpdate
+
+    return {
+        "note.create": lambda i: notes().create(NoteCreate(user_id=USER_ID, title="t", content="c")),
+        "note.get": lambda i: notes().get(i % 100 + 1),
+        "note.get_user_notes": lambda i: notes().get_user_notes(USER_ID),
+        "note.update": lambda i: notes().update(i % 100 + 1, NoteUpdate(title="t", content="c")),
+        "user.get": lambda i: profiles().get(uuid.UUID(int=i % 100 + 1)),
+        "user.update": lambda i: profiles().update(uuid.UUID(int=i % 100 + 1), UserProfileUpdate(bio="b")),
+        "user.search": lambda i: profiles().search("user1"),
+    }
+
+
+async def measure(call, requests, concurrency):
+    queue = iter(range(requests))
+
+    async def worker():
+        for i in queue:
+            await call(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def mock_transport(args):
+    from app.repositories.client import create_postgrest_client
+    from app.repositories.note import NoteRepository
+    from app.repositories.user import UserProfileRepository
+
+    fake = FakePostgrest()
+    seed(fake, args.notes, args.profiles)
+    client = create_postgrest_client(transport=httpx.MockTransport(fake.handle))
+
+    calls = methods(lambda: NoteRepository(client), lambda: UserProfileRepository(client))
+    results = {name: await measure(call, args.requests, args.concurrency) for name, call in calls.items()}
+    await client.aclose()
+    return {name: round(rps) for name, rps in results.items()}
+
+
+def serve(fake):
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(fake.asgi_app(), port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def over_socket(args):
+    from app.config import settings
+    from app.repositories.client import create_postgrest_client
+    from app.repositories.note import NoteRepository
+
+    fake = FakePostgrest()
+    seed(fake, args.notes, args.profiles)
+    server, url = serve(fake)
+    settings.SUPABASE_URL = url
+
+    shared = create_postgrest_client()
+
+    async def pooled(i):
+        await NoteRepository(shared).get(i % 100 + 1)
+
+    async def client_per_repository(i):
+        client = create_postgrest_client()
+        try:
+            await NoteRepository(client).get(i % 100 + 1)
+        finally:
+            await client.aclose()
+
+    result = {
+        "shared_pooled_client": round(await measure(pooled, args.requests, args.concurrency)),
+        "client_per_repository": round(await measure(client_per_repository, args.requests, args.concurrency)),
+    }
+    await shared.aclose()
+    server.should_exit = True
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--profiles", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    result = {
+        "mock_transport_requests_per_s": asyncio.run(mock_transport(args)),
+        "socket_note_get_requests_per_s": asyncio.run(over_socket(args)),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
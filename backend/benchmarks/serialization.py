@@ -0,0 +1,135 @@
+# benchmarks/serialization.py
+"""
+Serialization cost of note listings.
+
+Encodes a listing of --notes notes, as Firestore returns them (datetimes
+are DatetimeWithNanoseconds), the ways FastAPI can:
+
+- jsonable_encoder: a plain dict return, FastAPI's jsonable_encoder and
+  JSONResponse (what the listing routes used to do)
+- response_model: validated against NotePage and dumped by pydantic, then
+  JSONResponse (what a response_model route does)
+- fast: FastJSONResponse over the raw documents (what the routes do now)
+- fast, projected: the same with fields=note_id,title,updated_at
+
+Then pages through all of them over the API (in-process on the Firestore
+fake) with and without the projection.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --notes 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from pydantic import TypeAdapter
+
+from benchmarks.fakes import install_firebase_stub
+from app.models.note import NotePage
+from app.responses import FastJSONResponse, orjson
+
+PROJECTION = ["note_id", "title", "updated_at"]
+
+
+def notes(count: int, content_chars: int) -> list:
+    content = ("Meeting with the team on the 3rd of march 2025. " * (content_chars // 48 + 1))[:content_chars]
+    created = DatetimeWithNanoseconds(2025, 1, 1, 9, 30, tzinfo=timezone.utc)
+    return [
+        {
+            'note_id': note_id,
+            'title': f"Note {note_id}",
+            'content': content,
+            'created_at': created,
+            'updated_at': DatetimeWithNanoseconds(2025, 1, 2, 10, 0, 0, note_id % 1000000, tzinfo=timezone.utc),
+        }
+        for note_id in range(1, count + 1)
+    ]
+
+
+def best(fn, runs: int) -> tuple:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), len(body)
+
+
+def encoders(page: dict, projected: dict) -> dict:
+    adapter = TypeAdapter(NotePage)
+    return {
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(page)).body,
+        "response_model": lambda: JSONResponse(adapter.dump_python(adapter.validate_python(page), mode="json")).body,
+        "fast": lambda: FastJSONResponse(page).body,
+        "fast, projected": lambda: FastJSONResponse(projected).body,
+    }
+
+
+async def over_api(args) -> dict:
+    import httpx
+
+    db = install_firebase_stub()
+    collection = db.collection("bench-user")
+    for note in notes(args.notes, args.content_chars):
+        collection.document(str(note['note_id'])).set(note)
+
+    import app.main
+    import logging
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {}
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://bench") as client:
+        for name, fields in (("full", None), ("projected", ",".join(PROJECTION))):
+            start = time.perf_counter()
+            cursor, pages, size = None, 0, 0
+            while True:
+                params = {"page_size": 100}
+                if cursor is not None:
+                    params["cursor"] = cursor
+                if fields is not None:
+                    params["fields"] = fields
+                response = await client.get("/users/bench-user/notes", params=params)
+                response.raise_for_status()
+                pages += 1
+                size += len(response.content)
+                cursor = response.json()["next_cursor"]
+                if cursor is None:
+                    break
+            results[name] = {"pages": pages, "ms": round((time.perf_counter() - start) * 1000, 1), "bytes": size}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--content-chars", type=int, default=500, help="length of each note's content")
+    parser.add_argument("--runs", type=int, default=5, help="best of this many runs per encoder")
+    args = parser.parse_args()
+
+    page = {'items': notes(args.notes, args.content_chars), 'next_cursor': None}
+    projected = {
+        'items': [{field: note[field] for field in PROJECTION} for note in page['items']],
+        'next_cursor': None,
+    }
+
+    encoded = {}
+    for name, fn in encoders(page, projected).items():
+        seconds, size = best(fn, args.runs)
+        encoded[name] = {"ms": round(seconds * 1000, 1), "bytes": size}
+
+    print(json.dumps({
+        "notes": args.notes,
+        "orjson": orjson is not None,
+        "encode": encoded,
+        "api": asyncio.run(over_api(args)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/startup.py
+"""
+Measure how long a fresh worker takes before it can serve traffic:
+`import app.main` and time-to-first-request, with Firebase and the LLM
+replaced by the local fakes.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Executed in a fresh interpreter per run so every import is cold
+CHILD = r"""
+import json, time
+from benchmarks.fakes import FakeAgentExecutor, install_firebase_stub, seed_notes
+
+db = install_firebase_stub()
+seed_notes(db, "bench-user", 10)
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+from app.agent.get_events_from_data import set_agent_executor
+
+set_agent_executor(FakeAgentExecutor())
+
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    client.get("/users/bench-user/notes").raise_for_status()
+    first_request = time.perf_counter()
+    client.get("/event_from_text/bench-user/1").raise_for_status()
+    first_extraction = time.perf_counter()
+
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": started - imported,
+    "first_request_s": first_request - start,
+    "first_extraction_s": first_extraction - start,
+}))
+"""
+
+
+def run_once(warmup: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "AGENT_WARMUP": warmup},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", default="build", choices=["none", "build"])
+    args = parser.parse_args()
+
+    runs = [run_once(args.warmup) for _ in range(args.runs)]
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in runs[0]
+    }
+    print(json.dumps({"warmup": args.warmup, "runs": args.runs, "median": summary}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
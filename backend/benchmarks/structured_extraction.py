@@ -0,0 +1,106 @@
+# benchmarks/structured_extraction.py
+"""
+LLM turns, tokens and latency for extracting events from a fixed set of
+notes with the AgentExecutor loop vs. the single structured-output call
+(EXTRACTION_MODE=structured).
+
+The model is FakeChatModel with a fixed lookup rule: notes naming an
+occasion make the agent consult the retriever first, as the real model
+was seen to do, which costs a retriever round trip and another turn.
+
+Run from the backend directory:
+
+    python -m benchmarks.structured_extraction --llm-latency 0.5 --retriever-latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# Measure the model calls themselves, not the extraction cache
+os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.agent.get_events_from_data import (
+    aoutput_agent_results,
+    aoutput_structured_results,
+    build_agent_executor,
+    build_structured_extractor,
+)
+from benchmarks.fakes import FakeChatModel, FakeRetriever
+
+LOOKUP = r"thanksgiving|super bowl|election day|black friday"
+
+NOTES = [
+    "You have homework due on the 21st of november 2024.",
+    "Team standup moved to Tuesday at 10am.",
+    "Family dinner on Thanksgiving, bring the pie.",
+    "The physics midterm is on March 3rd and covers chapters 1-5.",
+    "Watch party for the Super Bowl at Sam's place.",
+    "Dentist appointment next Friday at 2pm.",
+    "Polling station volunteers meet on Election Day at 6am.",
+    "Black Friday shopping with Alex, leave at 5am.",
+    "Rent is due on the 1st.",
+    "Flight to Denver on 2024-12-20 at 7:45.",
+]
+
+
+async def measure(extract, model, retriever, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run(note):
+        async with slots:
+            start = time.perf_counter()
+            events = await extract(note)
+            latencies.append(time.perf_counter() - start)
+            return events
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run(note) for note in NOTES))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "llm_turns": model.calls,
+        "retriever_calls": retriever.calls,
+        "prompt_tokens": model.prompt_tokens,
+        "completion_tokens": model.completion_tokens,
+        "mean_latency_s": round(sum(latencies) / len(latencies), 3),
+        "max_latency_s": round(max(latencies), 3),
+        "wall_s": round(elapsed, 3),
+        "notes_with_events": sum(isinstance(events, list) and len(events) > 0 for events in results),
+    }
+
+
+async def run(args):
+    model = FakeChatModel(latency=args.llm_latency, lookup=LOOKUP)
+    retriever = FakeRetriever(latency=args.retriever_latency)
+    agent_executor = build_agent_executor(llm=model, retriever=retriever)
+    agent_executor.verbose = False
+    agent = await measure(
+        lambda note: aoutput_agent_results(agent_executor, note), model, retriever, args.concurrency
+    )
+
+    model = FakeChatModel(latency=args.llm_latency, lookup=LOOKUP)
+    retriever = FakeRetriever(latency=args.retriever_latency)
+    extractor = build_structured_extractor(llm=model)
+    structured = await measure(
+        lambda note: aoutput_structured_results(extractor, note), model, retriever, args.concurrency
+    )
+
+    return {"notes": len(NOTES), "agent": agent, "structured": structured}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--retriever-latency", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
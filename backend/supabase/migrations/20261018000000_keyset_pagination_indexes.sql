@@ -0,0 +1,6 @@
+-- Index behind keyset pagination of a user's notes in app/repositories/base.py,
+-- which pages newest first on (created_at, id). Profiles are only paged by
+-- search_user_profiles, which has its own indexes.
+
+create index if not exists notes_user_id_created_at_id_idx
+    on public.notes (user_id, created_at desc, id desc);
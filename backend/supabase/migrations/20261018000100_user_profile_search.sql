@@ -0,0 +1,75 @@
+-- Ranked profile search behind UserProfileRepository.search.
+--
+-- Every word of the query matches as a prefix against an indexed tsvector
+-- of username and full name, so typing "ali smi" finds "Alice Smith".
+-- Trigram similarity catches misspellings. Results are ordered by rank,
+-- then id, and paged with (after_rank, after_id) like the other keyset
+-- pages in app/repositories/base.py.
+
+create extension if not exists pg_trgm;
+
+alter table public.user_profiles
+    add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('simple', coalesce(username, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(full_name, '')), 'B')
+    ) stored;
+
+create index if not exists user_profiles_search_vector_idx
+    on public.user_profiles using gin (search_vector);
+
+create index if not exists user_profiles_username_trgm_idx
+    on public.user_profiles using gin (username gin_trgm_ops);
+
+create index if not exists user_profiles_full_name_trgm_idx
+    on public.user_profiles using gin (full_name gin_trgm_ops);
+
+create or replace function public.search_user_profiles(
+    search_query text,
+    result_limit integer default 10,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (
+    id uuid,
+    username text,
+    full_name text,
+    bio text,
+    avatar_url text,
+    created_at timestamptz,
+    updated_at timestamptz,
+    rank real
+)
+language sql
+stable
+as $$
+    with terms as (
+        -- 'ali' & 'smi' -> 'ali':* & 'smi':*, quoted so input can't inject tsquery syntax
+        select to_tsquery('simple', string_agg(quote_literal(term) || ':*', ' & ')) as query
+        from regexp_split_to_table(lower(trim(search_query)), '[^[:alnum:]_]+') as term
+        where term <> ''
+    ),
+    matches as (
+        select
+            p.id,
+            p.username::text,
+            p.full_name::text,
+            p.bio::text,
+            p.avatar_url::text,
+            p.created_at,
+            p.updated_at,
+            (
+                ts_rank(p.search_vector, terms.query)
+                + greatest(similarity(p.username, search_query), similarity(coalesce(p.full_name, ''), search_query))
+            )::real as rank
+        from public.user_profiles p, terms
+        where p.search_vector @@ terms.query
+           or p.username % search_query
+           or p.full_name % search_query
+    )
+    select *
+    from matches
+    where after_rank is null or (matches.rank, matches.id) < (after_rank, after_id)
+    order by matches.rank desc, matches.id desc
+    limit result_limit;
+$$;
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import pytest
+
+from benchmarks.fakes import install_firebase_stub
+
+# app.main connects to Firebase at import, so the fake has to be in place
+# before any test imports it
+db = install_firebase_stub()
+
+
+@pytest.fixture
+def firestore_db():
+    """The fake Firestore client app.main runs on, emptied for each test."""
+    db._collections.clear()
+    return db
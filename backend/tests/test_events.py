@@ -0,0 +1,53 @@
+# tests/test_events.py
+import httpx
+
+
+async def test_failed_batch_keeps_the_notes_events(firestore_db, monkeypatch):
+    import app.main
+
+    for note_id in ("1", "2"):
+        firestore_db.collection("user-1").document(note_id).set({'note_id': int(note_id), 'content': "Lunch on Friday"})
+    events = [{'title': "Lunch", 'date': "2025-03-07"}]
+    chunks = [{'fingerprint': "abc", 'events': events}]
+    event_id, _ = await app.main.save_event("user-1", "1", None, events, chunks)
+
+    async def extract_events_batch(notes):
+        # The call for note 1 failed, note 2's worked
+        return {'1': {}, '2': events}
+
+    monkeypatch.setattr(app.main, "extract_events_batch", extract_events_batch)
+    monkeypatch.setattr(app.main, "extraction_limiter", None)
+
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://test") as client:
+        response = await client.post("/users/user-1/events/extract_batch", json={'note_ids': ["1", "2"]})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body['failed'] == ["1"]
+    assert [event['note_id'] for event in body['events']] == ["2"]
+
+    event = firestore_db.collection("user-1_events").document(str(event_id)).get().to_dict()
+    assert event['content'] == events
+    assert event['chunks'] == chunks
+
+
+async def test_partly_failed_chunk_is_not_stored(monkeypatch):
+    import app.agent.pipeline as pipeline
+    from app.agent.incremental import extract_chunks
+
+    monkeypatch.setattr(pipeline, "extraction_cache", None)
+    # The note's one chunk is long enough to be split, and one part fails
+    monkeypatch.setattr(pipeline, "split_text", lambda text: ["first half", "second half"])
+    monkeypatch.setattr(pipeline, "LONG_TEXT_TOKENS", 0)
+
+    async def extract(text, mode):
+        return [{'title': text, 'date': "2025-03-07"}] if text == "first half" else {}
+
+    monkeypatch.setattr(pipeline, "_extract", extract)
+
+    extraction = await extract_chunks("Lunch on Friday", None, "agent")
+
+    assert extraction['failed'] == 1
+    assert extraction['chunks'] == []
+    # event_from_text still gets what worked
+    assert await pipeline.extract_events("Lunch on Friday", "agent") == [{'title': "first half", 'date': "2025-03-07"}]
@@ -0,0 +1,85 @@
+# tests/test_feed.py
+import asyncio
+import json
+
+import httpx
+
+from app.feed import RESET, ChangeFeed, event_stream
+
+
+async def test_subscriber_receives_published_change():
+    feed = ChangeFeed()
+    subscription = feed.subscribe("user-1")
+    other = feed.subscribe("user-2")
+
+    event_id = feed.publish("user-1", "note", {"action": "created", "note_id": "1"})
+
+    message = await subscription.get(1)
+    assert message.startswith(f"id: {event_id}\nevent: note\n")
+    assert json.loads(message.split("data: ", 1)[1]) == {"action": "created", "note_id": "1"}
+    assert await other.get(0.01) is None
+
+
+async def test_closed_stream_unsubscribes():
+    feed = ChangeFeed()
+    stream = event_stream(feed.subscribe("user-1"), heartbeat=1)
+
+    assert await stream.__anext__() == "retry: 3000\n\n"
+    feed.publish("user-1", "note", {"action": "created", "note_id": "1"})
+    assert "event: note" in await stream.__anext__()
+    assert feed.stats()["subscribers"] == 1
+
+    # What the server does when the client goes away
+    await stream.aclose()
+    assert feed.stats()["users"] == 0
+    assert feed.stats()["subscribers"] == 0
+
+    feed.publish("user-1", "note", {"action": "created", "note_id": "2"})
+    assert feed.stats()["delivered"] == 1
+
+
+async def test_slow_subscriber_is_reset():
+    feed = ChangeFeed(max_queued=2)
+    subscription = feed.subscribe("user-1")
+
+    for index in range(3):
+        feed.publish("user-1", "note", {"note_id": str(index)})
+
+    assert await subscription.get(0) is RESET
+    assert subscription.resets == 1
+
+
+async def wait_for(condition, timeout: float = 5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_stream_delivers_write_and_is_removed_after_disconnect(firestore_db):
+    import app.main
+    from benchmarks.change_feed import serve
+
+    server, url = serve(app.main.app)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+            async with client.stream("GET", "/users/user-1/changes") as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                await wait_for(lambda: app.main.change_feed.stats()["subscribers"] == 1)
+
+                created = await client.post(
+                    "/users/user-1/create_notes", params={"title": "Lunch", "content": "Lunch on Friday"}
+                )
+                created.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        change = json.loads(line[len("data: "):])
+                        break
+            assert change["action"] == "created"
+            assert change["title"] == "Lunch"
+
+            # The client hung up, the worker must notice and drop the subscription
+            await wait_for(lambda: app.main.change_feed.stats()["subscribers"] == 0)
+    finally:
+        server.should_exit = True
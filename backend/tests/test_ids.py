@@ -0,0 +1,45 @@
+# tests/test_ids.py
+import asyncio
+import itertools
+
+from app.ids import IdAllocator
+
+
+async def test_concurrent_creates_across_workers_get_unique_ids(firestore_db, monkeypatch):
+    import app.main
+
+    collection = firestore_db.collection("user-1")
+    for note_id in range(1, 6):
+        # Created before the counter existed
+        collection.document(str(note_id)).set({'note_id': note_id})
+
+    # Two workers' allocators on the same Firestore, taking turns
+    workers = [IdAllocator(app.main.store, block_size=3), IdAllocator(app.main.store, block_size=3)]
+    turns = itertools.cycle(workers)
+
+    async def next_note_id(user_id):
+        return await next(turns).next_id(user_id, 'note_id')
+
+    monkeypatch.setattr(app.main, "get_next_note_id", next_note_id)
+
+    created = await asyncio.gather(*(
+        app.main.create_note("user-1", f"Note {index}", "Lunch on Friday") for index in range(100)
+    ))
+
+    note_ids = [note['note_id'] for note in created]
+    assert len(set(note_ids)) == 100
+    assert min(note_ids) > 5
+    assert len(list(collection.stream())) == 105
+
+
+async def test_dropped_blocks_are_skipped_not_reused(firestore_db):
+    import app.main
+
+    allocator = IdAllocator(app.main.store, block_size=10, max_blocks=1)
+    first = await allocator.next_id("a", 'note_id')
+    # Reserving for another collection drops a's block
+    await allocator.next_id("b", 'note_id')
+    second = await allocator.next_id("a", 'note_id')
+
+    assert len(allocator._blocks) == 1
+    assert second > first + 1
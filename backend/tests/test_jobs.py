@@ -0,0 +1,61 @@
+# tests/test_jobs.py
+import asyncio
+
+from app.jobs import JobQueue
+from app.models.job import JobStatus
+
+
+async def wait_finished(queue, job, timeout: float = 5):
+    async def poll():
+        while queue.get(job.id).status not in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_failed_chunks_are_retried(firestore_db, monkeypatch):
+    import app.main
+
+    firestore_db.collection("user-1").document("1").set({'note_id': 1, 'content': "Lunch on Friday"})
+    attempts = []
+
+    async def extract_chunks(text, previous, mode):
+        attempts.append(previous)
+        if len(attempts) == 1:
+            # The model call failed, as aoutput_agent_results reports it
+            return {'chunks': [], 'events': [], 'extracted': 1, 'failed': 1}
+        return {'chunks': [{'fingerprint': "abc", 'events': []}], 'events': [], 'extracted': 1, 'failed': 0}
+
+    monkeypatch.setattr(app.main, "extract_chunks", extract_chunks)
+    queue = JobQueue(app.main.run_event_job, workers=1, retry_backoff=0.01)
+    queue.start()
+    try:
+        job = queue.submit("user-1", note_id="1")
+        await wait_finished(queue, job)
+    finally:
+        await queue.stop()
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.attempts == 2
+    assert job.result['failed_chunks'] == 0
+
+
+async def test_incomplete_job_keeps_its_result_when_out_of_attempts(firestore_db, monkeypatch):
+    import app.main
+
+    firestore_db.collection("user-1").document("1").set({'note_id': 1, 'content': "Lunch on Friday"})
+
+    async def extract_chunks(text, previous, mode):
+        return {'chunks': [], 'events': [], 'extracted': 1, 'failed': 1}
+
+    monkeypatch.setattr(app.main, "extract_chunks", extract_chunks)
+    queue = JobQueue(app.main.run_event_job, workers=1, max_attempts=2, retry_backoff=0.01)
+    queue.start()
+    try:
+        job = queue.submit("user-1", note_id="1")
+        await wait_finished(queue, job)
+    finally:
+        await queue.stop()
+
+    assert job.status == JobStatus.FAILED
+    assert job.attempts == 2
+    assert job.result['failed_chunks'] == 1
@@ -0,0 +1,54 @@
+# tests/test_ratelimit.py
+import pytest
+
+from app.ratelimit import ExtractionLimiter, InMemoryLimitStore, RateLimitedError
+
+
+def limiter(**kwargs):
+    # Rates per minute; slow enough that nothing refills during a test
+    return ExtractionLimiter(InMemoryLimitStore(), **{"rate": 0.001, "global_rate": 0.001, "budget": 0, **kwargs})
+
+
+async def test_global_rejection_costs_no_user_token():
+    extractions = limiter(burst=1, global_burst=1)
+    await extractions.check("user-1")
+
+    with pytest.raises(RateLimitedError) as rejected:
+        await extractions.check("user-2")
+    assert rejected.value.reason == "global"
+
+    # With the global token given back, user-2's own bucket is still full
+    await extractions.refund("user-1")
+    await extractions.check("user-2")
+
+
+async def test_user_rejection_gives_back_global_token():
+    extractions = limiter(burst=1, global_burst=2)
+    await extractions.check("user-1")
+
+    with pytest.raises(RateLimitedError) as rejected:
+        await extractions.check("user-1")
+    assert rejected.value.reason == "user"
+
+    # One global token left despite the rejected request
+    await extractions.check("user-2")
+    with pytest.raises(RateLimitedError):
+        await extractions.check("user-3")
+
+
+async def test_missing_note_is_not_charged(firestore_db, monkeypatch):
+    import httpx
+    import app.main
+
+    extractions = limiter(burst=1, global_rate=0)
+    monkeypatch.setattr(app.main, "extraction_limiter", extractions)
+
+    async with httpx.AsyncClient(app=app.main.app, base_url="http://test") as client:
+        for _ in range(3):
+            response = await client.post("/users/user-1/create_event_from_note/404")
+            assert response.status_code == 404
+        response = await client.get("/event_from_text/user-1/404")
+        assert response.status_code == 404
+
+    assert extractions.allowed == 0
+    await extractions.check("user-1")
@@ -0,0 +1,107 @@
+# tests/test_repositories.py
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.repositories.client import create_postgrest_client
+from app.repositories.note import NoteRepository
+from app.repositories.user import UserProfileRepository
+from benchmarks.fake_postgrest import FakePostgrest
+
+USER_ID = uuid.UUID(int=1)
+
+
+@pytest.fixture
+def postgrest(monkeypatch):
+    """A pooled client on httpx.MockTransport over the PostgREST stand-in, and the requests it sent."""
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://supabase.test")
+    monkeypatch.setattr(settings, "SUPABASE_KEY", "test-key")
+
+    fake = FakePostgrest()
+    start = datetime(2024, 1, 1)
+    fake.insert_rows("notes", (
+        {
+            "user_id": str(USER_ID),
+            "title": f"Note {i}",
+            "content": "Lunch on Friday",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "updated_at": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(15)
+    ))
+    fake.insert_rows("user_profiles", [{
+        "id": str(USER_ID),
+        "username": "sam",
+        "full_name": "Sam Doe",
+        "bio": None,
+        "avatar_url": None,
+        "created_at": start.isoformat(),
+        "updated_at": start.isoformat(),
+    }])
+
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        return fake.handle(request)
+
+    # Nothing to close, MockTransport holds no connections
+    client = create_postgrest_client(transport=httpx.MockTransport(handle))
+    return client, requests
+
+
+async def test_get_user_profile(postgrest):
+    client, requests = postgrest
+
+    profile = await UserProfileRepository(client).get(USER_ID)
+
+    assert profile.id == USER_ID
+    assert profile.username == "sam"
+    assert requests[0].url.path == "/rest/v1/user_profiles"
+    assert requests[0].headers["apikey"] == "test-key"
+
+
+async def test_get_by_username(postgrest):
+    client, _ = postgrest
+
+    profile = await UserProfileRepository(client).get_by_username("sam")
+
+    assert profile.full_name == "Sam Doe"
+
+
+async def test_get_user_notes_pages_with_cursor(postgrest):
+    client, _ = postgrest
+    repository = NoteRepository(client)
+
+    first = await repository.get_user_notes(USER_ID, page_size=10)
+    second = await repository.get_user_notes(USER_ID, cursor=first['next_cursor'], page_size=10)
+
+    assert [note.title for note in first['items']][:2] == ["Note 14", "Note 13"]
+    assert len(second['items']) == 5
+    assert second['next_cursor'] is None
+    ids = [note.id for note in first['items'] + second['items']]
+    assert len(set(ids)) == 15
+
+
+async def test_get_note(postgrest):
+    client, _ = postgrest
+    repository = NoteRepository(client)
+    note_id = (await repository.get_user_notes(USER_ID, page_size=1))['items'][0].id
+
+    note = await repository.get(note_id)
+
+    assert note.id == note_id
+    assert note.user_id == USER_ID
+
+
+async def test_repositories_share_one_client(postgrest):
+    client, requests = postgrest
+
+    await UserProfileRepository(client).get(USER_ID)
+    await NoteRepository(client).get_user_notes(USER_ID)
+
+    assert len(requests) == 2
+    assert NoteRepository(client).supabase is UserProfileRepository(client).supabase
@@ -0,0 +1,65 @@
+# tests/test_search.py
+from app.search import NoteSearch
+
+
+async def test_index_rebuilt_after_write_through_another_worker(firestore_db):
+    import app.main
+
+    await app.main.create_note("user-1", "Lunch", "Lunch with Sam on Friday")
+    # Another worker's NoteSearch on the same Firestore
+    other = NoteSearch(app.main.store, app.main.collection_versions)
+    assert (await other.index("user-1")).search("dinner") == []
+
+    created = await app.main.create_note("user-1", "Dinner", "Dinner with Alex on Saturday")
+
+    index = await other.index("user-1")
+    assert [note_id for note_id, _ in index.search("dinner")] == [str(created['note_id'])]
+    assert other.stats()["stale_rebuilds"] == 1
+
+
+async def test_own_writes_keep_the_index(firestore_db):
+    import app.main
+
+    search = NoteSearch(app.main.store, app.main.collection_versions)
+    app.main.note_search, original = search, app.main.note_search
+    try:
+        lunch = await app.main.create_note("user-1", "Lunch", "Lunch with Sam on Friday")
+        await search.index("user-1")
+
+        created = await app.main.create_note("user-1", "Dinner", "Dinner with Alex on Saturday")
+        note_id = str(lunch['note_id'])
+        await app.main.update_note("user-1", note_id, app.main.NoteUpdate(title="Brunch", content="Brunch on Sunday"))
+
+        index = await search.index("user-1")
+        assert [note_id for note_id, _ in index.search("dinner")] == [str(created['note_id'])]
+        assert [found for found, _ in index.search("brunch")] == [note_id]
+        assert search.builds == 1
+    finally:
+        app.main.note_search = original
+
+
+async def test_marker_failure_does_not_fail_the_write(firestore_db, monkeypatch):
+    import app.main
+
+    search = NoteSearch(app.main.store, app.main.collection_versions)
+    monkeypatch.setattr(app.main, "note_search", search)
+    lunch = await app.main.create_note("user-1", "Lunch", "Lunch with Sam on Friday")
+    await search.index("user-1")
+
+    async def aborted(collection):
+        raise RuntimeError("Transaction aborted")
+
+    # Falls back to a plain bump when the transaction fails
+    monkeypatch.setattr(app.main.collection_versions, "advance", aborted)
+    before = await app.main.collection_versions.get("user-1")
+    created = await app.main.create_note("user-1", "Dinner", "Dinner with Alex on Saturday")
+    assert (await app.main.collection_versions.get("user-1"))['version'] != before['version']
+
+    # And answers anyway when the marker can't be written at all
+    monkeypatch.setattr(app.main.collection_versions, "bump", aborted)
+    note_id = str(lunch['note_id'])
+    updated = await app.main.update_note("user-1", note_id, app.main.NoteUpdate(title="Brunch", content="Brunch"))
+
+    assert updated['message'] == 'Note updated successfully'
+    assert firestore_db.collection("user-1").document(str(created['note_id'])).get().exists
+    assert firestore_db.collection("user-1").document(note_id).get().to_dict()['title'] == "Brunch"